@@ -1,7 +1,5 @@
 from flask import Flask, request, jsonify, render_template, send_file, send_from_directory
 from flask_cors import CORS
-from flask_limiter import Limiter
-from flask_limiter.util import get_remote_address
 from flask_restx import Api, Resource
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
@@ -36,7 +34,9 @@ if not app.debug and not app.testing:
 
 # Initialize extensions
 from models.db_instance import db
+from models.database import init_read_replica
 db.init_app(app)
+init_read_replica(app)
 migrate = Migrate(app, db)
 
 # Configure CORS
@@ -51,12 +51,9 @@ api = Api(
     doc='/swagger/'  # Swagger UI endpoint
 )
 
-# Configure rate limiting
-limiter = Limiter(
-    key_func=get_remote_address,
-    app=app,
-    default_limits=["100 per 15 minutes"]
-)
+# Configure rate limiting (storage, strategy and limits come from Config)
+from utils.rate_limiting import limiter
+limiter.init_app(app)
 
 # Import models to ensure they are registered with SQLAlchemy
 from models import db_models
@@ -66,18 +63,63 @@ from routes.visit_routes import visit_bp, api as visit_api
 from routes.stats_routes import stats_bp, api as stats_api
 from routes.tag_routes import tag_bp, api as tag_api
 from routes.tracking_routes import tracking_bp, api as tracking_api
+from routes.health_routes import health_bp, api as health_api
+from routes.metrics_routes import metrics_bp, api as metrics_api
 
 # Register blueprints
 app.register_blueprint(visit_bp)
 app.register_blueprint(stats_bp)
 app.register_blueprint(tag_bp)
 app.register_blueprint(tracking_bp)
+app.register_blueprint(health_bp)
+
+# Health checks are polled by load balancers and must not be rate limited
+limiter.exempt(health_bp)
+
+# Check ingestion settings once, so a typo fails startup instead of every request
+from services.ingestion_service import IngestionService
+from services.bot_detection_service import BotDetectionService
+from services.ingest_queue_service import IngestQueueService
+IngestionService.init_app(app)
+BotDetectionService.init_app(app)
+IngestQueueService.init_app(app)
+
+# Configure SQL query profiling
+if app.config['QUERY_PROFILING_ENABLED']:
+    from services.query_profiler_service import QueryProfilerService
+    QueryProfilerService.init_app(app)
+
+# Configure metrics collection
+if app.config['METRICS_ENABLED']:
+    from services.metrics_service import MetricsService
+    MetricsService.init_app(app)
+    app.register_blueprint(metrics_bp)
+    limiter.exempt(metrics_bp)
+
+# Compress JSON responses for clients that accept gzip/Brotli
+from services.compression_service import CompressionService
+CompressionService.init_app(app)
+
+# Render and precompress tracker scripts before the first request
+from services.script_cache_service import ScriptCacheService
+ScriptCacheService.warm()
+
+# Replay events spooled during a database outage before the last restart
+from services.spool_service import SpoolService
+SpoolService.init_app(app)
+
+# Register CLI commands
+from commands import register_commands
+register_commands(app)
 
 # Add namespaces to main API for Swagger documentation
 api.add_namespace(visit_api)
 api.add_namespace(stats_api)
 api.add_namespace(tag_api)
 api.add_namespace(tracking_api)
+api.add_namespace(health_api)
+if app.config['METRICS_ENABLED']:
+    api.add_namespace(metrics_api)
 
 @app.route('/')
 def index():
@@ -0,0 +1,191 @@
+"""
+Load test: replay synthetic tracking traffic against a running server
+
+Sends /api/track requests built by synthetic_traffic.TrafficGenerator from
+--concurrency threads, each with its own keep-alive connection, at --rate
+requests per second (0 sends as fast as the server answers). With a fixed
+rate, latency is measured from each request's scheduled send time, so a
+stalled server shows up in the percentiles instead of silently lowering the
+request rate. --get replays read endpoints instead, e.g. to measure stats
+query latency after seeding the database with seed_database.py.
+
+The server limits requests per client IP: raise RATELIMIT_INGEST (and
+RATELIMIT_READ for --get) on the server under test, or 429s will dominate.
+
+Usage (from the backend directory, with the server running):
+    python benchmarks/load_test.py [--url http://localhost:5000] [--rate 500]
+        [--concurrency 16] [--duration 30] [--seed 0] [--json]
+    python benchmarks/load_test.py --get '/api/tracking/stats?days=30' --get /api/stats
+"""
+from collections import Counter
+from urllib.parse import urlsplit
+import argparse
+import http.client
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic_traffic import TrafficGenerator
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an ascending list"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+class TrackRequests:
+    """
+    Thread-safe source of /api/track requests from the traffic generator
+
+    Session and event IDs get a per-run prefix, so a rerun with the same
+    seed is not discarded by the server as duplicate deliveries.
+    """
+
+    def __init__(self, generator: TrafficGenerator, geolocate: bool):
+        self._events = generator.iter_events()
+        self._geolocate = geolocate
+        self._run = uuid.uuid4().hex[:8]
+        self._lock = threading.Lock()
+
+    def next(self):
+        with self._lock:
+            event = next(self._events)
+        payload = {key: value for key, value in event.items() if key not in ('ip_address', 'user_agent', 'timestamp')}
+        payload['session_id'] = f"{self._run}-{payload['session_id']}"
+        payload['client_event_id'] = f"{self._run}-{payload['client_event_id']}"
+        if self._geolocate:
+            payload.pop('country')
+            payload.pop('city')
+        headers = {'Content-Type': 'application/json', 'User-Agent': event['user_agent']}
+        return 'POST', '/api/track', json.dumps(payload), headers
+
+
+class ReadRequests:
+    """Round-robin source of GET requests for read endpoints"""
+
+    def __init__(self, paths):
+        self._paths = itertools.cycle(paths)
+        self._lock = threading.Lock()
+
+    def next(self):
+        with self._lock:
+            path = next(self._paths)
+        return 'GET', path, None, {'Accept-Encoding': 'gzip'}
+
+
+def worker(url, source, schedule, deadline, results):
+    """Send requests until the deadline or the request budget runs out"""
+    parts = urlsplit(url)
+    connection_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+    connection = connection_class(parts.netloc, timeout=30)
+    latencies, statuses = results['latencies'], results['statuses']
+
+    while True:
+        scheduled = schedule()
+        if scheduled is None:
+            break
+        now = time.perf_counter()
+        if max(scheduled, now) >= deadline:
+            break
+        if scheduled > now:
+            time.sleep(scheduled - now)
+        started = scheduled or time.perf_counter()
+
+        method, path, body, headers = source.next()
+        try:
+            connection.request(method, parts.path.rstrip('/') + path, body=body, headers=headers)
+            response = connection.getresponse()
+            response.read()
+            status = response.status
+        except (OSError, http.client.HTTPException) as e:
+            connection.close()
+            connection = connection_class(parts.netloc, timeout=30)
+            status = type(e).__name__
+        latencies.append(time.perf_counter() - started)
+        statuses[status] += 1
+    connection.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--url', default='http://localhost:5000', help='Server base URL')
+    parser.add_argument('--rate', type=float, default=0, help='Requests per second (0: as fast as possible)')
+    parser.add_argument('--concurrency', type=int, default=16, help='Concurrent connections')
+    parser.add_argument('--duration', type=float, default=30, help='Seconds to run')
+    parser.add_argument('--requests', type=int, default=0, help='Stop after this many requests (0: no limit)')
+    parser.add_argument('--seed', type=int, default=0, help='Traffic generator seed')
+    parser.add_argument('--bot-share', type=float, default=0.05, help='Share of sessions made by crawlers')
+    parser.add_argument('--geolocate', action='store_true',
+                        help='Omit country and city so the server geolocates each event')
+    parser.add_argument('--get', dest='paths', action='append', default=[],
+                        help='Replay GET requests to this path instead of /api/track; repeat for several')
+    parser.add_argument('--json', action='store_true', help='Print the summary as one JSON line')
+    args = parser.parse_args()
+
+    if args.paths:
+        source = ReadRequests(args.paths)
+    else:
+        source = TrackRequests(TrafficGenerator(seed=args.seed, bot_share=args.bot_share), args.geolocate)
+
+    counter = itertools.count()
+    started = time.perf_counter()
+    deadline = started + args.duration
+
+    def schedule():
+        """Scheduled send time of the next request, 0 to send at once, None when done"""
+        index = next(counter)
+        if args.requests and index >= args.requests:
+            return None
+        return started + index / args.rate if args.rate else 0
+
+    per_thread = [{'latencies': [], 'statuses': Counter()} for _ in range(args.concurrency)]
+    threads = [
+        threading.Thread(target=worker, args=(args.url, source, schedule, deadline, results), daemon=True)
+        for results in per_thread
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(itertools.chain.from_iterable(results['latencies'] for results in per_thread))
+    statuses = sum((results['statuses'] for results in per_thread), Counter())
+    summary = {
+        'target': ','.join(args.paths) or '/api/track',
+        'requests': len(latencies),
+        'seconds': round(elapsed, 2),
+        'throughput_rps': round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        'target_rps': args.rate or None,
+        'concurrency': args.concurrency,
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 2),
+        'p90_ms': round(percentile(latencies, 0.90) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+        'max_ms': round(latencies[-1] * 1000, 2) if latencies else 0.0,
+        'statuses': {str(status): count for status, count in sorted(statuses.items(), key=str)},
+    }
+
+    if args.json:
+        print(json.dumps(summary))
+        return
+    print(f"{summary['requests']} requests to {summary['target']} in {summary['seconds']}s "
+          f"with {args.concurrency} connections" + (f" at {args.rate:g}/s" if args.rate else ''))
+    print(f"Throughput: {summary['throughput_rps']} requests/s")
+    print(f"Latency: p50 {summary['p50_ms']} ms, p90 {summary['p90_ms']} ms, "
+          f"p99 {summary['p99_ms']} ms, max {summary['max_ms']} ms")
+    print('Responses: ' + ', '.join(f"{status}: {count}" for status, count in summary['statuses'].items()))
+    if statuses.get(429):
+        print('Warning: requests were rate limited; raise the server\'s RATELIMIT_* settings for load tests')
+
+
+if __name__ == '__main__':
+    main()
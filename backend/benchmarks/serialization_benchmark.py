@@ -0,0 +1,106 @@
+"""
+Benchmark the per-row cost of serializing list responses
+
+Compares the previous path (Pydantic model -> model_dump() -> jsonify) with
+utils.serialization.json_response for a TrackingEventsResponse page.
+
+Usage (from the backend directory):
+    python benchmarks/serialization_benchmark.py [--rows 500] [--repeat 50]
+"""
+from datetime import datetime, timedelta
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from flask import Flask, jsonify
+from schemas.tracking_schemas import TrackingEventsResponse
+from utils import serialization
+from utils.serialization import json_response
+
+
+def make_events(count):
+    """Build event dicts shaped like TrackingEvent.to_dict()"""
+    started = datetime(2024, 1, 1, 12, 0, 0)
+    return [
+        {
+            'id': i,
+            'session_id': f'session-{i % 97}',
+            'page_url': f'https://example.com/products/{i % 250}',
+            'ip_address': '203.0.113.10',
+            'user_agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) '
+                          'Chrome/120.0.0.0 Safari/537.36',
+            'referrer': 'https://www.google.com/',
+            'browser': 'Chrome',
+            'os': 'Windows',
+            'device': 'Desktop',
+            'country': 'US',
+            'city': 'Seattle',
+            'timestamp': (started + timedelta(seconds=i)).strftime('%Y-%m-%d %H:%M:%S'),
+            'is_entry_page': i % 5 == 0,
+            'is_exit_page': False,
+            'event_name': 'add_to_cart' if i % 7 == 0 else None,
+            'event_data': {'sku': f'SKU-{i}', 'price': 19.99, 'quantity': 1} if i % 7 == 0 else None,
+        }
+        for i in range(count)
+    ]
+
+
+def build_response_model(events):
+    return TrackingEventsResponse(
+        events=events, page=1, per_page=len(events), type='all', total=len(events), has_next=False
+    )
+
+
+def time_path(label, render, rows, repeat):
+    render()  # Warm up
+    started = time.perf_counter()
+    for _ in range(repeat):
+        render()
+    elapsed = time.perf_counter() - started
+    per_row_us = elapsed / (repeat * rows) * 1e6
+    print(f"{label:<42} {elapsed / repeat * 1000:9.2f} ms/response {per_row_us:8.2f} us/row")
+    return per_row_us
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=500, help='Events per response')
+    parser.add_argument('--repeat', type=int, default=50, help='Responses rendered per path')
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    events = make_events(args.rows)
+    encoder = 'orjson' if serialization.orjson is not None else 'flask json (orjson not installed)'
+    print(f"{args.rows} rows x {args.repeat} responses, encoder: {encoder}\n")
+
+    with app.app_context():
+        model = build_response_model(events)
+        baseline = jsonify(model.model_dump()).get_data()
+        fast = json_response(model).get_data()
+        if app.json.loads(baseline) != app.json.loads(fast):
+            raise SystemExit('Serialized payloads differ')
+
+        results = {
+            'encode: model_dump + jsonify': time_path(
+                'encode: model_dump + jsonify',
+                lambda: jsonify(model.model_dump()).get_data(), args.rows, args.repeat),
+            'encode: json_response': time_path(
+                'encode: json_response',
+                lambda: json_response(model).get_data(), args.rows, args.repeat),
+            'end-to-end: validate + dump + jsonify': time_path(
+                'end-to-end: validate + dump + jsonify',
+                lambda: jsonify(build_response_model(events).model_dump()).get_data(), args.rows, args.repeat),
+            'end-to-end: validate + json_response': time_path(
+                'end-to-end: validate + json_response',
+                lambda: json_response(build_response_model(events)).get_data(), args.rows, args.repeat),
+        }
+
+    speedup = results['encode: model_dump + jsonify'] / results['encode: json_response']
+    print(f"\nEncoding speedup: {speedup:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,218 @@
+"""
+Synthetic tracking traffic shared by the load test and the database seeder
+
+Sessions follow a simple model of a real site: page popularity is Zipf
+distributed, a session views a geometric number of pages, some page views
+are followed by a custom event, and browsers, countries and referrers are
+drawn from weighted lists. A share of sessions comes from crawlers, so the
+bot filter sees realistic input. The same seed produces the same traffic,
+which keeps before/after measurements comparable.
+"""
+from datetime import datetime, timedelta
+from itertools import accumulate
+from bisect import bisect
+import random
+
+# (weight, browser, os, device, User-Agent)
+BROWSERS = (
+    (30, 'Chrome', 'Windows 10', 'Desktop',
+     'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) '
+     'Chrome/120.0.0.0 Safari/537.36'),
+    (18, 'Chrome', 'Android', 'Mobile',
+     'Mozilla/5.0 (Linux; Android 14; Pixel 8) AppleWebKit/537.36 (KHTML, like Gecko) '
+     'Chrome/120.0.0.0 Mobile Safari/537.36'),
+    (15, 'Safari', 'iOS', 'Mobile',
+     'Mozilla/5.0 (iPhone; CPU iPhone OS 17_2 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) '
+     'Version/17.2 Mobile/15E148 Safari/604.1'),
+    (10, 'Safari', 'macOS', 'Desktop',
+     'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) '
+     'Version/17.2 Safari/605.1.15'),
+    (8, 'Firefox', 'Windows 10', 'Desktop',
+     'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:121.0) Gecko/20100101 Firefox/121.0'),
+    (7, 'Edge', 'Windows 10', 'Desktop',
+     'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) '
+     'Chrome/120.0.0.0 Safari/537.36 Edg/120.0.0.0'),
+    (4, 'Safari', 'iOS', 'Tablet',
+     'Mozilla/5.0 (iPad; CPU OS 17_2 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) '
+     'Version/17.2 Mobile/15E148 Safari/604.1'),
+    (3, 'Firefox', 'Linux', 'Desktop',
+     'Mozilla/5.0 (X11; Ubuntu; Linux x86_64; rv:121.0) Gecko/20100101 Firefox/121.0'),
+    (2, 'Samsung Browser', 'Android', 'Mobile',
+     'Mozilla/5.0 (Linux; Android 13; SM-S911B) AppleWebKit/537.36 (KHTML, like Gecko) '
+     'SamsungBrowser/23.0 Chrome/115.0.0.0 Mobile Safari/537.36'),
+)
+
+BOT_USER_AGENTS = (
+    'Mozilla/5.0 (compatible; Googlebot/2.1; +http://www.google.com/bot.html)',
+    'Mozilla/5.0 (compatible; bingbot/2.0; +http://www.bing.com/bingbot.htm)',
+    'Mozilla/5.0 (compatible; AhrefsBot/7.0; +http://ahrefs.com/robot/)',
+    'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) HeadlessChrome/120.0.0.0 Safari/537.36',
+    'python-requests/2.31.0',
+)
+
+# (weight, country, cities)
+COUNTRIES = (
+    (35, 'United States', ('New York', 'Los Angeles', 'Chicago', 'Seattle', 'Austin')),
+    (12, 'Germany', ('Berlin', 'Munich', 'Hamburg')),
+    (10, 'United Kingdom', ('London', 'Manchester')),
+    (8, 'India', ('Bengaluru', 'Mumbai', 'Delhi')),
+    (7, 'France', ('Paris', 'Lyon')),
+    (6, 'Canada', ('Toronto', 'Vancouver')),
+    (6, 'Brazil', ('Sao Paulo', 'Rio de Janeiro')),
+    (5, 'Japan', ('Tokyo', 'Osaka')),
+    (4, 'Australia', ('Sydney', 'Melbourne')),
+    (7, 'Netherlands', ('Amsterdam', 'Rotterdam')),
+)
+
+# (weight, referrer of the entry page view)
+REFERRERS = (
+    (40, None),
+    (30, 'https://www.google.com/'),
+    (8, 'https://www.bing.com/'),
+    (8, 'https://t.co/'),
+    (6, 'https://www.facebook.com/'),
+    (4, 'https://news.ycombinator.com/'),
+    (4, 'https://newsletter.example.com/'),
+)
+
+# (event name, data builder)
+CUSTOM_EVENTS = (
+    ('add_to_cart', lambda rng: {'sku': f'SKU-{rng.randrange(1000)}', 'quantity': rng.randint(1, 3)}),
+    ('signup', lambda rng: {'plan': rng.choice(('free', 'pro', 'team'))}),
+    ('video_play', lambda rng: {'video_id': rng.randrange(50), 'position': rng.randrange(300)}),
+    ('download', lambda rng: {'file': f'whitepaper-{rng.randrange(10)}.pdf'}),
+)
+
+
+class WeightedChoice:
+    """Draws from (weight, value) pairs with one bisect per draw"""
+
+    def __init__(self, weighted):
+        self._values = [value for _, value in weighted]
+        self._cumulative = list(accumulate(weight for weight, _ in weighted))
+
+    def draw(self, rng: random.Random):
+        return self._values[bisect(self._cumulative, rng.random() * self._cumulative[-1])]
+
+
+def site_pages(count: int):
+    """Page paths of a synthetic site, most popular first"""
+    fixed = ['/', '/pricing', '/features', '/signup', '/login', '/about', '/contact', '/blog', '/docs']
+    pages = fixed[:count]
+    sections = ('/blog/post-', '/products/', '/docs/guide-')
+    index = 0
+    while len(pages) < count:
+        pages.append(f"{sections[index % len(sections)]}{index // len(sections) + 1}")
+        index += 1
+    return pages
+
+
+class TrafficGenerator:
+    """
+    Generates synthetic sessions of page views and custom events
+
+    Args:
+        seed: Random seed; the same seed yields the same traffic
+        site: Origin prepended to page paths
+        pages: Number of distinct pages
+        visitors: Number of distinct visitor IP addresses
+        bot_share: Share of sessions made by crawlers
+        event_share: Chance that a page view is followed by a custom event
+        mean_pages: Mean page views per session
+        zipf: Exponent of the page popularity distribution
+    """
+
+    def __init__(self, seed: int = 0, site: str = 'https://shop.example.com', pages: int = 500,
+                 visitors: int = 50000, bot_share: float = 0.05, event_share: float = 0.15,
+                 mean_pages: float = 4.0, zipf: float = 1.1):
+        self.rng = random.Random(seed)
+        self.site = site
+        self.bot_share = bot_share
+        self.event_share = event_share
+        self.mean_pages = mean_pages
+        self._pages = WeightedChoice(
+            [(1 / rank ** zipf, path) for rank, path in enumerate(site_pages(pages), start=1)]
+        )
+        self._browsers = WeightedChoice([(weight, rest) for weight, *rest in BROWSERS])
+        self._countries = WeightedChoice([(weight, (country, cities)) for weight, country, cities in COUNTRIES])
+        self._referrers = WeightedChoice(REFERRERS)
+        # Addresses from 100.64.0.0/10, which no real client uses
+        self._ips = [f"100.{64 + i // 65536 % 64}.{i // 256 % 256}.{i % 256}" for i in range(visitors)]
+
+    def _random_id(self) -> str:
+        return f"{self.rng.getrandbits(128):032x}"
+
+    def session(self, started: datetime):
+        """
+        Generate the events of one session, in time order
+
+        Args:
+            started: Time of the first page view
+
+        Returns:
+            List of event dictionaries with the /api/track fields plus
+            ip_address, user_agent and timestamp
+        """
+        rng = self.rng
+        if rng.random() < self.bot_share:
+            user_agent = rng.choice(BOT_USER_AGENTS)
+            browser = os_name = device = None
+        else:
+            browser, os_name, device, user_agent = self._browsers.draw(rng)
+        country, cities = self._countries.draw(rng)
+        session_id = self._random_id()
+        ip_address = rng.choice(self._ips)
+
+        # Geometric page count with the configured mean
+        page_views = 1
+        while rng.random() > 1 / self.mean_pages:
+            page_views += 1
+
+        events = []
+        timestamp = started
+        for index in range(page_views):
+            page = f"{self.site}{self._pages.draw(rng)}"
+            event = {
+                'page_url': page,
+                'referrer': self._referrers.draw(rng) if index == 0 else events[-1]['page_url'],
+                'browser': browser,
+                'os': os_name,
+                'device': device,
+                'country': country,
+                'city': rng.choice(cities),
+                'session_id': session_id,
+                'client_event_id': self._random_id(),
+                'is_entry_page': index == 0,
+                'is_exit_page': index == page_views - 1,
+                'event_name': None,
+                'event_data': None,
+                'ip_address': ip_address,
+                'user_agent': user_agent,
+                'timestamp': timestamp,
+            }
+            events.append(event)
+            if rng.random() < self.event_share:
+                name, build_data = rng.choice(CUSTOM_EVENTS)
+                timestamp += timedelta(seconds=rng.randint(2, 60))
+                events.append(dict(
+                    event, client_event_id=self._random_id(), referrer=None, is_entry_page=False,
+                    is_exit_page=False, event_name=name, event_data=build_data(rng), timestamp=timestamp
+                ))
+            timestamp += timedelta(seconds=rng.randint(5, 180))
+        return events
+
+    def iter_events(self, start: datetime = None, end: datetime = None):
+        """
+        Yield events of consecutive sessions indefinitely
+
+        Session start times are spread uniformly over [start, end); without
+        a range every session starts now. Events of one session are yielded
+        together and in order.
+        """
+        span = (end - start).total_seconds() if start and end else 0
+        while True:
+            if span:
+                started = start + timedelta(seconds=self.rng.random() * span)
+            else:
+                started = datetime.utcnow()
+            yield from self.session(started)
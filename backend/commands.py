@@ -0,0 +1,82 @@
+"""
+Flask CLI commands for maintenance and data management tasks
+"""
+import click
+from flask.cli import with_appcontext
+from models.database import disable_statement_timeout
+from services.bulk_import_service import BulkImportService, DEFAULT_BATCH_SIZE
+from services.retention_service import RetentionService, VISITOR_KEY_COLUMNS
+from services.spool_service import SpoolService
+
+
+@click.command('import-events')
+@click.argument('file_path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'file_format', type=click.Choice(['ndjson', 'csv']), default=None,
+              help='Input format (detected from the file extension by default)')
+@click.option('--target', 'targets', type=click.Choice(['tracking_events', 'visits']), multiple=True,
+              help='Table to load into; repeat for several (default: both)')
+@click.option('--batch-size', default=DEFAULT_BATCH_SIZE, show_default=True,
+              help='Number of records per COPY batch')
+@click.option('--no-geo', is_flag=True, help='Skip IP geolocation of rows without a country')
+@with_appcontext
+def import_events_command(file_path, file_format, targets, batch_size, no_geo):
+    """Bulk-load historical events from an NDJSON or CSV file"""
+    disable_statement_timeout()
+    summary = BulkImportService.import_file(
+        file_path,
+        file_format=file_format,
+        targets=targets or ('tracking_events', 'visits'),
+        batch_size=batch_size,
+        geolocate=not no_geo
+    )
+    click.echo(f"Read {summary['read']} records in {summary['batches']} batches")
+    for table in ('tracking_events', 'visits'):
+        if table in summary:
+            click.echo(f"  {table}: {summary[table]} rows loaded")
+    if summary['duplicates']:
+        click.echo(f"  {summary['duplicates']} duplicate records skipped")
+    if summary['skipped_invalid']:
+        click.echo(f"  {summary['skipped_invalid']} records missing a required column (session_id, page_url) skipped")
+    if summary['truncated']:
+        click.echo(f"  {summary['truncated']} records had values longer than their column and were truncated")
+    if summary['bots']:
+        click.echo(f"  {summary['bots']} bot records flagged or dropped (BOT_FILTER_MODE)")
+
+
+@click.command('build-retention')
+@click.option('--key', 'key_types', type=click.Choice(sorted(VISITOR_KEY_COLUMNS)), multiple=True,
+              help='Visitor key to build cohorts for; repeat for several (default: session)')
+@click.option('--through', type=click.DateTime(formats=['%Y-%m-%d']), default=None,
+              help='Last day to build (default: today, UTC)')
+@click.option('--rebuild', is_flag=True, help='Discard stored cohorts and rebuild from history')
+@with_appcontext
+def build_retention_command(key_types, through, rebuild):
+    """Add the days since the last build to the retention cohort matrices (run daily)"""
+    disable_statement_timeout()
+    for key_type in key_types or ('session',):
+        summary = RetentionService.build(
+            key_type,
+            through=through.date() if through else None,
+            rebuild=rebuild
+        )
+        if not summary['days']:
+            click.echo(f"{key_type}: no events to build")
+            continue
+        click.echo(f"{key_type}: built {summary['days']} days ({summary['start']} to {summary['end']}), "
+                   f"{summary['new_visitors']} new visitors")
+
+
+@click.command('replay-spool')
+@with_appcontext
+def replay_spool_command():
+    """Write events spooled during a database outage to the database"""
+    disable_statement_timeout()
+    summary = SpoolService.replay()
+    click.echo(f"Replayed {summary['replayed']} spooled events from {summary['adopted']} spool directories")
+
+
+def register_commands(app):
+    """Register CLI commands with the Flask app"""
+    app.cli.add_command(import_events_command)
+    app.cli.add_command(build_retention_command)
+    app.cli.add_command(replay_spool_command)
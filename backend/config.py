@@ -19,6 +19,32 @@ class Config:
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     SQLALCHEMY_ECHO = os.getenv('SQLALCHEMY_ECHO', 'False') == 'True'
     
+    # Connection pool settings
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 10))
+    DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', 20))
+    DB_POOL_TIMEOUT = int(os.getenv('DB_POOL_TIMEOUT', 30))
+    DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', 1800))
+    DB_POOL_PRE_PING = os.getenv('DB_POOL_PRE_PING', 'True') == 'True'
+    DB_STATEMENT_TIMEOUT_MS = int(os.getenv('DB_STATEMENT_TIMEOUT_MS', 30000))
+    
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': DB_POOL_SIZE,
+        'max_overflow': DB_MAX_OVERFLOW,
+        'pool_timeout': DB_POOL_TIMEOUT,
+        'pool_recycle': DB_POOL_RECYCLE,
+        'pool_pre_ping': DB_POOL_PRE_PING,
+        # A statement timeout of 0 disables it
+        'connect_args': {'options': f'-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}'},
+    }
+    
+    # Read replica settings - read-only analytics queries go here when configured
+    REPLICA_DB_HOST = os.getenv('REPLICA_POSTGRES_HOST')
+    REPLICA_DB_PORT = os.getenv('REPLICA_POSTGRES_PORT', DB_PORT)
+    REPLICA_HEALTH_CHECK_INTERVAL = int(os.getenv('REPLICA_HEALTH_CHECK_INTERVAL', 30))
+    SQLALCHEMY_BINDS = {
+        'replica': f"postgresql://{DB_USER}:{DB_PASS}@{REPLICA_DB_HOST}:{REPLICA_DB_PORT}/{DB_NAME}"
+    } if REPLICA_DB_HOST else {}
+    
     # Flask settings
     DEBUG = os.getenv('DEBUG', 'True') == 'True'
     SECRET_KEY = os.getenv('SECRET_KEY', 'dev-secret-key-change-in-production')
@@ -26,8 +52,128 @@ class Config:
     PORT = int(os.getenv('PORT', 5000))
     HOST = os.getenv('HOST', '0.0.0.0')
     
+    # Monitoring settings
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'True') == 'True'
+    QUERY_PROFILING_ENABLED = os.getenv('QUERY_PROFILING_ENABLED', 'True') == 'True'
+    SLOW_QUERY_THRESHOLD_MS = int(os.getenv('SLOW_QUERY_THRESHOLD_MS', 200))
+    # Debug mode only: warn when a request exceeds this many statements
+    # or repeats one statement N_PLUS_ONE_THRESHOLD times
+    QUERY_BUDGET_PER_REQUEST = int(os.getenv('QUERY_BUDGET_PER_REQUEST', 30))
+    N_PLUS_ONE_THRESHOLD = int(os.getenv('N_PLUS_ONE_THRESHOLD', 5))
+    
+    # Rate limiting (Flask-Limiter). Counters live in RATELIMIT_STORAGE_URI:
+    # memory:// is per process; redis://host:6379 or redis+unix:///path.sock
+    # (requires the redis package) shares them across worker processes. The
+    # sliding window counter keeps two counters per client and limit
+    RATELIMIT_STORAGE_URI = os.getenv('RATELIMIT_STORAGE_URI', 'memory://')
+    RATELIMIT_STRATEGY = os.getenv('RATELIMIT_STRATEGY', 'sliding-window-counter')
+    # Seconds to wait on a shared store before the request goes through unlimited
+    RATELIMIT_STORAGE_TIMEOUT = float(os.getenv('RATELIMIT_STORAGE_TIMEOUT', 0.05))
+    RATELIMIT_STORAGE_OPTIONS = {
+        'socket_timeout': RATELIMIT_STORAGE_TIMEOUT,
+        'socket_connect_timeout': RATELIMIT_STORAGE_TIMEOUT,
+    } if RATELIMIT_STORAGE_URI.startswith('redis') else {}
+    # A failing store never fails requests: limits fall back to memory
+    RATELIMIT_IN_MEMORY_FALLBACK_ENABLED = True
+    RATELIMIT_SWALLOW_ERRORS = True
+    # Per client IP, per limit class (see utils/rate_limiting.py)
+    RATELIMIT_INGEST = os.getenv('RATELIMIT_INGEST', '1000 per minute')
+    RATELIMIT_READ = os.getenv('RATELIMIT_READ', '300 per minute')
+    RATELIMIT_EXPORT = os.getenv('RATELIMIT_EXPORT', '20 per hour')
+    RATELIMIT_DEFAULT = os.getenv('RATELIMIT_DEFAULT', '100 per 15 minutes')
+    
     # API settings
     API_BASE_URL = os.getenv('API_BASE_URL', f'http://localhost:{PORT}')
+    
+    # Seconds before the active tag snapshot is reloaded, to pick up tag
+    # changes made through other worker processes
+    TAG_SNAPSHOT_TTL = int(os.getenv('TAG_SNAPSHOT_TTL', 30))
+    
+    # Negotiated gzip/Brotli compression of JSON responses at least this many bytes long
+    COMPRESSION_ENABLED = os.getenv('COMPRESSION_ENABLED', 'True') == 'True'
+    COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', 1024))
+    
+    # Tracker script caching - scripts are rendered once and re-rendered on file change
+    SCRIPT_CACHE_MAX_AGE = int(os.getenv('SCRIPT_CACHE_MAX_AGE', 86400))
+    SCRIPT_MTIME_CHECK_INTERVAL = float(os.getenv('SCRIPT_MTIME_CHECK_INTERVAL', 2))
+    # Max-age for the tracker bundle; kept short since it embeds the active tags
+    TRACKER_BUNDLE_MAX_AGE = int(os.getenv('TRACKER_BUNDLE_MAX_AGE', 300))
+    
+    # Realtime dashboard stream: seconds between pushed updates, and between
+    # keep-alive comments when there is nothing to send
+    REALTIME_PUSH_INTERVAL = float(os.getenv('REALTIME_PUSH_INTERVAL', 2))
+    REALTIME_HEARTBEAT_INTERVAL = float(os.getenv('REALTIME_HEARTBEAT_INTERVAL', 15))
+    # Load the last hour of events into the realtime windows when they are first read
+    REALTIME_SEED = os.getenv('REALTIME_SEED', 'True') == 'True'
+    
+    # Days of history included when the retention cohort tables are first built
+    RETENTION_BACKFILL_DAYS = int(os.getenv('RETENTION_BACKFILL_DAYS', 90))
+    
+    # Pages/paths tracked per counter by the path flow endpoint; counts are
+    # exact until this many distinct entries are seen, approximate after
+    PATH_FLOW_CAPACITY = int(os.getenv('PATH_FLOW_CAPACITY', 1000))
+    
+    # Start a new session after this many seconds without events from a
+    # client session (0 disables splitting); last activity is cached for up
+    # to SESSION_CACHE_SIZE client sessions per process
+    SESSION_INACTIVITY_TIMEOUT = int(os.getenv('SESSION_INACTIVITY_TIMEOUT', 1800))
+    SESSION_CACHE_SIZE = int(os.getenv('SESSION_CACHE_SIZE', 100000))
+    # On a cache miss (every new client) look up the client's latest stored
+    # session with one indexed query; False trusts the per-process cache
+    # alone, e.g. with sticky load balancing across a single worker pool
+    SESSION_DB_LOOKUP = os.getenv('SESSION_DB_LOOKUP', 'True') == 'True'
+    
+    # Tables written by POST /api/track, all in one transaction
+    INGESTION_SINKS = [
+        sink.strip() for sink in os.getenv('INGESTION_SINKS', 'visits,tracking_events').split(',') if sink.strip()
+    ]
+    
+    # Repeated deliveries of an event (same client_event_id) are ignored when
+    # seen within DEDUP_WINDOW_SECONDS by the same process; a unique index
+    # catches the rest. At most DEDUP_CACHE_SIZE IDs are kept per process
+    DEDUP_WINDOW_SECONDS = int(os.getenv('DEDUP_WINDOW_SECONDS', 600))
+    DEDUP_CACHE_SIZE = int(os.getenv('DEDUP_CACHE_SIZE', 100000))
+    
+    # Local spool for tracked events while the database is down or slow. An
+    # ingest transaction taking longer than INGEST_STATEMENT_TIMEOUT_MS per
+    # statement counts as unavailable; the database is then retried every
+    # SPOOL_RETRY_INTERVAL seconds and spooled events are replayed in batches
+    SPOOL_ENABLED = os.getenv('SPOOL_ENABLED', 'True') == 'True'
+    SPOOL_DIR = os.getenv('SPOOL_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'spool'))
+    SPOOL_SEGMENT_BYTES = int(os.getenv('SPOOL_SEGMENT_BYTES', 16 * 1024 * 1024))
+    # Seconds between fsyncs of the spool; appends never wait for the disk
+    SPOOL_FSYNC_INTERVAL = float(os.getenv('SPOOL_FSYNC_INTERVAL', 0.2))
+    SPOOL_RETRY_INTERVAL = float(os.getenv('SPOOL_RETRY_INTERVAL', 5))
+    SPOOL_REPLAY_BATCH_SIZE = int(os.getenv('SPOOL_REPLAY_BATCH_SIZE', 1000))
+    # Once the database is back and no more than this many bytes are still
+    # spooled, new events are stored directly again while the rest is replayed
+    SPOOL_RESUME_BYTES = int(os.getenv('SPOOL_RESUME_BYTES', 1024 * 1024))
+    INGEST_STATEMENT_TIMEOUT_MS = int(os.getenv('INGEST_STATEMENT_TIMEOUT_MS', 2000))
+    
+    # 'direct' stores tracked events in the API process; 'queue' only appends
+    # them to a local queue under INGEST_QUEUE_DIR for ingest workers
+    # (python -m ingest_worker). Queued events reach a worker within
+    # INGEST_QUEUE_MAX_DELAY seconds and are written in batches of up to
+    # INGEST_WORKER_BATCH_SIZE
+    INGEST_MODE = os.getenv('INGEST_MODE', 'direct').lower()
+    INGEST_QUEUE_DIR = os.getenv(
+        'INGEST_QUEUE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ingest_queue')
+    )
+    INGEST_QUEUE_MAX_DELAY = float(os.getenv('INGEST_QUEUE_MAX_DELAY', 1.0))
+    INGEST_WORKER_BATCH_SIZE = int(os.getenv('INGEST_WORKER_BATCH_SIZE', 1000))
+    INGEST_WORKER_POLL_INTERVAL = float(os.getenv('INGEST_WORKER_POLL_INTERVAL', 0.5))
+    
+    # Bot and crawler traffic: 'flag' stores it with is_bot set (excluded from
+    # stats), 'drop' discards it at ingest, 'off' disables detection.
+    # BOT_UA_SIGNATURES adds User-Agent substrings to the built-in list and
+    # BOT_IP_RANGES lists CIDR ranges of known bot networks
+    BOT_FILTER_MODE = os.getenv('BOT_FILTER_MODE', 'flag').lower()
+    BOT_UA_SIGNATURES = [
+        signature.strip() for signature in os.getenv('BOT_UA_SIGNATURES', '').split(',') if signature.strip()
+    ]
+    BOT_IP_RANGES = [cidr.strip() for cidr in os.getenv('BOT_IP_RANGES', '').split(',') if cidr.strip()]
+    # Distinct User-Agents whose bot verdict is memoised per process
+    BOT_UA_CACHE_SIZE = int(os.getenv('BOT_UA_CACHE_SIZE', 10000))
 
 
 # Legacy compatibility - keep old variables for existing code
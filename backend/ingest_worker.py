@@ -0,0 +1,91 @@
+"""
+Ingest worker - stores events queued by /api/track with INGEST_MODE=queue
+
+Drains the local ingest queue (see services/ingest_queue_service.py),
+validating, enriching and writing events to the database in batches. Run
+one or more workers next to the API on each host, sharing INGEST_QUEUE_DIR.
+
+Usage (from the backend directory):
+    python -m ingest_worker [--batch-size 1000] [--poll-interval 0.5] [--once]
+"""
+import argparse
+import logging
+import os
+import signal
+import threading
+
+from app import app
+from models.db_instance import db
+from services.ingest_queue_service import IngestQueueService
+from services.ingestion_service import IngestionService, DATABASE_UNAVAILABLE_ERRORS
+
+logger = logging.getLogger('ingest_worker')
+
+
+def run(batch_size, poll_interval, once=False, stop=None):
+    """
+    Consume the queue until stopped
+
+    Args:
+        batch_size: Maximum events per database transaction
+        poll_interval: Seconds to wait when the queue is empty
+        once: Stop after one pass over the queue
+        stop: Event ending the loop after the current batch
+    """
+    stop = stop or threading.Event()
+    retry_interval = app.config['SPOOL_RETRY_INTERVAL']
+    totals = {'stored': 0, 'invalid': 0, 'duplicates': 0, 'dropped': 0}
+
+    def handle(records):
+        summary = IngestionService.ingest_batch(records)
+        for key, count in summary.items():
+            totals[key] += count
+
+    while not stop.is_set():
+        with app.app_context():
+            try:
+                consumed = IngestQueueService.consume(handle, batch_size)
+            except DATABASE_UNAVAILABLE_ERRORS as e:
+                # The failed batch stays queued and is retried as a whole
+                logger.warning(f"Database unavailable, retrying in {retry_interval}s: {str(e)}")
+                db.session.rollback()
+                stop.wait(retry_interval)
+                continue
+            finally:
+                db.session.remove()
+        if consumed:
+            logger.info(
+                f"Consumed {consumed} queued events: {totals['stored']} stored, {totals['duplicates']} duplicates, "
+                f"{totals['invalid']} invalid, {totals['dropped']} bots dropped so far"
+            )
+        if once:
+            break
+        if not consumed:
+            stop.wait(poll_interval)
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Store events queued by /api/track (INGEST_MODE=queue)')
+    parser.add_argument('--batch-size', type=int, default=app.config['INGEST_WORKER_BATCH_SIZE'],
+                        help='Maximum events per database transaction')
+    parser.add_argument('--poll-interval', type=float, default=app.config['INGEST_WORKER_POLL_INTERVAL'],
+                        help='Seconds to wait when the queue is empty')
+    parser.add_argument('--once', action='store_true', help='Drain the queue once and exit')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+    if app.config['INGEST_MODE'] != 'queue':
+        logger.warning("INGEST_MODE is not 'queue'; the API stores events itself and nothing will be queued")
+
+    stop = threading.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        # Finish the current batch, then exit
+        signal.signal(signum, lambda *_: stop.set())
+
+    logger.info(f"Ingest worker {os.getpid()} consuming {app.config['INGEST_QUEUE_DIR']}")
+    run(args.batch_size, args.poll_interval, once=args.once, stop=stop)
+
+
+if __name__ == '__main__':
+    main()
@@ -97,6 +97,12 @@ def run_migrations_online():
     connectable = get_engine()
 
     with connectable.connect() as connection:
+        if connection.dialect.name == 'postgresql':
+            # The app engine applies DB_STATEMENT_TIMEOUT_MS to every
+            # connection; migrations may rewrite large tables, so lift it
+            connection.exec_driver_sql('SET statement_timeout = 0')
+            connection.commit()
+
         context.configure(
             connection=connection,
             target_metadata=get_metadata(),
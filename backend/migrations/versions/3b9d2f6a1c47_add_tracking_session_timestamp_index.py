@@ -0,0 +1,26 @@
+"""Add (session_id, timestamp) index on tracking_events
+
+Revision ID: 3b9d2f6a1c47
+Revises: 8e7fc20781ba
+Create Date: 2026-10-19 09:12:40.118304
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3b9d2f6a1c47'
+down_revision = '8e7fc20781ba'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('tracking_events', schema=None) as batch_op:
+        batch_op.create_index('ix_tracking_events_session_id_timestamp', ['session_id', 'timestamp'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('tracking_events', schema=None) as batch_op:
+        batch_op.drop_index('ix_tracking_events_session_id_timestamp')
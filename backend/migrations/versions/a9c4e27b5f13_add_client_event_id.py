@@ -0,0 +1,40 @@
+"""Add client_event_id with unique partial indexes
+
+Revision ID: a9c4e27b5f13
+Revises: f3b8d61e0a94
+Create Date: 2026-10-19 15:10:44.203518
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a9c4e27b5f13'
+down_revision = 'f3b8d61e0a94'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('visits', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('client_event_id', sa.String(length=64), nullable=True))
+        batch_op.create_index('uq_visits_client_event_id', ['client_event_id'], unique=True,
+                              postgresql_where=sa.text('client_event_id IS NOT NULL'),
+                              sqlite_where=sa.text('client_event_id IS NOT NULL'))
+
+    with op.batch_alter_table('tracking_events', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('client_event_id', sa.String(length=64), nullable=True))
+        batch_op.create_index('uq_tracking_events_client_event_id', ['client_event_id'], unique=True,
+                              postgresql_where=sa.text('client_event_id IS NOT NULL'),
+                              sqlite_where=sa.text('client_event_id IS NOT NULL'))
+
+
+def downgrade():
+    with op.batch_alter_table('tracking_events', schema=None) as batch_op:
+        batch_op.drop_index('uq_tracking_events_client_event_id')
+        batch_op.drop_column('client_event_id')
+
+    with op.batch_alter_table('visits', schema=None) as batch_op:
+        batch_op.drop_index('uq_visits_client_event_id')
+        batch_op.drop_column('client_event_id')
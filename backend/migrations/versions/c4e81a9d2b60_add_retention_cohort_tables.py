@@ -0,0 +1,53 @@
+"""Add retention cohort tables
+
+Revision ID: c4e81a9d2b60
+Revises: 3b9d2f6a1c47
+Create Date: 2026-10-19 10:02:17.553921
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4e81a9d2b60'
+down_revision = '3b9d2f6a1c47'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('visitor_first_seen',
+    sa.Column('key_type', sa.String(length=20), nullable=False),
+    sa.Column('visitor_key', sa.String(length=255), nullable=False),
+    sa.Column('first_seen', sa.Date(), nullable=False),
+    sa.PrimaryKeyConstraint('key_type', 'visitor_key')
+    )
+    with op.batch_alter_table('visitor_first_seen', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_visitor_first_seen_first_seen'), ['first_seen'], unique=False)
+
+    op.create_table('retention_cohorts',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('granularity', sa.String(length=10), nullable=False),
+    sa.Column('key_type', sa.String(length=20), nullable=False),
+    sa.Column('cohort_start', sa.Date(), nullable=False),
+    sa.Column('period', sa.Integer(), nullable=False),
+    sa.Column('period_start', sa.Date(), nullable=False),
+    sa.Column('visitors', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('granularity', 'key_type', 'cohort_start', 'period', name='uq_retention_cohorts_cell')
+    )
+    with op.batch_alter_table('retention_cohorts', schema=None) as batch_op:
+        batch_op.create_index('ix_retention_cohorts_period_start', ['granularity', 'key_type', 'period_start'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('retention_cohorts', schema=None) as batch_op:
+        batch_op.drop_index('ix_retention_cohorts_period_start')
+
+    op.drop_table('retention_cohorts')
+    with op.batch_alter_table('visitor_first_seen', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_visitor_first_seen_first_seen'))
+
+    op.drop_table('visitor_first_seen')
@@ -0,0 +1,36 @@
+"""Add client_session_id to visits and tracking_events
+
+Revision ID: e7a2c91f5d38
+Revises: c4e81a9d2b60
+Create Date: 2026-10-19 11:20:05.774012
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7a2c91f5d38'
+down_revision = 'c4e81a9d2b60'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('visits', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('client_session_id', sa.String(length=255), nullable=True))
+        batch_op.create_index(batch_op.f('ix_visits_client_session_id'), ['client_session_id'], unique=False)
+
+    with op.batch_alter_table('tracking_events', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('client_session_id', sa.String(length=255), nullable=True))
+        batch_op.create_index(batch_op.f('ix_tracking_events_client_session_id'), ['client_session_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('tracking_events', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_tracking_events_client_session_id'))
+        batch_op.drop_column('client_session_id')
+
+    with op.batch_alter_table('visits', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_visits_client_session_id'))
+        batch_op.drop_column('client_session_id')
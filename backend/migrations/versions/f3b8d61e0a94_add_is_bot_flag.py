@@ -0,0 +1,38 @@
+"""Add is_bot flag and human-traffic partial indexes
+
+Revision ID: f3b8d61e0a94
+Revises: e7a2c91f5d38
+Create Date: 2026-10-19 14:02:37.518240
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3b8d61e0a94'
+down_revision = 'e7a2c91f5d38'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('visits', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('is_bot', sa.Boolean(), server_default=sa.false(), nullable=False))
+        batch_op.create_index('ix_visits_human_timestamp', ['timestamp'], unique=False,
+                              postgresql_where=sa.text('NOT is_bot'), sqlite_where=sa.text('is_bot = 0'))
+
+    with op.batch_alter_table('tracking_events', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('is_bot', sa.Boolean(), server_default=sa.false(), nullable=False))
+        batch_op.create_index('ix_tracking_events_human_timestamp', ['timestamp'], unique=False,
+                              postgresql_where=sa.text('NOT is_bot'), sqlite_where=sa.text('is_bot = 0'))
+
+
+def downgrade():
+    with op.batch_alter_table('tracking_events', schema=None) as batch_op:
+        batch_op.drop_index('ix_tracking_events_human_timestamp')
+        batch_op.drop_column('is_bot')
+
+    with op.batch_alter_table('visits', schema=None) as batch_op:
+        batch_op.drop_index('ix_visits_human_timestamp')
+        batch_op.drop_column('is_bot')
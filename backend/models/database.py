@@ -4,10 +4,26 @@ Now using SQLAlchemy ORM instead of direct SQL execution.
 """
 import os
 import logging
+import threading
+import time
+from flask import current_app, g
+from sqlalchemy import event, text
+from sqlalchemy.exc import OperationalError, InterfaceError, TimeoutError as PoolTimeoutError
+from sqlalchemy.orm import Session
 from models.db_instance import db
 
 logger = logging.getLogger(__name__)
 
+# Bind key of the optional read replica (see Config.SQLALCHEMY_BINDS)
+REPLICA_BIND = 'replica'
+
+# Errors meaning the database is unreachable, overloaded or timed out, as
+# opposed to a problem with the data being written
+DATABASE_UNAVAILABLE_ERRORS = (OperationalError, InterfaceError, PoolTimeoutError)
+
+_replica_lock = threading.Lock()
+_replica_state = {'healthy': True, 'checked_at': 0.0}
+
 def init_db(app):
     """Initialize the database with the Flask app"""
     try:
@@ -29,3 +45,85 @@ def create_tables():
     except Exception as e:
         logger.error(f"Error creating tables: {str(e)}")
         return False
+
+def _check_replica(engine):
+    """Run a round trip against the replica and return whether it succeeded"""
+    try:
+        with engine.connect() as connection:
+            connection.execute(text('SELECT 1'))
+        return True
+    except Exception as e:
+        logger.error(f"Read replica health check failed: {str(e)}")
+        return False
+
+def get_replica_engine():
+    """
+    Get the read replica engine if one is configured and currently healthy.
+    Replica health is re-checked at most every REPLICA_HEALTH_CHECK_INTERVAL seconds.
+    """
+    if REPLICA_BIND not in current_app.config.get('SQLALCHEMY_BINDS', {}):
+        return None
+    
+    engine = db.engines[REPLICA_BIND]
+    interval = current_app.config.get('REPLICA_HEALTH_CHECK_INTERVAL', 30)
+    
+    now = time.monotonic()
+    if now - _replica_state['checked_at'] >= interval:
+        with _replica_lock:
+            if now - _replica_state['checked_at'] >= interval:
+                healthy = _check_replica(engine)
+                if healthy != _replica_state['healthy']:
+                    logger.warning(f"Read replica is now {'healthy' if healthy else 'unhealthy'}")
+                _replica_state.update(healthy=healthy, checked_at=time.monotonic())
+    
+    return engine if _replica_state['healthy'] else None
+
+def _clear_statement_timeout(dbapi_connection, connection_record):
+    """Override the DB_STATEMENT_TIMEOUT_MS connect option on a new connection"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute('SET statement_timeout = 0')
+    cursor.close()
+
+def disable_statement_timeout():
+    """
+    Disable DB_STATEMENT_TIMEOUT_MS for every connection this process opens.
+    For CLI commands (bulk imports, retention builds, spool replays) whose
+    statements legitimately run longer than a web request should.
+    """
+    for engine in db.engines.values():
+        if engine.dialect.name != 'postgresql':
+            continue
+        if not event.contains(engine, 'connect', _clear_statement_timeout):
+            event.listen(engine, 'connect', _clear_statement_timeout)
+        # Pooled connections were opened with the timeout; reconnect
+        engine.dispose()
+
+def disable_transaction_statement_timeout(session):
+    """Disable DB_STATEMENT_TIMEOUT_MS for the session's current transaction only"""
+    if session.get_bind().dialect.name == 'postgresql':
+        session.execute(text('SET LOCAL statement_timeout = 0'))
+
+def get_read_session():
+    """
+    Get the session to use for read-only analytics queries.
+    Returns a per-app-context session bound to the read replica when it is
+    configured and healthy, and the primary db.session otherwise.
+    Never use the returned session for writes.
+    """
+    engine = get_replica_engine()
+    if engine is None:
+        return db.session
+    
+    if '_read_session' not in g:
+        g._read_session = Session(bind=engine)
+    return g._read_session
+
+def close_read_session(exception=None):
+    """Close the read replica session at the end of the app context"""
+    session = g.pop('_read_session', None)
+    if session is not None:
+        session.close()
+
+def init_read_replica(app):
+    """Register read replica session cleanup with the Flask app"""
+    app.teardown_appcontext(close_read_session)
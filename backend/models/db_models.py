@@ -1,7 +1,10 @@
 """
 SQLAlchemy ORM models for the analytics application
 """
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, JSON, ForeignKey
+from sqlalchemy import (
+    Column, Integer, String, Text, Date, DateTime, Boolean, JSON, ForeignKey, Index, UniqueConstraint,
+    false, text
+)
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import logging
@@ -26,12 +29,28 @@ class Visit(db.Model):
     device = Column(String(100))
     country = Column(String(100))
     session_id = Column(String(255), index=True)
+    # Session ID sent by the tracker; session_id is split from it on inactivity
+    client_session_id = Column(String(255), index=True)
+    # Random ID sent by the tracker; repeated deliveries of an event share it
+    client_event_id = Column(String(64))
     is_entry_page = Column(Boolean, default=False)
     is_exit_page = Column(Boolean, default=False)
     event_name = Column(String(255))
     event_data = Column(JSON)
+    # Set at ingest when the user agent or IP address matches a bot signature
+    is_bot = Column(Boolean, nullable=False, default=False, server_default=false())
     timestamp = Column(DateTime, default=datetime.utcnow, index=True)
     
+    __table_args__ = (
+        # Partial index: stats queries on human traffic skip bot rows entirely
+        Index('ix_visits_human_timestamp', 'timestamp',
+              postgresql_where=text('NOT is_bot'), sqlite_where=text('is_bot = 0')),
+        # Backstop for ingestion deduplication
+        Index('uq_visits_client_event_id', 'client_event_id', unique=True,
+              postgresql_where=text('client_event_id IS NOT NULL'),
+              sqlite_where=text('client_event_id IS NOT NULL')),
+    )
+    
     def __repr__(self):
         return f"<Visit id={self.id} page={self.page_url} session={self.session_id}>"
     
@@ -47,10 +66,13 @@ class Visit(db.Model):
             'device': self.device,
             'country': self.country,
             'session_id': self.session_id,
+            'client_session_id': self.client_session_id,
+            'client_event_id': self.client_event_id,
             'is_entry_page': self.is_entry_page,
             'is_exit_page': self.is_exit_page,
             'event_name': self.event_name,
             'event_data': self.event_data,
+            'is_bot': self.is_bot,
             'timestamp': self.timestamp.strftime('%Y-%m-%d %H:%M:%S') if self.timestamp else None
         }
 
@@ -61,6 +83,10 @@ class TrackingEvent(db.Model):
     
     id = Column(Integer, primary_key=True)
     session_id = Column(String(255), nullable=False, index=True)
+    # Session ID sent by the tracker; session_id is split from it on inactivity
+    client_session_id = Column(String(255), index=True)
+    # Random ID sent by the tracker; repeated deliveries of an event share it
+    client_event_id = Column(String(64))
     page_url = Column(String(500), nullable=False, index=True)
     ip_address = Column(String(45), index=True)
     user_agent = Column(Text)
@@ -74,8 +100,22 @@ class TrackingEvent(db.Model):
     is_exit_page = Column(Boolean, default=False)
     event_name = Column(String(255))
     event_data = Column(JSON)
+    # Set at ingest when the user agent or IP address matches a bot signature
+    is_bot = Column(Boolean, nullable=False, default=False, server_default=false())
     timestamp = Column(DateTime, default=datetime.utcnow, index=True)
     
+    __table_args__ = (
+        # Session-ordered scans (funnels, session streams) read rows in index order
+        Index('ix_tracking_events_session_id_timestamp', 'session_id', 'timestamp'),
+        # Partial index: stats queries on human traffic skip bot rows entirely
+        Index('ix_tracking_events_human_timestamp', 'timestamp',
+              postgresql_where=text('NOT is_bot'), sqlite_where=text('is_bot = 0')),
+        # Backstop for ingestion deduplication
+        Index('uq_tracking_events_client_event_id', 'client_event_id', unique=True,
+              postgresql_where=text('client_event_id IS NOT NULL'),
+              sqlite_where=text('client_event_id IS NOT NULL')),
+    )
+    
     def __repr__(self):
         return f"<TrackingEvent id={self.id} event={self.event_name} session={self.session_id}>"
     
@@ -83,6 +123,8 @@ class TrackingEvent(db.Model):
         return {
             'id': self.id,
             'session_id': self.session_id,
+            'client_session_id': self.client_session_id,
+            'client_event_id': self.client_event_id,
             'page_url': self.page_url,
             'ip_address': self.ip_address,
             'user_agent': self.user_agent,
@@ -96,6 +138,7 @@ class TrackingEvent(db.Model):
             'is_exit_page': self.is_exit_page,
             'event_name': self.event_name,
             'event_data': self.event_data,
+            'is_bot': self.is_bot,
             'timestamp': self.timestamp.strftime('%Y-%m-%d %H:%M:%S') if self.timestamp else None
         }
 
@@ -129,3 +172,50 @@ class Tag(db.Model):
             'updated_at': self.updated_at.strftime('%Y-%m-%d %H:%M:%S') if self.updated_at else None,
             'is_active': self.is_active
         }
+
+
+class VisitorFirstSeen(db.Model):
+    """First day each visitor key was seen, used to assign retention cohorts"""
+    __tablename__ = 'visitor_first_seen'
+    
+    key_type = Column(String(20), primary_key=True)
+    visitor_key = Column(String(255), primary_key=True)
+    first_seen = Column(Date, nullable=False, index=True)
+    
+    def __repr__(self):
+        return f"<VisitorFirstSeen {self.key_type}={self.visitor_key} first_seen={self.first_seen}>"
+
+
+class RetentionCohort(db.Model):
+    """One cell of a precomputed retention matrix"""
+    __tablename__ = 'retention_cohorts'
+    
+    id = Column(Integer, primary_key=True)
+    granularity = Column(String(10), nullable=False)
+    key_type = Column(String(20), nullable=False)
+    cohort_start = Column(Date, nullable=False)
+    period = Column(Integer, nullable=False)
+    # First day of the period, i.e. the matrix column this cell belongs to
+    period_start = Column(Date, nullable=False)
+    visitors = Column(Integer, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        UniqueConstraint('granularity', 'key_type', 'cohort_start', 'period', name='uq_retention_cohorts_cell'),
+        Index('ix_retention_cohorts_period_start', 'granularity', 'key_type', 'period_start'),
+    )
+    
+    def __repr__(self):
+        return f"<RetentionCohort {self.granularity} {self.cohort_start} +{self.period} visitors={self.visitors}>"
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'granularity': self.granularity,
+            'key_type': self.key_type,
+            'cohort_start': self.cohort_start.isoformat() if self.cohort_start else None,
+            'period': self.period,
+            'period_start': self.period_start.isoformat() if self.period_start else None,
+            'visitors': self.visitors,
+            'updated_at': self.updated_at.strftime('%Y-%m-%d %H:%M:%S') if self.updated_at else None
+        }
@@ -6,6 +6,7 @@ from sqlalchemy.exc import SQLAlchemyError
 from datetime import datetime, timedelta
 from models.db_models import Visit, TrackingEvent
 from models.db_instance import db
+from models.database import get_read_session
 import logging
 
 logger = logging.getLogger(__name__)
@@ -13,12 +14,14 @@ logger = logging.getLogger(__name__)
 def get_visit_stats(days=30):
     """Get visit statistics for the last N days"""
     try:
+        session = get_read_session()
+        
         # Calculate date range
         end_date = datetime.utcnow()
         start_date = end_date - timedelta(days=days)
         
         # Query for visits by day
-        daily_visits = db.session.query(
+        daily_visits = session.query(
             cast(Visit.timestamp, Date).label('date'),
             func.count(Visit.id).label('count')
         ).filter(
@@ -30,7 +33,7 @@ def get_visit_stats(days=30):
         ).all()
         
         # Query for top pages
-        top_pages = db.session.query(
+        top_pages = session.query(
             Visit.page_url,
             func.count(Visit.id).label('count')
         ).filter(
@@ -42,7 +45,7 @@ def get_visit_stats(days=30):
         ).limit(10).all()
         
         # Query for top referrers
-        top_referrers = db.session.query(
+        top_referrers = session.query(
             Visit.referrer,
             func.count(Visit.id).label('count')
         ).filter(
@@ -56,7 +59,7 @@ def get_visit_stats(days=30):
         ).limit(10).all()
         
         # Query for browser stats
-        browsers = db.session.query(
+        browsers = session.query(
             Visit.browser,
             func.count(Visit.id).label('count')
         ).filter(
@@ -69,7 +72,7 @@ def get_visit_stats(days=30):
         ).all()
         
         # Query for OS stats
-        operating_systems = db.session.query(
+        operating_systems = session.query(
             Visit.os,
             func.count(Visit.id).label('count')
         ).filter(
@@ -82,7 +85,7 @@ def get_visit_stats(days=30):
         ).all()
         
         # Query for device stats
-        devices = db.session.query(
+        devices = session.query(
             Visit.device,
             func.count(Visit.id).label('count')
         ).filter(
@@ -95,7 +98,7 @@ def get_visit_stats(days=30):
         ).all()
         
         # Query for country stats
-        countries = db.session.query(
+        countries = session.query(
             Visit.country,
             func.count(Visit.id).label('count')
         ).filter(
@@ -137,12 +140,14 @@ def get_visit_stats(days=30):
 def get_tracking_stats(days=30):
     """Get tracking event statistics"""
     try:
+        session = get_read_session()
+        
         # Calculate date range
         end_date = datetime.utcnow()
         start_date = end_date - timedelta(days=days)
         
         # Query for events by name
-        event_counts = db.session.query(
+        event_counts = session.query(
             TrackingEvent.event_name, 
             func.count(TrackingEvent.id).label('count')
         ).filter(
@@ -171,6 +176,8 @@ def get_tracking_stats(days=30):
 def get_export_data(start_date=None, end_date=None, include_events=True):
     """Get all visit and event data for export"""
     try:
+        session = get_read_session()
+        
         # Prepare date filters
         filters = []
         if start_date:
@@ -179,7 +186,7 @@ def get_export_data(start_date=None, end_date=None, include_events=True):
             filters.append(Visit.timestamp <= end_date)
             
         # Get all visits
-        visits_query = Visit.query.filter(*filters).order_by(Visit.timestamp.desc())
+        visits_query = session.query(Visit).filter(*filters).order_by(Visit.timestamp.desc())
         visits = [visit.to_dict() for visit in visits_query.all()]
         
         # Get event data if requested
@@ -191,7 +198,7 @@ def get_export_data(start_date=None, end_date=None, include_events=True):
             if end_date:
                 event_filters.append(TrackingEvent.timestamp <= end_date)
                 
-            events_query = TrackingEvent.query.filter(*event_filters).order_by(TrackingEvent.timestamp.desc())
+            events_query = session.query(TrackingEvent).filter(*event_filters).order_by(TrackingEvent.timestamp.desc())
             events = [event.to_dict() for event in events_query.all()]
         
         return {
@@ -6,6 +6,7 @@ from sqlalchemy import func, desc
 from datetime import datetime, timedelta
 from models.db_models import TrackingEvent
 from models.db_instance import db
+from models.database import get_read_session
 import logging
 
 logger = logging.getLogger(__name__)
@@ -50,7 +51,9 @@ def create_tracking_event(event_data):
 def get_tracking_events(page=1, page_size=50, filters=None):
     """Get paginated tracking events with optional filtering"""
     try:
-        query = TrackingEvent.query
+        session = get_read_session()
+        
+        query = session.query(TrackingEvent)
         
         # Apply filters if provided
         if filters:
@@ -95,12 +98,14 @@ def get_tracking_events(page=1, page_size=50, filters=None):
 def get_event_stats(days=30):
     """Get event statistics for a given time period"""
     try:
+        session = get_read_session()
+        
         # Calculate date range
         end_date = datetime.utcnow()
         start_date = end_date - timedelta(days=days)
         
         # Query for event counts by name
-        event_counts = db.session.query(
+        event_counts = session.query(
             TrackingEvent.event_name, 
             func.count(TrackingEvent.id).label('count')
         ).filter(
@@ -113,7 +118,7 @@ def get_event_stats(days=30):
         ).all()
         
         # Query for event counts by day
-        daily_counts = db.session.query(
+        daily_counts = session.query(
             func.date(TrackingEvent.timestamp).label('date'),
             func.count(TrackingEvent.id).label('count')
         ).filter(
@@ -0,0 +1,26 @@
+from flask import Blueprint, jsonify
+from flask_restx import Namespace
+from services.health_service import HealthService
+from utils.validation import create_error_response
+import logging
+
+logger = logging.getLogger(__name__)
+
+health_bp = Blueprint('health', __name__)
+
+# Create API namespace for this blueprint
+api = Namespace('health', description='Health check endpoints')
+
+
+@health_bp.route('/api/health', methods=['GET'])
+@api.response(200, 'Service is healthy')
+@api.response(503, 'Service is unhealthy')
+def health_check():
+    """Report database connectivity, round-trip latency and pool usage"""
+    try:
+        health = HealthService.get_health()
+        status_code = 200 if health['status'] == 'healthy' else 503
+        return jsonify(health), status_code
+    except Exception as e:
+        logger.error(f"Health check failed: {str(e)}")
+        return create_error_response(f'Health check failed: {str(e)}', status_code=503)
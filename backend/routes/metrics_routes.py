@@ -0,0 +1,15 @@
+from flask import Blueprint, Response
+from flask_restx import Namespace
+from services.metrics_service import MetricsService
+
+metrics_bp = Blueprint('metrics', __name__)
+
+# Create API namespace for this blueprint
+api = Namespace('metrics', description='Monitoring endpoints')
+
+
+@metrics_bp.route('/metrics', methods=['GET'])
+@api.response(200, 'Metrics in Prometheus text format')
+def get_metrics():
+    """Expose request, database and geolocation metrics for Prometheus"""
+    return Response(MetricsService.render(), mimetype='text/plain; version=0.0.4')
@@ -5,6 +5,8 @@ from services.file_serving_service import FileServingService
 from schemas.stats_schemas import VisitStatsResponse, ComprehensiveStatsResponse
 from schemas.base_schemas import ErrorResponse
 from utils.validation import create_error_response
+from utils.serialization import json_response
+from utils.rate_limiting import read_limit, export_limit
 from datetime import datetime
 import io
 import logging
@@ -18,6 +20,7 @@ api = Namespace('stats', description='Statistics endpoints')
 
 
 @stats_bp.route('/api/stats', methods=['GET'])
+@read_limit
 @api.response(200, 'Statistics retrieved successfully')
 @api.response(500, 'Internal server error')
 def get_stats():
@@ -42,7 +45,7 @@ def get_stats():
             daily_visits=stats_data.get('daily_visits', [])
         )
         
-        return jsonify(response.model_dump())
+        return json_response(response)
         
     except Exception as e:
         logger.error(f"Failed to retrieve statistics: {str(e)}")
@@ -54,6 +57,7 @@ def get_stats_page():
     return render_template('index.html')
 
 @stats_bp.route('/api/exportStats', methods=['GET'])
+@export_limit
 def export_stats():
     """Export visit statistics as CSV"""
     try:
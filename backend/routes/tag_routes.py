@@ -2,12 +2,16 @@ from flask import Blueprint, request, jsonify
 from flask_restx import Namespace, fields
 from pydantic import ValidationError
 from services.tag_service import TagService
-from schemas.tag_schemas import TagRequest, TagResponse, TagCreateResponse, TagsListResponse
+from services.tag_snapshot_service import TagSnapshotService
+from services.tag_matcher_service import TagMatcherService
+from schemas.tag_schemas import TagRequest, TagResponse, TagCreateResponse, TagsListResponse, TagMatchRequest
 from schemas.base_schemas import BaseResponse, ErrorResponse
 from utils.validation import (
     validate_request_data, map_db_result_to_schema, map_db_results_to_schemas,
     create_success_response, create_error_response
 )
+from utils.serialization import json_response
+from utils.rate_limiting import ingest_limit, read_limit
 
 tag_bp = Blueprint('tag', __name__)
 
@@ -60,32 +64,59 @@ def add_tag():
             tag_id=tag_id
         )
         
-        return jsonify(response.model_dump()), 201
+        return json_response(response, 201)
         
     except Exception as e:
         return create_error_response(f'Failed to create tag: {str(e)}', status_code=500)
 
 
 @tag_bp.route('/api/tags', methods=['GET'])
+@ingest_limit
 @api.response(200, 'Tags retrieved successfully')
+@api.response(304, 'Tags unchanged since the ETag in If-None-Match')
 @api.response(500, 'Internal server error')
 def get_tags():
-    """Get all tags"""
+    """Get all active tags from the in-memory snapshot"""
     try:
-        db_tags = TagService.get_all_tags()
+        return TagSnapshotService.build_response(request)
         
-        # Map database results to response schemas
-        tags = map_db_results_to_schemas(db_tags or [], TagResponse)
+    except Exception as e:
+        return create_error_response(f'Failed to retrieve tags: {str(e)}', status_code=500)
+
+tag_match_model = api.model('TagMatch', {
+    'event': fields.String(description='Event name', default='page_view'),
+    'url': fields.String(description='Page URL'),
+    'properties': fields.Raw(description='Event properties')
+})
+
+@tag_bp.route('/api/tags/match', methods=['GET', 'POST'])
+@ingest_limit
+@api.expect(tag_match_model)
+@api.response(200, 'Matching tags retrieved successfully')
+@api.response(400, 'Validation error')
+@api.response(500, 'Internal server error')
+def match_tags():
+    """Get the active tags whose trigger matches a page URL or event"""
+    try:
+        if request.method == 'POST':
+            data = request.get_json(silent=True) or {}
+        else:
+            data = {key: value for key, value in request.args.items() if key in ('event', 'url')}
         
-        # Create response using schema
-        response = TagsListResponse(tags=tags)
+        validation_result = validate_request_data(TagMatchRequest, data)
+        if isinstance(validation_result, tuple):  # Error response
+            return validation_result
+        
+        match_request = validation_result
+        tags = TagMatcherService.match(match_request.event, match_request.url, match_request.properties)
         
-        return jsonify(response.model_dump())
+        return json_response({'tags': tags})
         
     except Exception as e:
-        return create_error_response(f'Failed to retrieve tags: {str(e)}', status_code=500)
+        return create_error_response(f'Failed to match tags: {str(e)}', status_code=500)
 
 @tag_bp.route('/api/tags/<int:id>', methods=['GET'])
+@read_limit
 @api.response(200, 'Tag retrieved successfully')
 @api.response(404, 'Tag not found')
 @api.response(500, 'Internal server error')
@@ -100,7 +131,7 @@ def get_tag(id):
         # Map database result to response schema
         tag = map_db_result_to_schema(db_tag, TagResponse)
         
-        return jsonify(tag.model_dump())
+        return json_response(tag)
         
     except Exception as e:
         return create_error_response(f'Failed to retrieve tag: {str(e)}', status_code=500)
@@ -121,7 +152,7 @@ def remove_tag(id):
         # Create success response
         response = BaseResponse(success=True, message='Tag deleted successfully')
         
-        return jsonify(response.model_dump())
+        return json_response(response)
         
     except Exception as e:
         return create_error_response(f'Failed to delete tag: {str(e)}', status_code=500)
@@ -1,84 +1,38 @@
 from flask import Blueprint, request, jsonify, send_from_directory, Response
 from flask_restx import Namespace, Resource, fields
 import os
-from services.tracking_service import TrackingService
-from services.request_processing_service import RequestProcessingService
+from services.tracking_service import TrackingService, TRACKING_EVENT_FIELDS
 from services.file_serving_service import FileServingService
+from services.script_cache_service import ScriptCacheService
+from services.tracker_bundle_service import TrackerBundleService
+from services.realtime_service import RealtimeService
+from services.funnel_service import FunnelService
+from services.retention_service import RetentionService
+from services.path_flow_service import PathFlowService
 from config import Config
 from schemas.tracking_schemas import (
-    TrackingEventRequest, TrackingEventResponse, TrackingEventCreateResponse,
+    TrackingEventResponse,
     TrackingEventsResponse, SessionDataResponse, SessionAnalyticsResponse,
-    TrackingStatsResponse, RealtimeStatsResponse
+    TrackingStatsResponse, RealtimeStatsResponse, FunnelRequest, FunnelResponse,
+    RetentionParams, RetentionResponse, PathFlowParams, PathFlowResponse
 )
 from schemas.base_schemas import PaginationParams, DateRangeParams, ErrorResponse
 from utils.validation import (
-    validate_request_data, create_success_response, create_error_response
+    validate_request_data, create_success_response, create_error_response,
+    parse_fields_param
 )
+from utils.serialization import json_response, stream_json_object, streaming_json_response
+from utils.rate_limiting import ingest_limit, read_limit
 import os
+import re
 
 tracking_bp = Blueprint('tracking', __name__)
 
 # Create API namespace for this blueprint
 api = Namespace('tracking', description='Event tracking endpoints')
 
-# Define Swagger models for documentation
-tracking_event_model = api.model('TrackingEvent', {
-    'session_id': fields.String(required=True, description='Session ID'),
-    'page_url': fields.String(required=True, description='Page URL'),
-    'referrer': fields.String(description='Referrer URL'),
-    'browser': fields.String(description='Browser name'),
-    'os': fields.String(description='Operating system'),
-    'device': fields.String(description='Device type'),
-    'country': fields.String(description='Country code'),
-    'city': fields.String(description='City name'),
-    'is_entry_page': fields.Boolean(description='Is entry page'),
-    'is_exit_page': fields.Boolean(description='Is exit page'),
-    'event_name': fields.String(description='Custom event name'),
-    })
-
-@tracking_bp.route('/api/track', methods=['POST'])
-@api.expect(tracking_event_model)
-@api.response(201, 'Event tracked successfully')
-@api.response(400, 'Validation error')
-@api.response(500, 'Internal server error')
-def track_event():
-    """Track a page view or custom event"""
-    try:
-        data = request.get_json()
-        if not data:
-            return create_error_response('No JSON data provided')
-        
-        # Validate request data using Pydantic schema
-        validation_result = validate_request_data(TrackingEventRequest, data)
-        if isinstance(validation_result, tuple):  # Error response
-            return validation_result
-        
-        tracking_request = validation_result
-        
-        # Extract request metadata using service
-        request_metadata = RequestProcessingService.extract_request_metadata(request)
-        
-        # Process tracking event using business logic service
-        result = TrackingService.process_tracking_event(
-            tracking_request.model_dump(),
-            request_metadata
-        )
-        
-        if result:
-            # Create response using schema
-            response = TrackingEventCreateResponse(
-                success=True,
-                event_id=result['id'],
-                timestamp=result['timestamp']
-            )
-            return jsonify(response.model_dump()), 201
-        else:
-            return create_error_response('Failed to track event', status_code=500)
-            
-    except Exception as e:
-        return create_error_response(f'Internal server error: {str(e)}', status_code=500)
-
 @tracking_bp.route('/api/tracking/events', methods=['GET'])
+@read_limit
 @api.response(200, 'Events retrieved successfully')
 @api.response(400, 'Invalid parameters')
 @api.response(500, 'Internal server error')
@@ -99,65 +53,75 @@ def get_events():
         pagination = validation_result
         event_type = request.args.get('type', 'all')  # all, page_views, custom_events
         
+        # Optional sparse fieldset, e.g. ?fields=id,page_url,timestamp
+        fields = parse_fields_param(request.args.get('fields'), TRACKING_EVENT_FIELDS)
+        if isinstance(fields, tuple):  # Error response
+            return fields
+        
         offset = (pagination.page - 1) * pagination.per_page
-          # Get events based on type using service
+        
+        # Get events based on type using service
         if event_type == 'page_views':
-            db_events = TrackingService.get_page_views(limit=pagination.per_page, offset=offset)
+            events = TrackingService.get_page_views(limit=pagination.per_page, offset=offset, fields=fields)
         elif event_type == 'custom_events':
-            db_events = TrackingService.get_custom_events(limit=pagination.per_page, offset=offset)
+            events = TrackingService.get_custom_events(limit=pagination.per_page, offset=offset, fields=fields)
         else:
-            db_events = TrackingService.get_tracking_events(limit=pagination.per_page, offset=offset)
-          # Map database results to response schemas
-        events = []
-        for event in db_events:
-            # Convert to dict if it's not already (handles both ORM objects and dicts)
-            event_dict = event if isinstance(event, dict) else event
-            events.append(event_dict)
-          # Create response using schema
-        response = TrackingEventsResponse(
-            events=events,
-            page=pagination.page,
-            per_page=pagination.per_page,
-            type=event_type,
-            total=len(events),  # This should ideally come from a count query
-            has_next=len(events) == pagination.per_page
-        )
+            events = TrackingService.get_tracking_events(limit=pagination.per_page, offset=offset, fields=fields)
+        
+        page_info = {
+            'page': pagination.page,
+            'per_page': pagination.per_page,
+            'type': event_type,
+            'total': len(events),  # This should ideally come from a count query
+            'has_next': len(events) == pagination.per_page
+        }
+        
+        # Partial events do not fit TrackingEventResponse, so sparse responses skip the schema
+        if fields:
+            return json_response({**page_info, 'events': events})
         
-        return jsonify(response.model_dump())
+        # Create response using schema
+        response = TrackingEventsResponse(events=events, **page_info)
+        
+        return json_response(response)
         
     except Exception as e:
         return create_error_response(f'Failed to retrieve events: {str(e)}', status_code=500)
 
 @tracking_bp.route('/api/tracking/session/<session_id>', methods=['GET'])
+@read_limit
 @api.response(200, 'Session data retrieved successfully')
 @api.response(404, 'Session not found')
 @api.response(500, 'Internal server error')
 def get_session(session_id):
     """Get all events for a specific session"""
-    try:        # Get session data from service
-        session_data = TrackingService.get_session_data(session_id)
+    try:
+        fields = parse_fields_param(request.args.get('fields'), TRACKING_EVENT_FIELDS)
+        if isinstance(fields, tuple):  # Error response
+            return fields
         
-        if not session_data:
-            return create_error_response('Session not found', status_code=404)
-          # Map events to response schemas - events are already dicts from service
-        events = session_data.get('events', [])
+        # Long sessions are streamed: rows are encoded as they are read from the
+        # database, and the totals are written after the events array. Errors
+        # after this point cannot change the 200 status; streaming_json_response
+        # logs them and aborts the connection, leaving the body incomplete
+        session_stream = TrackingService.stream_session_events(session_id, fields=fields)
         
-        # Create response using schema
-        response = SessionDataResponse(
-            session_id=session_id,
-            events=events,
-            total_events=len(events),        duration=session_data.get('duration'),
-            entry_page=session_data.get('entry_page'),
-            exit_page=session_data.get('exit_page')
-        )
+        if session_stream is None:
+            return create_error_response('Session not found', status_code=404)
         
-        return jsonify(response.model_dump())
+        return streaming_json_response(stream_json_object(
+            {'session_id': session_id},
+            'events',
+            session_stream['events'],
+            tail=lambda: session_stream['summary']
+        ))
         
     except Exception as e:
         return create_error_response(f'Failed to retrieve session data: {str(e)}', status_code=500)
 
 
 @tracking_bp.route('/api/tracking/sessions', methods=['GET'])
+@read_limit
 @api.response(200, 'Session analytics retrieved successfully')
 @api.response(500, 'Internal server error')
 def get_sessions():
@@ -174,13 +138,14 @@ def get_sessions():
             top_exit_pages=sessions_data.get('top_exit_pages', [])
         )
         
-        return jsonify(response.model_dump())
+        return json_response(response)
         
     except Exception as e:
         return create_error_response(f'Failed to retrieve session analytics: {str(e)}', status_code=500)
 
 
 @tracking_bp.route('/api/tracking/stats', methods=['GET'])
+@read_limit
 @api.response(200, 'Tracking statistics retrieved successfully')
 @api.response(400, 'Invalid parameters')
 @api.response(500, 'Internal server error')
@@ -209,12 +174,101 @@ def get_stats():
             daily_stats=stats_data.get('daily_stats', [])
         )
         
-        return jsonify(response.model_dump())
+        return json_response(response)
         
     except Exception as e:
         return create_error_response(f'Failed to retrieve tracking statistics: {str(e)}', status_code=500)
 
+@tracking_bp.route('/api/tracking/funnel', methods=['POST'])
+@read_limit
+@api.response(200, 'Funnel computed successfully')
+@api.response(400, 'Invalid funnel definition')
+@api.response(500, 'Internal server error')
+def get_funnel():
+    """Compute per-step conversion and drop-off for an ordered funnel"""
+    try:
+        data = request.get_json(silent=True)
+        if not data:
+            return create_error_response('No JSON data provided')
+        
+        validation_result = validate_request_data(FunnelRequest, data)
+        if isinstance(validation_result, tuple):  # Error response
+            return validation_result
+        funnel_request = validation_result
+        
+        try:
+            funnel_data = FunnelService.get_funnel(
+                funnel_request.steps,
+                window_seconds=funnel_request.window_seconds,
+                start_date=funnel_request.start_date,
+                end_date=funnel_request.end_date
+            )
+        except (ValueError, re.error) as e:
+            return create_error_response(f'Invalid funnel step: {str(e)}')
+        
+        return json_response(FunnelResponse(**funnel_data))
+        
+    except Exception as e:
+        return create_error_response(f'Failed to compute funnel: {str(e)}', status_code=500)
+
+@tracking_bp.route('/api/tracking/retention', methods=['GET'])
+@read_limit
+@api.response(200, 'Retention cohorts retrieved successfully')
+@api.response(400, 'Invalid parameters')
+@api.response(500, 'Internal server error')
+def get_retention():
+    """Get the precomputed retention cohort matrix (built by `flask build-retention`)"""
+    try:
+        params_data = {
+            'granularity': request.args.get('granularity', 'week'),
+            'key': request.args.get('key', 'session'),
+            'cohorts': request.args.get('cohorts', 12, type=int)
+        }
+        
+        validation_result = validate_request_data(RetentionParams, params_data)
+        if isinstance(validation_result, tuple):  # Error response
+            return validation_result
+        params = validation_result
+        
+        matrix = RetentionService.get_matrix(params.granularity, params.key, params.cohorts)
+        return json_response(RetentionResponse(**matrix))
+        
+    except Exception as e:
+        return create_error_response(f'Failed to retrieve retention cohorts: {str(e)}', status_code=500)
+
+@tracking_bp.route('/api/tracking/paths', methods=['GET'])
+@read_limit
+@api.response(200, 'Page flow retrieved successfully')
+@api.response(400, 'Invalid parameters')
+@api.response(500, 'Internal server error')
+def get_paths():
+    """Get the top previous and next pages, and optionally paths, for a page"""
+    try:
+        params_data = {
+            'page_url': request.args.get('page_url'),
+            'days': request.args.get('days', 30, type=int),
+            'limit': request.args.get('limit', 10, type=int),
+            'path_length': request.args.get('path_length', 0, type=int)
+        }
+        
+        validation_result = validate_request_data(PathFlowParams, params_data)
+        if isinstance(validation_result, tuple):  # Error response
+            return validation_result
+        params = validation_result
+        
+        flow_data = PathFlowService.get_flow(
+            params.page_url,
+            days=params.days,
+            limit=params.limit,
+            path_length=params.path_length
+        )
+        return json_response(PathFlowResponse(**flow_data))
+        
+    except Exception as e:
+        return create_error_response(f'Failed to retrieve page flow: {str(e)}', status_code=500)
+
 @tracking_bp.route('/api/tracking/realtime', methods=['GET'])
+@read_limit
 @api.response(200, 'Real-time statistics retrieved successfully')
 @api.response(500, 'Internal server error')
 def get_realtime():
@@ -233,66 +287,49 @@ def get_realtime():
             recent_events=recent_events
         )
         
-        return jsonify(response.model_dump())
+        return json_response(response)
         
     except Exception as e:
         return create_error_response(f'Failed to retrieve real-time statistics: {str(e)}', status_code=500)
 
+@tracking_bp.route('/api/tracking/realtime/stream', methods=['GET'])
+@read_limit
+@api.response(200, 'Server-Sent Events stream of real-time statistics')
+def stream_realtime():
+    """Stream real-time tracking statistics as Server-Sent Events"""
+    RealtimeService.ensure_started()
+    return Response(
+        RealtimeService.stream_tracking_updates(),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            # Stop reverse proxies such as nginx from buffering the stream
+            'X-Accel-Buffering': 'no'
+        }
+    )
+
 # Serve tracking script
 @tracking_bp.route('/static/tracker.js', methods=['GET'])
+@ingest_limit
 def serve_tracker_js():
     """Serve the tracking script with dynamic configuration"""
     try:
-        static_path, filename = FileServingService.get_tracker_script_info('regular')
-        
-        if not FileServingService.validate_file_exists(static_path, filename):
+        response = ScriptCacheService.build_response('tracker.js', request)
+        if response is None:
             return jsonify({'error': 'Tracker script not found'}), 404
-        
-        # Read the original file
-        with open(os.path.join(static_path, filename), 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        # Replace hardcoded URLs with configuration
-        api_url = Config.API_BASE_URL
-        content = content.replace(
-            "const API_ENDPOINT = 'http://localhost:5000/api/track';",
-            f"const API_ENDPOINT = '{api_url}/api/track';"
-        )
-        content = content.replace(
-            "const TAGS_ENDPOINT = 'http://localhost:5000/api/tags';",
-            f"const TAGS_ENDPOINT = '{api_url}/api/tags';"
-        )
-        
-        return Response(content, mimetype='application/javascript')
+        return response
     except Exception as e:
         return jsonify({'error': 'Tracker script not found'}), 404
 
 @tracking_bp.route('/static/tracker.min.js', methods=['GET'])
+@ingest_limit
 def serve_tracker_min_js():
     """Serve the minified tracking script with dynamic configuration"""
     try:
-        static_path, filename = FileServingService.get_tracker_script_info('minified')
-        
-        if not FileServingService.validate_file_exists(static_path, filename):
+        response = ScriptCacheService.build_response('tracker.min.js', request)
+        if response is None:
             return jsonify({'error': 'Tracker script not found'}), 404
-        
-        # Read the original file
-        with open(os.path.join(static_path, filename), 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        # Replace hardcoded URLs with configuration
-        api_url = Config.API_BASE_URL
-        # For minified files, we need to replace the actual URLs
-        content = content.replace(
-            '"http://localhost:5000/api/track"',
-            f'"{api_url}/api/track"'
-        )
-        content = content.replace(
-            '"http://localhost:5000/api/tags"',
-            f'"{api_url}/api/tags"'
-        )
-        
-        return Response(content, mimetype='application/javascript')
+        return response
     except Exception as e:
         return jsonify({'error': 'Tracker script not found'}), 404
 
@@ -324,55 +361,37 @@ def serve_tracking_example():
         return jsonify({'error': 'Tracking example not found'}), 404
 
 @tracking_bp.route('/static/tag-manager.js', methods=['GET'])
+@ingest_limit
 def serve_tag_manager_js():
     """Serve the tag manager script with dynamic configuration"""
     try:
-        static_path = FileServingService.get_frontend_static_path()
-        filename = 'tag-manager.js'
-        
-        if not FileServingService.validate_file_exists(static_path, filename):
+        response = ScriptCacheService.build_response('tag-manager.js', request)
+        if response is None:
             return jsonify({'error': 'Tag manager script not found'}), 404
-        
-        # Read the original file
-        with open(os.path.join(static_path, filename), 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        # Replace hardcoded URLs with configuration
-        api_url = Config.API_BASE_URL
-        content = content.replace(
-            "const API_URL = 'http://localhost:5000';",
-            f"const API_URL = '{api_url}';"
-        )        
-        return Response(content, mimetype='application/javascript')
+        return response
     except Exception as e:
         return jsonify({'error': 'Tag manager script not found'}), 404
 
 @tracking_bp.route('/static/tracker-with-tags.min.js', methods=['GET'])
+@ingest_limit
 def serve_tracker_with_tags_min_js():
     """Serve the minified tracking script with tags and dynamic configuration"""
     try:
-        static_path = FileServingService.get_frontend_static_path()
-        filename = 'tracker-with-tags.min.js'
-        
-        if not FileServingService.validate_file_exists(static_path, filename):
+        response = ScriptCacheService.build_response('tracker-with-tags.min.js', request)
+        if response is None:
             return jsonify({'error': 'Tracker with tags script not found'}), 404
-        
-        # Read the original file
-        with open(os.path.join(static_path, filename), 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        # Replace hardcoded URLs with configuration
-        api_url = Config.API_BASE_URL
-        # For minified files, we need to replace the actual URLs
-        content = content.replace(
-            '"http://localhost:5000/api/track"',
-            f'"{api_url}/api/track"'
-        )
-        content = content.replace(
-            '"http://localhost:5000/api/tags"',
-            f'"{api_url}/api/tags"'
-        )
-        
-        return Response(content, mimetype='application/javascript')
+        return response
     except Exception as e:
         return jsonify({'error': 'Tracker with tags script not found'}), 404
+
+@tracking_bp.route('/static/tracker-bundle.js', methods=['GET'])
+@ingest_limit
+def serve_tracker_bundle_js():
+    """Serve the minified tracking script with the active tags inlined"""
+    try:
+        response = TrackerBundleService.build_response(request)
+        if response is None:
+            return jsonify({'error': 'Tracker bundle not found'}), 404
+        return response
+    except Exception as e:
+        return create_error_response(f'Failed to build tracker bundle: {str(e)}', status_code=500)
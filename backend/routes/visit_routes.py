@@ -1,13 +1,16 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request
 from flask_restx import Namespace, Resource, fields
 from pydantic import ValidationError
-from services.visit_service import VisitService
+from services.ingestion_service import IngestionService
+from services.ingest_queue_service import IngestQueueService
 from services.request_processing_service import RequestProcessingService
 from schemas.visit_schemas import VisitRequest, VisitResponse, VisitCreateResponse
 from schemas.base_schemas import ErrorResponse
 from utils.validation import (
     validate_request_data, create_success_response, create_error_response
 )
+from utils.serialization import json_response
+from utils.rate_limiting import ingest_limit
 import logging
 
 logger = logging.getLogger(__name__)
@@ -25,19 +28,25 @@ visit_model = api.model('Visit', {
     'os': fields.String(description='Operating system'),
     'device': fields.String(description='Device type'),
     'country': fields.String(description='Country code'),
+    'city': fields.String(description='City name'),
     'session_id': fields.String(description='Session identifier'),
+    'client_event_id': fields.String(description='Random event ID; repeated deliveries are ignored'),
     'is_entry_page': fields.Boolean(description='Is entry page'),
     'is_exit_page': fields.Boolean(description='Is exit page'),
-    'event_name': fields.String(description='Custom event name'),    'event_data': fields.Raw(description='Custom event data')
+    'event_name': fields.String(description='Custom event name'),
+    'event_data': fields.Raw(description='Custom event data')
 })
 
 @visit_bp.route('/api/track', methods=['POST'])
+@ingest_limit
 @api.expect(visit_model)
-@api.response(201, 'Visit tracked successfully')
+@api.response(201, 'Event tracked successfully')
+@api.response(200, 'Duplicate event ignored (client_event_id already ingested)')
+@api.response(202, 'Event queued for storage (INGEST_MODE=queue or database unavailable), or bot traffic discarded')
 @api.response(400, 'Validation error')
 @api.response(500, 'Internal server error')
 def track_visit():
-    """Track a visit to a page"""
+    """Track a page view or custom event into every configured ingestion sink"""
     try:
         data = request.get_json()
         if not data:
@@ -48,28 +57,41 @@ def track_visit():
         if isinstance(validation_result, tuple):  # Error response
             return validation_result
         
-        visit_request = validation_result
-        
         # Extract request metadata using service
         request_metadata = RequestProcessingService.extract_request_metadata(request)
         
-        # Process visit tracking using business logic service
-        visit_id = VisitService.process_visit_tracking(
-            visit_request.model_dump(),
-            request_metadata
-        )
+        if IngestQueueService.is_enabled():
+            # An ingest worker enriches and stores the event
+            result = IngestionService.enqueue(validation_result.model_dump(), request_metadata)
+        else:
+            # Enrich once and write all sinks in a single transaction
+            result = IngestionService.ingest(
+                validation_result.model_dump(),
+                request_metadata
+            )
+        
+        # Bot traffic discarded by BOT_FILTER_MODE=drop is accepted but not stored
+        if result.pop('dropped'):
+            response = VisitCreateResponse(success=True, message='Bot traffic discarded', **result)
+            return json_response(response, status_code=202)
+        
+        # Queued for an ingest worker, or spooled until the database recovers
+        if result['queued']:
+            response = VisitCreateResponse(success=True, message='Event queued for storage', **result)
+            return json_response(response, status_code=202)
         
-        if not visit_id:
-            return create_error_response('Failed to create visit record', status_code=500)
+        # Repeated delivery of an event that was already stored
+        if result['duplicate']:
+            response = VisitCreateResponse(success=True, message='Duplicate event ignored', **result)
+            return json_response(response, status_code=200)
         
         # Create response using schema
         response = VisitCreateResponse(
             success=True,
-            visit_id=visit_id,
-            session_id=visit_request.session_id
+            **result
         )
         
-        return jsonify(response.model_dump()), 201
+        return json_response(response, status_code=201)
         
     except Exception as e:
         logger.error(f"Failed to track visit: {str(e)}")
@@ -3,9 +3,12 @@ Schemas package initialization
 """
 from .base_schemas import BaseResponse, ErrorResponse, PaginatedResponse, PaginationParams, DateRangeParams
 from .tracking_schemas import (
-    TrackingEventRequest, TrackingEventResponse, TrackingEventCreateResponse,
+    TrackingEventResponse,
     TrackingEventsResponse, SessionDataResponse, SessionAnalyticsResponse,
-    TrackingStatsResponse, RealtimeStatsResponse
+    TrackingStatsResponse, RealtimeStatsResponse,
+    FunnelRequest, FunnelStepResponse, FunnelResponse,
+    RetentionParams, RetentionPeriodResponse, RetentionCohortResponse, RetentionResponse,
+    PathFlowParams, PathFlowPageResponse, PathFlowPathResponse, PathFlowResponse
 )
 from .visit_schemas import VisitRequest, VisitResponse, VisitCreateResponse
 from .tag_schemas import TagRequest, TagResponse, TagCreateResponse, TagsListResponse
@@ -20,14 +23,23 @@ __all__ = [
     'DateRangeParams',
     
     # Tracking schemas
-    'TrackingEventRequest',
     'TrackingEventResponse',
-    'TrackingEventCreateResponse',
     'TrackingEventsResponse',
     'SessionDataResponse',
     'SessionAnalyticsResponse',
     'TrackingStatsResponse',
     'RealtimeStatsResponse',
+    'FunnelRequest',
+    'FunnelStepResponse',
+    'FunnelResponse',
+    'RetentionParams',
+    'RetentionPeriodResponse',
+    'RetentionCohortResponse',
+    'RetentionResponse',
+    'PathFlowParams',
+    'PathFlowPageResponse',
+    'PathFlowPathResponse',
+    'PathFlowResponse',
     
     # Visit schemas
     'VisitRequest',
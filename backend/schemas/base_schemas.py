@@ -1,9 +1,15 @@
 """
 Base schemas for API responses and common DTOs
 """
-from pydantic import BaseModel, Field, ConfigDict
-from typing import Optional, Dict, Any, List
+from pydantic import BaseModel, Field, ConfigDict, PlainSerializer
+from typing import Optional, Dict, Any, List, Annotated
 from datetime import datetime
+from werkzeug.http import http_date
+
+
+# Datetime rendered as an HTTP date in JSON, matching Flask's jsonify, so
+# model_dump_json() produces the same wire format as jsonify(model_dump())
+HttpDateTime = Annotated[datetime, PlainSerializer(http_date, return_type=str, when_used='json')]
 
 
 class BaseResponse(BaseModel):
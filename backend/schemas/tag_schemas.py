@@ -4,7 +4,7 @@ Tag related DTOs and schemas
 from pydantic import BaseModel, Field, ConfigDict
 from typing import Optional, Dict, Any, List
 from datetime import datetime
-from .base_schemas import BaseResponse
+from .base_schemas import BaseResponse, HttpDateTime
 
 
 class TagRequest(BaseModel):
@@ -26,7 +26,16 @@ class TagResponse(BaseModel):
     type: Optional[str] = Field(default=None, description="Tag type")
     trigger: Optional[str] = Field(default=None, description="Tag trigger condition")
     config: Optional[Dict[str, Any]] = Field(default=None, description="Tag configuration")
-    created_at: datetime = Field(description="Creation timestamp")
+    created_at: HttpDateTime = Field(description="Creation timestamp")
+
+
+class TagMatchRequest(BaseModel):
+    """Schema for matching tags against a page URL or event"""
+    model_config = ConfigDict(str_strip_whitespace=True)
+    
+    event: str = Field(default='page_view', min_length=1, max_length=100, description="Event name")
+    url: Optional[str] = Field(default=None, max_length=2048, description="Page URL")
+    properties: Optional[Dict[str, Any]] = Field(default=None, description="Event properties")
 
 
 class TagCreateResponse(BaseResponse):
@@ -2,33 +2,17 @@
 Tracking related DTOs and schemas
 """
 from pydantic import BaseModel, Field, ConfigDict
-from typing import Optional, Dict, Any, List
-from datetime import datetime
-from .base_schemas import BaseResponse, PaginatedResponse
-
-
-class TrackingEventRequest(BaseModel):
-    """Schema for incoming tracking event requests"""
-    model_config = ConfigDict(str_strip_whitespace=True)
-    
-    session_id: str = Field(description="Unique session identifier")
-    page_url: str = Field(description="URL of the page being tracked")
-    referrer: Optional[str] = Field(default=None, description="Referrer URL")
-    browser: Optional[str] = Field(default=None, description="Browser name")
-    os: Optional[str] = Field(default=None, description="Operating system")
-    device: Optional[str] = Field(default=None, description="Device type")
-    country: Optional[str] = Field(default=None, description="Country code")
-    city: Optional[str] = Field(default=None, description="City name")
-    is_entry_page: bool = Field(default=False, description="Whether this is an entry page")
-    is_exit_page: bool = Field(default=False, description="Whether this is an exit page")
-    event_name: Optional[str] = Field(default=None, description="Custom event name")
-    event_data: Optional[Dict[str, Any]] = Field(default=None, description="Custom event data")
+from typing import Optional, Dict, Any, List, Literal, Union
+from datetime import date, datetime
+from .base_schemas import BaseResponse, PaginatedResponse, HttpDateTime
 
 
 class TrackingEventResponse(BaseModel):
     """Schema for tracking event response"""
     id: int = Field(description="Event ID")
     session_id: str = Field(description="Session ID")
+    client_session_id: Optional[str] = Field(default=None, description="Session ID sent by the tracker")
+    client_event_id: Optional[str] = Field(default=None, description="Event ID sent by the tracker")
     page_url: str = Field(description="Page URL")
     ip_address: Optional[str] = Field(default=None, description="IP address")
     user_agent: Optional[str] = Field(default=None, description="User agent")
@@ -38,17 +22,12 @@ class TrackingEventResponse(BaseModel):
     device: Optional[str] = Field(default=None, description="Device type")
     country: Optional[str] = Field(default=None, description="Country code")
     city: Optional[str] = Field(default=None, description="City name")
-    timestamp: datetime = Field(description="Event timestamp")
+    timestamp: HttpDateTime = Field(description="Event timestamp")
     is_entry_page: bool = Field(description="Whether this is an entry page")
     is_exit_page: bool = Field(description="Whether this is an exit page")
     event_name: Optional[str] = Field(default=None, description="Custom event name")
     event_data: Optional[Dict[str, Any]] = Field(default=None, description="Custom event data")
-
-
-class TrackingEventCreateResponse(BaseResponse):
-    """Response for created tracking event"""
-    event_id: int = Field(description="Created event ID")
-    timestamp: datetime = Field(description="Event timestamp")
+    is_bot: bool = Field(default=False, description="Whether the event matched a bot signature")
 
 
 class TrackingEventsResponse(PaginatedResponse):
@@ -93,3 +72,104 @@ class RealtimeStatsResponse(BaseModel):
     page_views_last_hour: int = Field(description="Page views in the last hour")
     top_pages_today: List[Dict[str, Any]] = Field(description="Top pages today")
     recent_events: List[TrackingEventResponse] = Field(description="Recent events")
+
+
+class FunnelRequest(BaseModel):
+    """Schema for funnel analysis requests"""
+    model_config = ConfigDict(str_strip_whitespace=True)
+    
+    steps: List[Union[str, Dict[str, Any]]] = Field(
+        min_length=2, max_length=20,
+        description="Ordered steps: event names, page URL patterns or trigger objects"
+    )
+    window_seconds: int = Field(default=86400, ge=1, le=90 * 86400, description="Conversion window from the first step")
+    start_date: Optional[datetime] = Field(default=None, description="Start of the event range (default: 30 days ago)")
+    end_date: Optional[datetime] = Field(default=None, description="End of the event range (default: now)")
+
+
+class FunnelStepResponse(BaseModel):
+    """Schema for one funnel step result"""
+    step: int = Field(description="Step number, starting at 1")
+    name: str = Field(description="Step label")
+    count: int = Field(description="Sessions that reached this step")
+    conversion_rate: float = Field(description="Percentage of first-step sessions that reached this step")
+    step_conversion_rate: float = Field(description="Percentage of previous-step sessions that reached this step")
+    drop_off: int = Field(description="Sessions lost since the previous step")
+    drop_off_rate: float = Field(description="Percentage of previous-step sessions lost")
+    avg_seconds_from_start: Optional[float] = Field(default=None, description="Average time from the first step")
+
+
+class FunnelResponse(BaseModel):
+    """Schema for funnel analysis response"""
+    steps: List[FunnelStepResponse] = Field(description="Per-step results")
+    sessions_scanned: int = Field(description="Sessions with a matching event in the date range")
+    overall_conversion_rate: float = Field(description="Percentage of first-step sessions that completed the funnel")
+    window_seconds: int = Field(description="Conversion window in seconds")
+    start_date: HttpDateTime = Field(description="Start of the event range")
+    end_date: HttpDateTime = Field(description="End of the event range")
+
+
+class RetentionParams(BaseModel):
+    """Retention matrix query parameters"""
+    granularity: Literal['day', 'week'] = Field(default='week', description="Cohort period")
+    key: Literal['session', 'ip'] = Field(default='session', description="Visitor key")
+    cohorts: int = Field(default=12, ge=1, le=365, description="Number of most recent cohorts")
+
+
+class RetentionPeriodResponse(BaseModel):
+    """Schema for one retention matrix cell"""
+    period: int = Field(description="Periods since the cohort started")
+    visitors: int = Field(description="Cohort visitors active in the period")
+    retention_rate: float = Field(description="Percentage of the cohort active in the period")
+
+
+class RetentionCohortResponse(BaseModel):
+    """Schema for one retention cohort row"""
+    cohort_start: date = Field(description="First day of the cohort")
+    visitors: int = Field(description="Visitors first seen in the cohort")
+    periods: List[RetentionPeriodResponse] = Field(description="Retention per elapsed period")
+
+
+class RetentionResponse(BaseModel):
+    """Schema for retention matrix response"""
+    granularity: str = Field(description="Cohort period (day or week)")
+    key_type: str = Field(description="Visitor key (session or ip)")
+    last_built: Optional[date] = Field(default=None, description="Last day included in the matrix")
+    cohorts: List[RetentionCohortResponse] = Field(description="Cohorts, oldest first")
+
+
+class PathFlowParams(BaseModel):
+    """Path flow query parameters"""
+    model_config = ConfigDict(str_strip_whitespace=True)
+    
+    page_url: str = Field(min_length=1, max_length=500, description="Page to analyse (full URL or path)")
+    days: int = Field(default=30, ge=1, le=365, description="Number of days to include")
+    limit: int = Field(default=10, ge=1, le=100, description="Number of pages and paths to return")
+    path_length: int = Field(default=0, ge=0, le=10, description="Pages per path starting at page_url (0: no paths)")
+
+
+class PathFlowPageResponse(BaseModel):
+    """Schema for a page adjacent to the analysed page"""
+    page_url: str = Field(description="Page URL, or (entrance) / (exit)")
+    count: int = Field(description="Transitions counted (an upper bound when not exact)")
+    share: float = Field(description="Percentage of the analysed page's occurrences")
+    error: int = Field(description="Maximum overcount of this entry")
+
+
+class PathFlowPathResponse(BaseModel):
+    """Schema for a path starting at the analysed page"""
+    pages: List[str] = Field(description="Pages in order, ending with (exit) if the session ended")
+    count: int = Field(description="Occurrences counted (an upper bound when not exact)")
+    share: float = Field(description="Percentage of the analysed page's occurrences")
+    error: int = Field(description="Maximum overcount of this entry")
+
+
+class PathFlowResponse(BaseModel):
+    """Schema for path flow response"""
+    page_url: str = Field(description="Analysed page")
+    occurrences: int = Field(description="Views of the page (reloads collapsed)")
+    sessions: int = Field(description="Sessions that viewed the page")
+    next_pages: List[PathFlowPageResponse] = Field(description="Top pages viewed next")
+    previous_pages: List[PathFlowPageResponse] = Field(description="Top pages viewed before")
+    paths: List[PathFlowPathResponse] = Field(description="Top paths starting at the page")
+    exact: bool = Field(description="Whether all counts are exact")
@@ -4,11 +4,11 @@ Visit related DTOs and schemas
 from pydantic import BaseModel, Field, ConfigDict
 from typing import Optional, Dict, Any, List
 from datetime import datetime
-from .base_schemas import BaseResponse
+from .base_schemas import BaseResponse, HttpDateTime
 
 
 class VisitRequest(BaseModel):
-    """Schema for incoming visit tracking requests"""
+    """Schema for incoming /api/track requests (page views and custom events)"""
     model_config = ConfigDict(str_strip_whitespace=True)
     
     page_url: str = Field(description="URL of the page being visited")
@@ -17,7 +17,12 @@ class VisitRequest(BaseModel):
     os: Optional[str] = Field(default=None, description="Operating system")
     device: Optional[str] = Field(default=None, description="Device type")
     country: Optional[str] = Field(default=None, description="Country code")
+    city: Optional[str] = Field(default=None, description="City name")
     session_id: Optional[str] = Field(default=None, description="Session identifier")
+    client_event_id: Optional[str] = Field(
+        default=None, max_length=64,
+        description="Random ID of this event; repeated deliveries with the same ID are ignored"
+    )
     is_entry_page: bool = Field(default=False, description="Whether this is an entry page")
     is_exit_page: bool = Field(default=False, description="Whether this is an exit page")
     event_name: Optional[str] = Field(default=None, description="Custom event name")
@@ -35,15 +40,23 @@ class VisitResponse(BaseModel):
     os: Optional[str] = Field(default=None, description="Operating system")
     device: Optional[str] = Field(default=None, description="Device type")
     country: Optional[str] = Field(default=None, description="Country code")
-    timestamp: datetime = Field(description="Visit timestamp")
+    timestamp: HttpDateTime = Field(description="Visit timestamp")
     session_id: Optional[str] = Field(default=None, description="Session ID")
+    client_session_id: Optional[str] = Field(default=None, description="Session ID sent by the tracker")
+    client_event_id: Optional[str] = Field(default=None, description="Event ID sent by the tracker")
     is_entry_page: bool = Field(description="Whether this is an entry page")
     is_exit_page: bool = Field(description="Whether this is an exit page")
     event_name: Optional[str] = Field(default=None, description="Custom event name")
     event_data: Optional[Dict[str, Any]] = Field(default=None, description="Custom event data")
+    is_bot: bool = Field(default=False, description="Whether the event matched a bot signature")
 
 
 class VisitCreateResponse(BaseResponse):
-    """Response for created visit"""
-    visit_id: int = Field(description="Created visit ID")
-    session_id: Optional[str] = Field(default=None, description="Session ID")
+    """Response for a tracked page view or custom event"""
+    visit_id: Optional[int] = Field(default=None, description="Created visit ID")
+    event_id: Optional[int] = Field(default=None, description="Created tracking event ID (requires session_id)")
+    session_id: Optional[str] = Field(default=None, description="Session ID assigned by the server")
+    timestamp: HttpDateTime = Field(description="Event timestamp")
+    is_bot: bool = Field(default=False, description="Whether the event matched a bot signature")
+    duplicate: bool = Field(default=False, description="Whether the event was already ingested and was ignored")
+    queued: bool = Field(default=False, description="Whether the event was queued to be stored later")
@@ -4,7 +4,7 @@ Base service class with common functionality
 from flask import current_app
 from models.db_models import db
 import logging
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Sequence
 
 logger = logging.getLogger(__name__)
 
@@ -29,3 +29,35 @@ class BaseService:
         logger.error(f"Database error in {operation}: {str(error)}")
         db.session.rollback()
         raise error
+    
+    @staticmethod
+    def select_rows(session, model, fields: Sequence[str]):
+        """
+        Start a column-projected query returning plain row tuples
+        
+        Only the named columns are loaded and no ORM entities are built,
+        so rows skip identity-map bookkeeping and attribute instrumentation.
+        
+        Args:
+            session: SQLAlchemy session to query with
+            model: Model class the columns belong to
+            fields: Column names to select, in output order
+            
+        Returns:
+            Query yielding one tuple per row
+        """
+        return session.query(*[getattr(model, field) for field in fields])
+    
+    @staticmethod
+    def rows_to_dicts(rows, fields: Sequence[str]) -> List[Dict[str, Any]]:
+        """
+        Convert row tuples from select_rows into dictionaries
+        
+        Args:
+            rows: Iterable of row tuples
+            fields: Column names matching the tuple positions
+            
+        Returns:
+            List of dictionaries keyed by field name
+        """
+        return [dict(zip(fields, row)) for row in rows]
@@ -0,0 +1,200 @@
+"""
+Bot detection service - classifies ingested events as crawler/bot traffic
+
+User-Agent signatures are compiled into one case-insensitive regular
+expression and IP ranges into sorted, merged integer intervals searched with
+bisect, so a verdict costs one regex search (memoised per distinct User-Agent)
+and one binary search. Depending on BOT_FILTER_MODE, bot events are stored
+with is_bot set ('flag'), discarded ('drop') or not classified ('off').
+"""
+from typing import Optional, List, Dict, Iterable, Tuple
+from bisect import bisect_right
+from functools import lru_cache
+from flask import current_app
+from services.metrics_service import MetricsService
+import ipaddress
+import logging
+import re
+import threading
+
+logger = logging.getLogger(__name__)
+
+FILTER_MODES = ('flag', 'drop', 'off')
+
+# Case-insensitive substrings of known crawler, monitoring and HTTP library
+# User-Agents. A bare 'bot' would also match phone models such as "CUBOT X30",
+# so crawlers are matched by name, by a "...bot/<version>" product token, or by
+# the "+http://..." contact URL most of them include
+DEFAULT_UA_SIGNATURES = (
+    'bot/', '+http', 'crawl', 'spider', 'slurp', 'archiver', 'mediapartners-google',
+    'googlebot', 'adsbot', 'bingbot', 'yandexbot', 'duckduckbot', 'applebot', 'petalbot',
+    'twitterbot', 'linkedinbot', 'slackbot', 'discordbot', 'telegrambot', 'bitlybot',
+    'semrushbot', 'ahrefsbot', 'mj12bot', 'dotbot', 'gptbot', 'ccbot', 'amazonbot',
+    'facebookexternalhit', 'embedly', 'quora link preview', 'whatsapp',
+    'headlesschrome', 'phantomjs', 'puppeteer', 'playwright', 'selenium', 'lighthouse',
+    'pingdom', 'uptimerobot', 'statuscake', 'site24x7', 'newrelicpinger',
+    'python-requests', 'python-urllib', 'aiohttp', 'httpx', 'curl/', 'wget', 'libwww-perl',
+    'go-http-client', 'java/', 'okhttp', 'apache-httpclient', 'axios/', 'node-fetch', 'scrapy',
+)
+
+# Verdict reasons
+REASON_USER_AGENT = 'user_agent'
+REASON_EMPTY_USER_AGENT = 'empty_user_agent'
+REASON_IP = 'ip'
+
+
+class BotMatcher:
+    """
+    Compiled User-Agent and IP range matcher
+
+    Args:
+        ua_signatures: Case-insensitive User-Agent substrings
+        ip_ranges: CIDR ranges (IPv4 or IPv6) of known bot networks
+        cache_size: Distinct User-Agents whose verdict is memoised
+    """
+
+    def __init__(self, ua_signatures: Iterable[str], ip_ranges: Iterable[str] = (), cache_size: int = 10000):
+        signatures = sorted({signature.strip().lower() for signature in ua_signatures if signature.strip()})
+        self._ua_pattern = re.compile(
+            '|'.join(re.escape(signature) for signature in signatures), re.IGNORECASE
+        ) if signatures else None
+        self.ua_signature_count = len(signatures)
+        self.ip_range_count = 0
+        self.match_user_agent = lru_cache(maxsize=cache_size)(self._match_user_agent)
+
+        # Per IP version: sorted, non-overlapping (start, end) intervals and their starts
+        self._ranges: Dict[int, List[Tuple[int, int]]] = {}
+        self._range_starts: Dict[int, List[int]] = {}
+        intervals: Dict[int, List[Tuple[int, int]]] = {4: [], 6: []}
+        for cidr in ip_ranges:
+            network = ipaddress.ip_network(cidr.strip(), strict=False)
+            intervals[network.version].append(
+                (int(network.network_address), int(network.broadcast_address))
+            )
+        for version, ranges in intervals.items():
+            merged: List[Tuple[int, int]] = []
+            for start, end in sorted(ranges):
+                if merged and start <= merged[-1][1] + 1:
+                    merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+                else:
+                    merged.append((start, end))
+            self._ranges[version] = merged
+            self._range_starts[version] = [start for start, _ in merged]
+            self.ip_range_count += len(merged)
+
+    def _match_user_agent(self, user_agent: str) -> bool:
+        return self._ua_pattern is not None and self._ua_pattern.search(user_agent) is not None
+
+    def match_ip(self, ip_address: Optional[str]) -> bool:
+        """Whether an IP address falls in one of the bot ranges"""
+        if not ip_address or not self.ip_range_count:
+            return False
+        try:
+            address = ipaddress.ip_address(ip_address)
+        except ValueError:
+            return False
+        value = int(address)
+        index = bisect_right(self._range_starts[address.version], value) - 1
+        return index >= 0 and value <= self._ranges[address.version][index][1]
+
+    def classify(self, user_agent: Optional[str], ip_address: Optional[str],
+                 require_user_agent: bool = True) -> Optional[str]:
+        """
+        Classify one event
+
+        Args:
+            user_agent: Raw User-Agent header value
+            ip_address: Client IP address
+            require_user_agent: Treat a missing User-Agent as a bot (browsers
+                always send one)
+
+        Returns:
+            Reason the event is a bot ('user_agent', 'empty_user_agent' or
+            'ip'), or None for human traffic
+        """
+        if user_agent:
+            if self.match_user_agent(user_agent):
+                return REASON_USER_AGENT
+        elif require_user_agent:
+            return REASON_EMPTY_USER_AGENT
+        if self.match_ip(ip_address):
+            return REASON_IP
+        return None
+
+    def cache_hit_ratio(self) -> float:
+        """Share of User-Agent lookups answered from the memo"""
+        info = self.match_user_agent.cache_info()
+        lookups = info.hits + info.misses
+        return info.hits / lookups if lookups else 0.0
+
+
+_matcher: Dict[str, Optional[BotMatcher]] = {'instance': None}
+_matcher_lock = threading.Lock()
+
+
+class BotDetectionService:
+    """Service for filtering bot and crawler traffic at ingest"""
+
+    @staticmethod
+    def init_app(app) -> None:
+        """
+        Check BOT_FILTER_MODE once at startup
+
+        Args:
+            app: Flask application
+
+        Raises:
+            ValueError: If the mode is not one of FILTER_MODES
+        """
+        mode = app.config.get('BOT_FILTER_MODE', 'flag')
+        if mode not in FILTER_MODES:
+            raise ValueError(f"Unknown bot filter mode '{mode}' in BOT_FILTER_MODE")
+
+    @staticmethod
+    def get_mode() -> str:
+        """Get the configured BOT_FILTER_MODE, one of FILTER_MODES"""
+        return current_app.config.get('BOT_FILTER_MODE', 'flag')
+
+    @staticmethod
+    def get_matcher() -> BotMatcher:
+        """Get the process-wide matcher, compiling it from config on first use"""
+        if _matcher['instance'] is None:
+            with _matcher_lock:
+                if _matcher['instance'] is None:
+                    matcher = BotMatcher(
+                        DEFAULT_UA_SIGNATURES + tuple(current_app.config.get('BOT_UA_SIGNATURES', [])),
+                        current_app.config.get('BOT_IP_RANGES', []),
+                        current_app.config.get('BOT_UA_CACHE_SIZE', 10000)
+                    )
+                    MetricsService.register_gauge(
+                        'bot_filter_ua_cache_hit_ratio',
+                        'Share of bot filter User-Agent lookups answered from the memo',
+                        matcher.cache_hit_ratio
+                    )
+                    logger.info(
+                        f"Compiled bot matcher with {matcher.ua_signature_count} User-Agent signatures "
+                        f"and {matcher.ip_range_count} IP ranges"
+                    )
+                    _matcher['instance'] = matcher
+        return _matcher['instance']
+
+    @staticmethod
+    def classify(user_agent: Optional[str], ip_address: Optional[str],
+                 require_user_agent: bool = True) -> Optional[str]:
+        """
+        Classify an event and count the verdict
+
+        Args:
+            user_agent: Raw User-Agent header value
+            ip_address: Client IP address
+            require_user_agent: Treat a missing User-Agent as a bot
+
+        Returns:
+            Reason the event is a bot, or None for human traffic (always None
+            when BOT_FILTER_MODE is 'off')
+        """
+        if BotDetectionService.get_mode() == 'off':
+            return None
+        reason = BotDetectionService.get_matcher().classify(user_agent, ip_address, require_user_agent)
+        MetricsService.record_bot_verdict(reason)
+        return reason
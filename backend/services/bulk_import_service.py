@@ -0,0 +1,452 @@
+"""
+Bulk import service - business logic for loading historical events with COPY
+"""
+from typing import Optional, List, Dict, Any, Iterable, Iterator, TextIO
+from datetime import datetime, timedelta, timezone
+from flask import current_app
+from models.db_instance import db
+from models.db_models import Visit, TrackingEvent
+from services.base_service import BaseService
+from services.bot_detection_service import BotDetectionService
+from services.deduplication_service import DeduplicationService
+from services.geolocation_service import GeolocationService
+from services.metrics_service import MetricsService
+from services.request_processing_service import RequestProcessingService
+from services.sessionization_service import SessionTracker
+import logging
+import csv
+import io
+import json
+import os
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 5000
+
+# Column order used for COPY, per target table
+TABLE_COLUMNS = {
+    'tracking_events': [
+        'session_id', 'client_session_id', 'client_event_id', 'page_url', 'ip_address', 'user_agent', 'referrer',
+        'browser', 'os', 'device', 'country', 'city',
+        'is_entry_page', 'is_exit_page', 'event_name', 'event_data', 'is_bot', 'timestamp'
+    ],
+    'visits': [
+        'page_url', 'ip_address', 'user_agent', 'referrer',
+        'browser', 'os', 'device', 'country', 'session_id', 'client_session_id', 'client_event_id',
+        'is_entry_page', 'is_exit_page', 'event_name', 'event_data', 'is_bot', 'timestamp'
+    ],
+}
+
+TABLE_MODELS = {'tracking_events': TrackingEvent, 'visits': Visit}
+
+# Columns that must be present for a row to be loadable into the table
+REQUIRED_COLUMNS = {
+    'tracking_events': ('session_id', 'page_url'),
+    'visits': ('page_url',),
+}
+
+BOOLEAN_COLUMNS = ('is_entry_page', 'is_exit_page', 'is_bot')
+
+
+def _column_lengths() -> Dict[str, int]:
+    """Shortest length of each VARCHAR column across the target tables"""
+    lengths: Dict[str, int] = {}
+    for model in TABLE_MODELS.values():
+        for column in model.__table__.columns:
+            length = getattr(column.type, 'length', None)
+            if length:
+                lengths[column.name] = min(length, lengths.get(column.name, length))
+    return lengths
+
+
+# Longer values would abort the whole COPY batch, so they are truncated
+COLUMN_LENGTHS = _column_lengths()
+
+
+class BulkImportService(BaseService):
+    """Service for bulk loading tracking history into the database"""
+
+    @staticmethod
+    def detect_format(file_path: str) -> str:
+        """
+        Detect the input format from the file extension
+
+        Args:
+            file_path: Path to the input file
+
+        Returns:
+            'csv' or 'ndjson'
+        """
+        extension = os.path.splitext(file_path)[1].lower()
+        return 'csv' if extension == '.csv' else 'ndjson'
+
+    @staticmethod
+    def iter_records(file_obj: TextIO, file_format: str) -> Iterator[Dict[str, Any]]:
+        """
+        Stream records from an NDJSON or CSV file one at a time
+
+        Args:
+            file_obj: Open text file
+            file_format: 'ndjson' or 'csv'
+
+        Returns:
+            Iterator over raw record dictionaries
+        """
+        if file_format == 'csv':
+            for row in csv.DictReader(file_obj):
+                yield row
+            return
+
+        for line_number, line in enumerate(file_obj, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                logger.warning(f"Skipping malformed NDJSON line {line_number}: {e}")
+
+    @staticmethod
+    def iter_batches(records: Iterable[Dict[str, Any]], batch_size: int) -> Iterator[List[Dict[str, Any]]]:
+        """Group a record stream into lists of at most batch_size records"""
+        batch = []
+        for record in records:
+            batch.append(record)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    @staticmethod
+    def normalize_record(record: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Normalize a raw input record to column values
+
+        Empty strings become None, booleans and timestamps are parsed and
+        JSON event data given as a string is decoded.
+        """
+        normalized = {
+            key: (None if value == '' else value)
+            for key, value in record.items()
+        }
+
+        for column in BOOLEAN_COLUMNS:
+            value = normalized.get(column)
+            if isinstance(value, str):
+                normalized[column] = value.strip().lower() in ('1', 'true', 't', 'yes')
+            else:
+                normalized[column] = bool(value)
+
+        event_data = normalized.get('event_data')
+        if isinstance(event_data, str):
+            try:
+                normalized['event_data'] = json.loads(event_data)
+            except json.JSONDecodeError:
+                normalized['event_data'] = {'value': event_data}
+
+        timestamp = normalized.get('timestamp')
+        if isinstance(timestamp, (int, float)):
+            normalized['timestamp'] = datetime.fromtimestamp(timestamp, tz=timezone.utc).replace(tzinfo=None)
+        elif isinstance(timestamp, str):
+            try:
+                parsed = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+                if parsed.tzinfo:
+                    parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+                normalized['timestamp'] = parsed
+            except ValueError:
+                normalized['timestamp'] = None
+        if not normalized.get('timestamp'):
+            normalized['timestamp'] = datetime.utcnow()
+
+        return normalized
+
+    @staticmethod
+    def truncate_values(record: Dict[str, Any]) -> bool:
+        """
+        Cut string values down to their column's length in place
+
+        Returns:
+            True if any value was truncated
+        """
+        truncated = False
+        for column, length in COLUMN_LENGTHS.items():
+            value = record.get(column)
+            if isinstance(value, str) and len(value) > length:
+                record[column] = value[:length]
+                truncated = True
+        return truncated
+
+    @staticmethod
+    def enrich_batch(records: List[Dict[str, Any]], geolocate: bool = True) -> None:
+        """
+        Fill in browser, OS, device and location for a batch in place
+
+        User-Agent parsing is memoised per distinct string and geolocation
+        is done with one batched lookup per distinct IP address.
+
+        Args:
+            records: Normalized records
+            geolocate: Whether to resolve missing countries from IP addresses
+        """
+        for record in records:
+            if record.get('browser') and record.get('os') and record.get('device'):
+                continue
+            parsed = RequestProcessingService.parse_user_agent(record.get('user_agent'))
+            for key in ('browser', 'os', 'device'):
+                if not record.get(key):
+                    record[key] = parsed[key]
+
+        if not geolocate:
+            return
+
+        missing_ips = [
+            record.get('ip_address') for record in records
+            if GeolocationService.should_geolocate_ip(record.get('ip_address'), record.get('country'))
+        ]
+        if not missing_ips:
+            return
+
+        locations = GeolocationService.get_locations_for_ips(missing_ips)
+        for record in records:
+            location = locations.get(record.get('ip_address'))
+            if location and not record.get('country'):
+                record['country'] = location.get('country')
+                if not record.get('city'):
+                    record['city'] = location.get('city')
+
+    @staticmethod
+    def filter_bots(records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Flag or drop bot records according to BOT_FILTER_MODE
+
+        Imported records without a User-Agent are not treated as bots, since
+        exports often omit the column; records exported with is_bot set stay
+        flagged.
+
+        Args:
+            records: Normalized records
+
+        Returns:
+            Records to load; bot records are removed in 'drop' mode and have
+            is_bot set otherwise
+        """
+        mode = BotDetectionService.get_mode()
+        if mode == 'off':
+            return records
+
+        matcher = BotDetectionService.get_matcher()
+        kept = []
+        verdicts: Dict[Optional[str], int] = {}
+        for record in records:
+            reason = matcher.classify(record.get('user_agent'), record.get('ip_address'), require_user_agent=False)
+            verdicts[reason] = verdicts.get(reason, 0) + 1
+            record['is_bot'] = record.get('is_bot') or reason is not None
+            if not record['is_bot'] or mode != 'drop':
+                kept.append(record)
+
+        for reason, count in verdicts.items():
+            MetricsService.record_bot_verdict(reason, count)
+        return kept
+
+    @staticmethod
+    def sessionize_batch(records: List[Dict[str, Any]], tracker: Optional[SessionTracker]) -> None:
+        """
+        Split client sessions on inactivity, as live ingestion does
+
+        Records that already carry a client_session_id (e.g. re-imported
+        exports) are left as they are. Sessions are split correctly when each
+        client session's records appear in time order in the file.
+
+        Args:
+            records: Normalized records
+            tracker: Session tracker shared by the whole import, or None if
+                sessionization is disabled
+        """
+        for record in records:
+            if record.get('client_session_id') or not record.get('session_id'):
+                continue
+            record['client_session_id'] = record['session_id']
+            if tracker is not None:
+                record['session_id'] = tracker.assign(record['session_id'], record['timestamp'])
+
+    @staticmethod
+    def build_copy_buffer(table: str, records: List[Dict[str, Any]]) -> io.StringIO:
+        """
+        Serialize records to CSV suitable for COPY ... FROM STDIN
+
+        Args:
+            table: Target table name
+            records: Normalized, enriched records
+
+        Returns:
+            StringIO buffer positioned at the start
+        """
+        columns = TABLE_COLUMNS[table]
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+
+        for record in records:
+            row = []
+            for column in columns:
+                value = record.get(column)
+                if value is None:
+                    row.append(None)
+                elif column in BOOLEAN_COLUMNS:
+                    row.append('t' if value else 'f')
+                elif column == 'event_data':
+                    row.append(json.dumps(value))
+                elif column == 'timestamp':
+                    row.append(value.isoformat(sep=' '))
+                else:
+                    row.append(value)
+            writer.writerow(row)
+
+        buffer.seek(0)
+        return buffer
+
+    @staticmethod
+    def loadable_rows(table: str, records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Keep the records that have every column the table requires"""
+        required = REQUIRED_COLUMNS[table]
+        return [record for record in records if all(record.get(column) for column in required)]
+
+    @staticmethod
+    def copy_batch(connection, table: str, records: List[Dict[str, Any]]) -> int:
+        """
+        Load a batch of records into a table with COPY FROM STDIN
+
+        Args:
+            connection: Raw DBAPI (psycopg2) connection
+            table: Target table name
+            records: Normalized, enriched records with the required columns
+                (see loadable_rows)
+
+        Returns:
+            Number of rows copied
+        """
+        if not records:
+            return 0
+
+        buffer = BulkImportService.build_copy_buffer(table, records)
+        columns = ', '.join(TABLE_COLUMNS[table])
+        with connection.cursor() as cursor:
+            cursor.copy_expert(f"COPY {table} ({columns}) FROM STDIN WITH (FORMAT csv)", buffer)
+        return len(records)
+
+    @staticmethod
+    def import_file(
+        file_path: str,
+        file_format: Optional[str] = None,
+        targets: Iterable[str] = ('tracking_events', 'visits'),
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        geolocate: bool = True
+    ) -> Dict[str, int]:
+        """
+        Stream an NDJSON or CSV file into the database in COPY batches
+
+        Args:
+            file_path: Path to the input file
+            file_format: 'ndjson' or 'csv' (detected from extension if omitted)
+            targets: Tables to load into ('tracking_events' and/or 'visits')
+            batch_size: Number of records per COPY batch
+            geolocate: Whether to resolve missing countries from IP addresses
+
+        Returns:
+            Dictionary with read, bot, duplicate and invalid (skipped_invalid:
+            missing a required column) record counts, the number of records
+            with values truncated to their column's length, and rows loaded
+            per table
+        """
+        file_format = file_format or BulkImportService.detect_format(file_path)
+        with open(file_path, 'r', encoding='utf-8', newline='') as file_obj:
+            return BulkImportService.import_records(
+                BulkImportService.iter_records(file_obj, file_format),
+                targets=targets, batch_size=batch_size, geolocate=geolocate, source=file_path
+            )
+
+    @staticmethod
+    def import_records(
+        records: Iterable[Dict[str, Any]],
+        targets: Iterable[str] = ('tracking_events', 'visits'),
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        geolocate: bool = True,
+        source: str = 'records'
+    ) -> Dict[str, int]:
+        """
+        Load raw records into the database in COPY batches
+
+        Only one batch is held in memory at a time, so `records` can be a
+        generator of any length. Each batch is committed in its own
+        transaction, so an interrupted import keeps the batches that were
+        already loaded. Records whose client_event_id is already stored
+        (e.g. a re-run of an interrupted import) are skipped.
+
+        Args:
+            records: Raw records, as read from an import file
+            targets: Tables to load into ('tracking_events' and/or 'visits')
+            batch_size: Number of records per COPY batch
+            geolocate: Whether to resolve missing countries from IP addresses
+            source: Name of the input, for log messages
+
+        Returns:
+            Dictionary with read, bot, duplicate and invalid (skipped_invalid:
+            missing a required column) record counts, the number of records
+            with values truncated to their column's length, and rows loaded
+            per table
+        """
+        targets = list(targets)
+        for table in targets:
+            if table not in TABLE_COLUMNS:
+                raise ValueError(f"Unsupported import target '{table}'")
+
+        summary = {
+            'read': 0, 'batches': 0, 'bots': 0, 'duplicates': 0, 'skipped_invalid': 0, 'truncated': 0,
+            **{table: 0 for table in targets}
+        }
+
+        timeout = current_app.config.get('SESSION_INACTIVITY_TIMEOUT', 1800)
+        tracker = SessionTracker(
+            timedelta(seconds=timeout), current_app.config.get('SESSION_CACHE_SIZE', 100000)
+        ) if timeout else None
+
+        connection = db.engine.raw_connection()
+        try:
+            for batch in BulkImportService.iter_batches(records, batch_size):
+                normalized = [BulkImportService.normalize_record(record) for record in batch]
+                kept = BulkImportService.filter_bots(normalized)
+                summary['bots'] += len(normalized) - len(kept) + sum(1 for record in kept if record['is_bot'])
+                normalized = kept
+                BulkImportService.sessionize_batch(normalized, tracker)
+                BulkImportService.enrich_batch(normalized, geolocate=geolocate)
+                summary['truncated'] += sum(1 for record in normalized if BulkImportService.truncate_values(record))
+
+                # Records skipped by any target, counted once however many tables hold them
+                skipped = set()
+                invalid = set()
+                try:
+                    for table in targets:
+                        rows = DeduplicationService.filter_new(TABLE_MODELS[table], normalized)
+                        kept_ids = {id(row) for row in rows}
+                        skipped.update(id(record) for record in normalized if id(record) not in kept_ids)
+                        loadable = BulkImportService.loadable_rows(table, rows)
+                        loadable_ids = {id(row) for row in loadable}
+                        invalid.update(id(row) for row in rows if id(row) not in loadable_ids)
+                        summary[table] += BulkImportService.copy_batch(connection, table, loadable)
+                    connection.commit()
+                except Exception:
+                    connection.rollback()
+                    raise
+
+                summary['duplicates'] += len(skipped)
+                summary['skipped_invalid'] += len(invalid)
+                summary['read'] += len(batch)
+                summary['batches'] += 1
+                logger.info(
+                    f"Imported batch {summary['batches']} ({summary['read']} records read) from {source}"
+                )
+        finally:
+            connection.close()
+
+        logger.info(f"Bulk import of {source} finished: {summary}")
+        return summary
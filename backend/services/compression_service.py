@@ -0,0 +1,124 @@
+"""
+Compression service - negotiated gzip/Brotli compression of JSON responses
+"""
+from typing import Optional, Iterable, Iterator
+from flask import current_app, request
+import gzip
+import logging
+import zlib
+
+try:
+    import brotli
+except ImportError:  # Brotli is optional; gzip is always available
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# Dynamic responses are compressed per request, so favour speed over ratio
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 4
+
+COMPRESSIBLE_MIMETYPES = ('application/json',)
+
+
+class CompressionService:
+    """Service for compressing API responses according to Accept-Encoding"""
+
+    @staticmethod
+    def choose_encoding(accept_encodings) -> Optional[str]:
+        """
+        Pick the best content-coding the client accepts
+
+        Args:
+            accept_encodings: werkzeug Accept object from request.accept_encodings
+
+        Returns:
+            'br', 'gzip' or None
+        """
+        if brotli is not None and accept_encodings['br'] > 0:
+            return 'br'
+        if accept_encodings['gzip'] > 0:
+            return 'gzip'
+        return None
+
+    @staticmethod
+    def compress(data: bytes, encoding: str) -> bytes:
+        """Compress a complete body"""
+        if encoding == 'br':
+            return brotli.compress(data, quality=BROTLI_QUALITY)
+        return gzip.compress(data, compresslevel=GZIP_LEVEL)
+
+    @staticmethod
+    def compress_stream(chunks: Iterable, encoding: str) -> Iterator[bytes]:
+        """
+        Compress a streamed body chunk by chunk
+
+        Args:
+            chunks: Iterable of str or bytes chunks
+            encoding: 'br' or 'gzip'
+
+        Yields:
+            Compressed chunks
+        """
+        if encoding == 'br':
+            compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+            compress, finish = compressor.process, compressor.finish
+        else:
+            compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+            compress, finish = compressor.compress, compressor.flush
+
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            compressed = compress(chunk)
+            if compressed:
+                yield compressed
+        yield finish()
+
+    @staticmethod
+    def should_compress(response) -> bool:
+        """Check whether a response is a compressible JSON body"""
+        if response.status_code < 200 or response.status_code in (204, 206, 304):
+            return False
+        if response.mimetype not in COMPRESSIBLE_MIMETYPES or response.direct_passthrough:
+            return False
+        if 'Content-Encoding' in response.headers or 'no-transform' in response.headers.get('Cache-Control', ''):
+            return False
+        # Conditional responses (e.g. the tag snapshot) have ETags tied to the identity body
+        if 'ETag' in response.headers:
+            return False
+        return True
+
+    @staticmethod
+    def _after_request(response):
+        if not current_app.config.get('COMPRESSION_ENABLED', True):
+            return response
+        if not CompressionService.should_compress(response):
+            return response
+
+        response.vary.add('Accept-Encoding')
+        encoding = CompressionService.choose_encoding(request.accept_encodings)
+        if encoding is None:
+            return response
+
+        if response.is_streamed:
+            response.response = CompressionService.compress_stream(response.response, encoding)
+            response.headers.pop('Content-Length', None)
+        else:
+            data = response.get_data()
+            if len(data) < current_app.config.get('COMPRESSION_MIN_SIZE', 1024):
+                return response
+            response.set_data(CompressionService.compress(data, encoding))
+
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+    @staticmethod
+    def init_app(app) -> None:
+        """
+        Install the response compression hook
+
+        Args:
+            app: Flask application
+        """
+        app.after_request(CompressionService._after_request)
@@ -0,0 +1,124 @@
+"""
+Deduplication service - drops repeated deliveries of the same tracked event
+
+The tracker tags every event with a random client_event_id, so a beacon that
+is retried or sent by several unload handlers arrives with the same ID. Live
+ingestion checks the ID against an in-memory set of IDs seen within
+DEDUP_WINDOW_SECONDS; a unique index on client_event_id catches duplicates
+that reach another worker process or arrive after the window. Bulk paths
+look up a whole batch's IDs in one query instead.
+"""
+from typing import Optional, List, Dict, Any, Set, Iterable
+from flask import current_app
+from models.db_instance import db
+from services.metrics_service import MetricsService
+from utils.recent_keys import RecentKeySet
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# IDs per IN (...) lookup when checking a batch against a table
+LOOKUP_CHUNK_SIZE = 1000
+
+_window: Dict[str, Optional[RecentKeySet]] = {'instance': None}
+_window_lock = threading.Lock()
+
+
+class DeduplicationService:
+    """Service for idempotent ingestion keyed by client_event_id"""
+
+    @staticmethod
+    def get_window() -> RecentKeySet:
+        """Get the process-wide set of recently ingested event IDs, creating it from config on first use"""
+        if _window['instance'] is None:
+            with _window_lock:
+                if _window['instance'] is None:
+                    _window['instance'] = RecentKeySet(
+                        current_app.config.get('DEDUP_WINDOW_SECONDS', 600),
+                        current_app.config.get('DEDUP_CACHE_SIZE', 100000)
+                    )
+        return _window['instance']
+
+    @staticmethod
+    def claim(client_event_id: Optional[str]) -> bool:
+        """
+        Reserve an event ID for ingestion
+
+        Args:
+            client_event_id: ID sent by the tracker (may be None)
+
+        Returns:
+            False if the ID was ingested within the dedup window, True
+            otherwise (always True for events without an ID)
+        """
+        if not client_event_id:
+            return True
+        if DeduplicationService.get_window().add(client_event_id):
+            return True
+        MetricsService.record_duplicate('memory')
+        return False
+
+    @staticmethod
+    def release(client_event_id: Optional[str]) -> None:
+        """Forget a claimed ID whose event was not stored, so a retry is accepted"""
+        if client_event_id:
+            DeduplicationService.get_window().discard(client_event_id)
+
+    @staticmethod
+    def existing_ids(model, client_event_ids: Iterable[str], session=None) -> Set[str]:
+        """
+        Find which event IDs are already stored in a table
+
+        Args:
+            model: Model with a client_event_id column
+            client_event_ids: IDs to look up
+            session: SQLAlchemy session to query with (default: primary)
+
+        Returns:
+            Set of the IDs present in the table
+        """
+        session = session or db.session
+        ids = list(client_event_ids)
+        found: Set[str] = set()
+        for start in range(0, len(ids), LOOKUP_CHUNK_SIZE):
+            chunk = ids[start:start + LOOKUP_CHUNK_SIZE]
+            found.update(
+                row[0] for row in session.query(model.client_event_id).filter(model.client_event_id.in_(chunk))
+            )
+        return found
+
+    @staticmethod
+    def filter_new(model, records: List[Dict[str, Any]], session=None) -> List[Dict[str, Any]]:
+        """
+        Drop records whose client_event_id is already stored or repeats an
+        earlier record of the batch
+
+        Records without an ID are always kept. The table is queried once per
+        LOOKUP_CHUNK_SIZE IDs rather than once per record.
+
+        Args:
+            model: Model the records are about to be written to
+            records: Records with an optional 'client_event_id' key, in order
+            session: SQLAlchemy session to query with (default: primary)
+
+        Returns:
+            Records to write, in their original order
+        """
+        ids = {record['client_event_id'] for record in records if record.get('client_event_id')}
+        if not ids:
+            return records
+
+        seen = DeduplicationService.existing_ids(model, ids, session)
+        kept = []
+        for record in records:
+            client_event_id = record.get('client_event_id')
+            if client_event_id:
+                if client_event_id in seen:
+                    continue
+                seen.add(client_event_id)
+            kept.append(record)
+
+        if len(kept) < len(records):
+            MetricsService.record_duplicate('batch', len(records) - len(kept))
+        return kept
@@ -0,0 +1,222 @@
+"""
+Funnel service - ordered step conversion over tracking events
+
+Steps use the tag trigger syntax (see tag_matcher_service), so a step is an
+event name ('signup'), a page URL pattern ('/checkout/*', matched against page
+views), or a trigger object such as {"event": "purchase", "properties": {"plan": "pro"}}.
+
+A funnel is computed in one pass over events ordered by (session_id, timestamp);
+each session is scanned once regardless of the number of steps.
+"""
+from typing import Optional, List, Dict, Any, Union
+from datetime import datetime, timedelta
+from urllib.parse import urlsplit
+from sqlalchemy import and_, or_, false
+from models.database import get_read_session
+from models.db_models import TrackingEvent
+from services.base_service import BaseService
+from services.tag_matcher_service import TagMatcherService, CompiledTrigger, PAGE_VIEW_EVENT, ALL_PAGES_TRIGGER
+import itertools
+import json
+import logging
+import operator
+
+logger = logging.getLogger(__name__)
+
+# Rows fetched per round trip; rows are streamed, never loaded all at once
+FUNNEL_BATCH_SIZE = 5000
+
+
+class FunnelStep:
+    """A compiled funnel step"""
+
+    __slots__ = ('name', 'trigger')
+
+    def __init__(self, name: str, trigger: CompiledTrigger):
+        self.name = name
+        self.trigger = trigger
+
+    def matches(self, event: str, url: Optional[str], path: Optional[str], properties: Dict[str, Any]) -> bool:
+        return self.trigger.matches_event(event) and self.trigger.matches(url, path, properties)
+
+
+class FunnelService(BaseService):
+    """Service for funnel analysis over tracking events"""
+
+    @staticmethod
+    def compile_step(step: Union[str, Dict[str, Any]]) -> FunnelStep:
+        """
+        Compile one funnel step
+
+        Args:
+            step: Event name, page URL pattern (starting with '/' or containing
+                '://'), or trigger object with an optional 'name' label
+
+        Returns:
+            FunnelStep
+
+        Raises:
+            ValueError: If the step is malformed
+        """
+        if isinstance(step, str):
+            step = step.strip()
+            if not step:
+                raise ValueError('Funnel step must not be empty')
+            if step.startswith('/') or '://' in step:
+                spec = {'type': PAGE_VIEW_EVENT, 'url': step}
+            else:
+                spec = {'type': step}
+            return FunnelStep(step, TagMatcherService.compile_spec(spec))
+
+        if not isinstance(step, dict):
+            raise ValueError('Funnel step must be a string or an object')
+        spec = dict(step)
+        name = spec.pop('name', None) or json.dumps(spec, sort_keys=True)
+        return FunnelStep(str(name), TagMatcherService.compile_spec(spec))
+
+    @staticmethod
+    def _event_filter(steps: List[FunnelStep]):
+        """
+        Build a SQL filter that skips events no step can match
+
+        Returns:
+            Filter expression, or None if some step matches any event name
+        """
+        names = set()
+        for step in steps:
+            if step.trigger.events is None:
+                return None
+            names.update(step.trigger.events)
+
+        conditions = []
+        if PAGE_VIEW_EVENT in names or ALL_PAGES_TRIGGER in names:
+            conditions.append(or_(TrackingEvent.event_name.is_(None), TrackingEvent.event_name == ''))
+        custom_events = names - {PAGE_VIEW_EVENT, ALL_PAGES_TRIGGER}
+        if custom_events:
+            conditions.append(TrackingEvent.event_name.in_(sorted(custom_events)))
+        return or_(*conditions)
+
+    @staticmethod
+    def session_progress(steps: List[FunnelStep], events, window: timedelta) -> tuple:
+        """
+        Find how far one session got through the funnel
+
+        For each step the start time of the latest chain that reached it is
+        kept, so a later entry into step 1 can still complete the funnel
+        within the window when an earlier one expired. Steps are checked from
+        last to first so one event advances a chain by at most one step.
+
+        Args:
+            steps: Compiled steps
+            events: The session's (timestamp, event_name, page_url, event_data)
+                rows in timestamp order
+            window: Maximum time from step 1 to the last step
+
+        Returns:
+            Tuple of (steps reached, seconds from step 1 to each reached step)
+        """
+        step_count = len(steps)
+        starts: List[Optional[datetime]] = [None] * step_count
+        reached = 0
+        elapsed: List[float] = []
+
+        for timestamp, event_name, page_url, event_data in events:
+            event = event_name or PAGE_VIEW_EVENT
+            path = (urlsplit(page_url).path or '/') if page_url else None
+            properties = event_data if isinstance(event_data, dict) else {}
+
+            for index in range(min(reached, step_count - 1), -1, -1):
+                if not steps[index].matches(event, page_url, path, properties):
+                    continue
+                if index == 0:
+                    starts[0] = timestamp
+                elif starts[index - 1] is not None and timestamp - starts[index - 1] <= window:
+                    starts[index] = starts[index - 1]
+                else:
+                    continue
+                if index == reached:
+                    reached += 1
+                    elapsed.append((timestamp - starts[index]).total_seconds())
+
+            if reached == step_count:
+                break
+
+        return reached, elapsed
+
+    @staticmethod
+    def get_funnel(steps: List[Union[str, Dict[str, Any]]], window_seconds: int = 86400,
+                   start_date: Optional[datetime] = None, end_date: Optional[datetime] = None) -> Dict[str, Any]:
+        """
+        Compute per-step session counts and drop-off for an ordered funnel
+
+        Args:
+            steps: Ordered funnel steps (see compile_step)
+            window_seconds: Conversion window from step 1 to the last step
+            start_date: Start of the event range (default: 30 days before end_date)
+            end_date: End of the event range (default: now, UTC)
+
+        Returns:
+            Dictionary with per-step counts, conversion and drop-off rates
+
+        Raises:
+            ValueError: If a step is malformed
+        """
+        compiled = [FunnelService.compile_step(step) for step in steps]
+        window = timedelta(seconds=window_seconds)
+        end_date = end_date or datetime.utcnow()
+        start_date = start_date or end_date - timedelta(days=30)
+
+        session = get_read_session()
+        query = session.query(
+            TrackingEvent.session_id, TrackingEvent.timestamp, TrackingEvent.event_name,
+            TrackingEvent.page_url, TrackingEvent.event_data
+        ).filter(
+            and_(
+                TrackingEvent.timestamp >= start_date,
+                TrackingEvent.timestamp <= end_date,
+                TrackingEvent.is_bot == false()
+            )
+        )
+        event_filter = FunnelService._event_filter(compiled)
+        if event_filter is not None:
+            query = query.filter(event_filter)
+        rows = query.order_by(TrackingEvent.session_id, TrackingEvent.timestamp).yield_per(FUNNEL_BATCH_SIZE)
+
+        counts = [0] * len(compiled)
+        elapsed_totals = [0.0] * len(compiled)
+        sessions_scanned = 0
+        for _, session_rows in itertools.groupby(rows, key=operator.itemgetter(0)):
+            sessions_scanned += 1
+            reached, elapsed = FunnelService.session_progress(
+                compiled, (row[1:] for row in session_rows), window
+            )
+            for index in range(reached):
+                counts[index] += 1
+                elapsed_totals[index] += elapsed[index]
+
+        entered = counts[0]
+        step_results = []
+        for index, step in enumerate(compiled):
+            previous = counts[index - 1] if index else entered
+            step_results.append({
+                'step': index + 1,
+                'name': step.name,
+                'count': counts[index],
+                'conversion_rate': round(counts[index] / entered * 100, 2) if entered else 0.0,
+                'step_conversion_rate': round(counts[index] / previous * 100, 2) if previous else 0.0,
+                'drop_off': previous - counts[index],
+                'drop_off_rate': round((previous - counts[index]) / previous * 100, 2) if previous else 0.0,
+                'avg_seconds_from_start': (
+                    round(elapsed_totals[index] / counts[index], 2) if counts[index] else None
+                )
+            })
+
+        logger.info(f"Computed {len(compiled)}-step funnel over {sessions_scanned} sessions")
+        return {
+            'steps': step_results,
+            'sessions_scanned': sessions_scanned,
+            'overall_conversion_rate': step_results[-1]['conversion_rate'] if step_results else 0.0,
+            'window_seconds': window_seconds,
+            'start_date': start_date,
+            'end_date': end_date
+        }
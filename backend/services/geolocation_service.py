@@ -1,16 +1,63 @@
 """
 Geolocation service - business logic for IP-based geolocation
 """
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Iterable
+from collections import OrderedDict
+from services.metrics_service import MetricsService
 import requests
 import logging
+import threading
+import time
 
 logger = logging.getLogger(__name__)
 
+# ip-api.com accepts at most 100 queries per batch request
+BATCH_LOOKUP_SIZE = 100
+
+# Resolved locations are kept in a bounded LRU cache with a TTL
+CACHE_MAX_SIZE = 50000
+CACHE_TTL_SECONDS = 24 * 60 * 60
+
+_cache: "OrderedDict[str, tuple]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+EMPTY_LOCATION = {'country': None, 'city': None, 'region': None}
+
 
 class GeolocationService:
     """Service for IP geolocation operations"""
     
+    @staticmethod
+    def get_cached_location(ip_address: str) -> Optional[Dict[str, Optional[str]]]:
+        """
+        Get a previously resolved location from the cache
+        
+        Args:
+            ip_address: The IP address
+            
+        Returns:
+            Cached location or None if missing or expired
+        """
+        with _cache_lock:
+            entry = _cache.get(ip_address)
+            if entry is None:
+                return None
+            location, expires_at = entry
+            if expires_at < time.monotonic():
+                del _cache[ip_address]
+                return None
+            _cache.move_to_end(ip_address)
+            return location
+    
+    @staticmethod
+    def cache_location(ip_address: str, location: Dict[str, Optional[str]]) -> None:
+        """Store a resolved location, evicting the least recently used entry when full"""
+        with _cache_lock:
+            _cache[ip_address] = (location, time.monotonic() + CACHE_TTL_SECONDS)
+            _cache.move_to_end(ip_address)
+            while len(_cache) > CACHE_MAX_SIZE:
+                _cache.popitem(last=False)
+    
     @staticmethod
     def get_location_from_ip(ip_address: str) -> Dict[str, Optional[str]]:
         """
@@ -23,8 +70,14 @@ class GeolocationService:
             Dictionary with country, city, and region information
         """
         if not ip_address or ip_address == '127.0.0.1':
-            return {'country': None, 'city': None, 'region': None}
+            return dict(EMPTY_LOCATION)
+        
+        cached = GeolocationService.get_cached_location(ip_address)
+        MetricsService.record_geolocation_cache(hit=cached is not None)
+        if cached is not None:
+            return dict(cached)
             
+        started = time.perf_counter()
         try:
             response = requests.get(
                 f'http://ip-api.com/json/{ip_address}', 
@@ -33,17 +86,84 @@ class GeolocationService:
             
             if response.status_code == 200:
                 data = response.json()
+                location = dict(EMPTY_LOCATION)
                 if data.get('status') == 'success':
-                    return {
+                    location = {
                         'country': data.get('country'),
                         'city': data.get('city'),
                         'region': data.get('regionName')
                     }
+                GeolocationService.cache_location(ip_address, location)
+                return dict(location)
                     
         except Exception as e:
             logger.error(f"Error getting location for IP {ip_address}: {e}")
+        finally:
+            MetricsService.record_geolocation_call(time.perf_counter() - started, 'single')
+        
+        return dict(EMPTY_LOCATION)
+    
+    @staticmethod
+    def get_locations_for_ips(ip_addresses: Iterable[str]) -> Dict[str, Dict[str, Optional[str]]]:
+        """
+        Geolocate many IP addresses using the batch endpoint
+        
+        Each distinct address is looked up once, in chunks of up to
+        BATCH_LOOKUP_SIZE addresses per HTTP request.
+        
+        Args:
+            ip_addresses: IP addresses to geolocate (duplicates are ignored)
+            
+        Returns:
+            Dictionary mapping each IP address to its location information
+        """
+        unique_ips = [
+            ip for ip in dict.fromkeys(ip_addresses)
+            if GeolocationService.should_geolocate_ip(ip)
+        ]
+        locations = {}
+        
+        uncached_ips = []
+        for ip in unique_ips:
+            cached = GeolocationService.get_cached_location(ip)
+            if cached is not None:
+                locations[ip] = dict(cached)
+            else:
+                uncached_ips.append(ip)
+        MetricsService.record_geolocation_cache(hit=True, count=len(unique_ips) - len(uncached_ips))
+        MetricsService.record_geolocation_cache(hit=False, count=len(uncached_ips))
+        
+        for start in range(0, len(uncached_ips), BATCH_LOOKUP_SIZE):
+            chunk = uncached_ips[start:start + BATCH_LOOKUP_SIZE]
+            started = time.perf_counter()
+            try:
+                response = requests.post(
+                    'http://ip-api.com/batch',
+                    json=[{'query': ip, 'fields': 'status,country,city,regionName,query'} for ip in chunk],
+                    timeout=10
+                )
+                
+                if response.status_code == 200:
+                    for data in response.json():
+                        location = dict(EMPTY_LOCATION)
+                        if data.get('status') == 'success':
+                            location = {
+                                'country': data.get('country'),
+                                'city': data.get('city'),
+                                'region': data.get('regionName')
+                            }
+                        GeolocationService.cache_location(data.get('query'), location)
+                        locations[data.get('query')] = dict(location)
+                            
+            except Exception as e:
+                logger.error(f"Error getting locations for {len(chunk)} IPs: {e}")
+            finally:
+                MetricsService.record_geolocation_call(time.perf_counter() - started, 'batch')
+        
+        for ip in unique_ips:
+            locations.setdefault(ip, dict(EMPTY_LOCATION))
         
-        return {'country': None, 'city': None, 'region': None}
+        return locations
     
     @staticmethod
     def should_geolocate_ip(ip_address: str, provided_country: Optional[str] = None) -> bool:
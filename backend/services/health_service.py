@@ -0,0 +1,92 @@
+"""
+Health service - business logic for service health checks
+"""
+from typing import Dict, Any
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import text
+from models.db_instance import db
+from models.database import REPLICA_BIND
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class HealthService:
+    """Service for health check operations"""
+
+    @staticmethod
+    def get_pool_status(engine) -> Dict[str, Any]:
+        """
+        Get connection pool usage for an engine
+
+        Args:
+            engine: SQLAlchemy engine
+
+        Returns:
+            Dictionary with pool size and checked-in/checked-out counts
+        """
+        pool = engine.pool
+
+        # Not every pool implementation (e.g. NullPool, StaticPool) tracks usage
+        def read(name):
+            getter = getattr(pool, name, None)
+            return getter() if callable(getter) else None
+
+        return {
+            'pool_class': type(pool).__name__,
+            'size': read('size'),
+            'checked_in': read('checkedin'),
+            'checked_out': read('checkedout'),
+            'overflow': read('overflow')
+        }
+
+    @staticmethod
+    def check_database(engine) -> Dict[str, Any]:
+        """
+        Run a round trip against the database and measure its latency
+
+        Args:
+            engine: SQLAlchemy engine
+
+        Returns:
+            Dictionary with status, latency in milliseconds and error (if any)
+        """
+        started = time.perf_counter()
+        try:
+            with engine.connect() as connection:
+                connection.execute(text('SELECT 1'))
+            latency_ms = (time.perf_counter() - started) * 1000
+            return {'status': 'healthy', 'latency_ms': round(latency_ms, 2), 'error': None}
+        except Exception as e:
+            logger.error(f"Database health check failed: {str(e)}")
+            latency_ms = (time.perf_counter() - started) * 1000
+            return {'status': 'unhealthy', 'latency_ms': round(latency_ms, 2), 'error': str(e)}
+
+    @staticmethod
+    def get_health() -> Dict[str, Any]:
+        """
+        Get overall service health including database and pool status
+
+        Returns:
+            Health report dictionary
+        """
+        database = HealthService.check_database(db.engine)
+        database['pool'] = HealthService.get_pool_status(db.engine)
+
+        health = {
+            'status': database['status'],
+            'timestamp': datetime.utcnow().isoformat(),
+            'database': database
+        }
+
+        # The replica is reported but does not affect overall status,
+        # since reads fall back to the primary when it is down
+        if REPLICA_BIND in current_app.config.get('SQLALCHEMY_BINDS', {}):
+            replica_engine = db.engines[REPLICA_BIND]
+            replica = HealthService.check_database(replica_engine)
+            replica['pool'] = HealthService.get_pool_status(replica_engine)
+            health['replica'] = replica
+
+        return health
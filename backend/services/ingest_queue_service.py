@@ -0,0 +1,165 @@
+"""
+Ingest queue service - hands tracked events from the API to ingest workers
+
+With INGEST_MODE=queue, /api/track only validates the request and appends it
+with its metadata to a local segmented queue (utils/spool.py); enrichment
+and batched database writes run in separate ingest worker processes
+(`python -m ingest_worker`), so they no longer share CPU and the GIL with the
+API workers serving dashboards.
+
+Each API process writes to its own directory under INGEST_QUEUE_DIR and
+closes its segment at least every INGEST_QUEUE_MAX_DELAY seconds. Workers
+drain closed segments in order, one worker per directory at a time, and
+remove the directories of API processes that have exited once drained.
+"""
+from typing import Optional, List, Dict, Any, Callable
+from datetime import datetime
+from flask import current_app
+from services.metrics_service import MetricsService
+from utils.spool import SegmentedSpool, lock_file
+import logging
+import os
+import shutil
+import threading
+import uuid
+
+logger = logging.getLogger(__name__)
+
+PRODUCER_DIR_PREFIX = 'producer-'
+# A producer directory is created under this prefix and renamed once locked
+STAGING_DIR_PREFIX = '.new-'
+# Held by the worker draining a producer directory
+READER_LOCK_FILE = '.reader.lock'
+
+INGEST_MODES = ('direct', 'queue')
+
+_producer: Dict[str, Optional[SegmentedSpool]] = {'instance': None}
+_producer_lock = threading.Lock()
+
+
+class IngestQueueService:
+    """Service for queueing tracked events for out-of-process ingestion"""
+
+    @staticmethod
+    def init_app(app) -> None:
+        """
+        Check INGEST_MODE once at startup
+
+        Args:
+            app: Flask application
+
+        Raises:
+            ValueError: If INGEST_MODE is not one of INGEST_MODES
+        """
+        mode = app.config.get('INGEST_MODE', 'direct')
+        if mode not in INGEST_MODES:
+            raise ValueError(f"Unknown ingest mode '{mode}' in INGEST_MODE")
+
+    @staticmethod
+    def is_enabled() -> bool:
+        """Whether /api/track only enqueues events (INGEST_MODE=queue)"""
+        return current_app.config.get('INGEST_MODE', 'direct') == 'queue'
+
+    @staticmethod
+    def get_producer() -> SegmentedSpool:
+        """Get this process's queue, creating and locking its directory on first use"""
+        if _producer['instance'] is None:
+            with _producer_lock:
+                if _producer['instance'] is None:
+                    # Unique per process start, as PIDs are reused across container restarts
+                    name = f"{PRODUCER_DIR_PREFIX}{os.getpid()}-{uuid.uuid4().hex[:8]}"
+                    root = current_app.config['INGEST_QUEUE_DIR']
+                    # Created and locked under a name workers do not scan, so none can
+                    # mistake the new, not yet locked directory for an exited process's
+                    producer = SegmentedSpool(
+                        os.path.join(root, f"{STAGING_DIR_PREFIX}{name}"),
+                        segment_bytes=current_app.config.get('SPOOL_SEGMENT_BYTES', 16 * 1024 * 1024),
+                        fsync_interval=current_app.config.get('SPOOL_FSYNC_INTERVAL', 0.2),
+                        max_segment_age=current_app.config.get('INGEST_QUEUE_MAX_DELAY', 1.0)
+                    )
+                    if not producer.acquire():
+                        raise RuntimeError(f"Ingest queue directory {producer.directory} is locked by another process")
+                    producer.move(os.path.join(root, name))
+                    _producer['instance'] = producer
+        return _producer['instance']
+
+    @staticmethod
+    def enqueue(data: Dict[str, Any], request_metadata: Dict[str, Any], received_at: datetime) -> None:
+        """
+        Queue one /api/track request for an ingest worker
+
+        Args:
+            data: Validated request data
+            request_metadata: Request metadata (IP, user agent, etc.)
+            received_at: Time the request was received (naive UTC), used
+                as the event timestamp
+        """
+        IngestQueueService.get_producer().append({
+            'data': data,
+            'metadata': request_metadata,
+            'received_at': received_at.isoformat(),
+        })
+        MetricsService.record_queue('enqueued')
+
+    @staticmethod
+    def _producer_directories() -> List[str]:
+        root = current_app.config['INGEST_QUEUE_DIR']
+        if not os.path.isdir(root):
+            return []
+        return sorted(
+            os.path.join(root, name) for name in os.listdir(root) if name.startswith(PRODUCER_DIR_PREFIX)
+        )
+
+    @staticmethod
+    def consume(handler: Callable[[List[Dict[str, Any]]], Any], batch_size: int = 1000) -> int:
+        """
+        Hand every closed queue segment to `handler`, in batches
+
+        Directories another worker is draining are skipped. A batch is
+        removed from the queue once `handler` returns; if it raises, the
+        error propagates and the batch is handed over again by the next call.
+
+        Args:
+            handler: Callable taking a list of queued records, each with
+                'data', 'metadata' and 'received_at' (datetime)
+            batch_size: Maximum records per handler call
+
+        Returns:
+            Number of records consumed
+
+        Raises:
+            RuntimeError: Without fcntl, since live and exited API processes
+                cannot be told apart
+        """
+        if not SegmentedSpool.supports_locking:
+            raise RuntimeError('The ingest queue needs fcntl file locking')
+
+        def decode(records: List[Dict[str, Any]]) -> None:
+            for record in records:
+                record['received_at'] = datetime.fromisoformat(record['received_at'])
+            handler(records)
+            MetricsService.record_queue('consumed', len(records))
+
+        consumed = 0
+        for directory in IngestQueueService._producer_directories():
+            try:
+                reader_lock = lock_file(os.path.join(directory, READER_LOCK_FILE))
+            except FileNotFoundError:
+                continue  # Removed by another worker meanwhile
+            if reader_lock is None:
+                continue  # Another worker is draining it
+            try:
+                queue = SegmentedSpool(directory)
+                # Getting the owner lock means the API process has exited
+                exited = queue.acquire()
+                try:
+                    consumed += queue.drain(decode, batch_size, rotate=exited)
+                finally:
+                    if exited:
+                        queue.release()
+                if exited:
+                    shutil.rmtree(directory, ignore_errors=True)
+                    logger.info(f"Drained and removed the ingest queue of exited process {directory}")
+            finally:
+                reader_lock.close()
+        return consumed
@@ -0,0 +1,570 @@
+"""
+Ingestion service - single validation/enrichment pass for tracked events,
+written to every configured sink in one transaction
+"""
+from typing import Optional, List, Dict, Any
+from datetime import datetime
+from flask import current_app
+from pydantic import ValidationError
+from sqlalchemy import insert, text
+from sqlalchemy.exc import IntegrityError
+from models.database import DATABASE_UNAVAILABLE_ERRORS
+from models.db_instance import db
+from models.db_models import Visit, TrackingEvent
+from schemas.visit_schemas import VisitRequest
+from services.base_service import BaseService
+from services.bot_detection_service import BotDetectionService
+from services.deduplication_service import DeduplicationService
+from services.geolocation_service import GeolocationService
+from services.ingest_queue_service import IngestQueueService
+from services.metrics_service import MetricsService
+from services.request_processing_service import RequestProcessingService
+from services.realtime_service import RealtimeService
+from services.sessionization_service import SessionizationService, MAX_CLIENT_ID_LENGTH
+from services.spool_service import SpoolService
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Enriched event keys, shared by every sink
+EVENT_FIELDS = (
+    'session_id', 'client_session_id', 'client_event_id', 'page_url', 'ip_address', 'user_agent',
+    'referrer', 'browser', 'os', 'device', 'country', 'city', 'is_entry_page', 'is_exit_page',
+    'event_name', 'event_data', 'is_bot', 'timestamp'
+)
+
+
+class IngestionSink:
+    """
+    Destination for enriched events
+
+    Subclasses map each event to one row of `model`; rows from all sinks are
+    committed together, so a sink must not commit on its own.
+    """
+
+    name: str = ''
+    # Key under which the created row id is reported to the caller
+    result_key: str = ''
+    model = None
+
+    def accepts(self, event: Dict[str, Any]) -> bool:
+        """Whether this sink stores the event"""
+        return True
+
+    def row(self, event: Dict[str, Any]) -> Dict[str, Any]:
+        """Column values for an event"""
+        return {field: event[field] for field in EVENT_FIELDS}
+
+    def clears_exit_page(self, event: Dict[str, Any]) -> bool:
+        """Whether the event makes earlier rows of its session no longer the exit page"""
+        return False
+
+    def build(self, event: Dict[str, Any]):
+        """Create the (unsaved) row for an event"""
+        return self.model(**self.row(event))
+
+    def before_commit(self, record, event: Dict[str, Any]) -> None:
+        """Run extra statements in the ingest transaction once the row has an id"""
+        if self.clears_exit_page(event):
+            self.model.query.filter(
+                self.model.session_id == event['session_id'],
+                self.model.id != record.id
+            ).update({'is_exit_page': False}, synchronize_session=False)
+
+    def store_batch(self, events: List[Dict[str, Any]]) -> List[int]:
+        """
+        Insert many events with one multi-row INSERT
+
+        Exit-page flags end up as if the events had been stored one by one:
+        a row loses the flag when a later event of its session clears it,
+        which for rows already stored takes one UPDATE per batch.
+
+        Returns:
+            Ids of the new rows, in the order of `events`
+        """
+        last_clearing: Dict[Any, int] = {}
+        for index, event in enumerate(events):
+            if self.clears_exit_page(event):
+                last_clearing[event['session_id']] = index
+
+        if last_clearing:
+            self.model.query.filter(
+                self.model.session_id.in_(list(last_clearing))
+            ).update({'is_exit_page': False}, synchronize_session=False)
+
+        rows = []
+        for index, event in enumerate(events):
+            row = self.row(event)
+            if last_clearing.get(event['session_id'], -1) > index:
+                row['is_exit_page'] = False
+            rows.append(row)
+        if not rows:
+            return []
+        return list(db.session.scalars(
+            insert(self.model).returning(self.model.id, sort_by_parameter_order=True), rows
+        ))
+
+    def after_commit(self, record, event: Dict[str, Any]) -> None:
+        """React to a committed row, e.g. feed in-memory aggregates"""
+
+
+class VisitSink(IngestionSink):
+    """Writes events to the visits table"""
+
+    name = 'visits'
+    result_key = 'visit_id'
+    model = Visit
+
+    def row(self, event: Dict[str, Any]) -> Dict[str, Any]:
+        return {field: event[field] for field in EVENT_FIELDS if field != 'city'}
+
+    def clears_exit_page(self, event: Dict[str, Any]) -> bool:
+        # Only page visits (not custom events) move the session's exit page
+        return bool(event['session_id']) and not event['event_name']
+
+    def after_commit(self, record: Visit, event: Dict[str, Any]) -> None:
+        if event['is_bot']:
+            return
+        RealtimeService.record_visit(record.to_dict(), record.timestamp)
+
+
+class TrackingEventSink(IngestionSink):
+    """Writes events to the tracking_events table"""
+
+    name = 'tracking_events'
+    result_key = 'event_id'
+    model = TrackingEvent
+
+    def accepts(self, event: Dict[str, Any]) -> bool:
+        # tracking_events.session_id is NOT NULL
+        return bool(event['session_id'])
+
+    def clears_exit_page(self, event: Dict[str, Any]) -> bool:
+        return not event['is_exit_page']
+
+    def after_commit(self, record: TrackingEvent, event: Dict[str, Any]) -> None:
+        if event['is_bot']:
+            return
+        RealtimeService.record_tracking_event(record.to_dict(), record.timestamp)
+
+
+# Sinks available to INGESTION_SINKS, by name
+_sinks: Dict[str, IngestionSink] = {}
+
+
+class IngestionService(BaseService):
+    """Service for ingesting tracked page views and custom events"""
+
+    @staticmethod
+    def register_sink(sink: IngestionSink) -> None:
+        """
+        Make a sink available to the INGESTION_SINKS setting
+
+        Args:
+            sink: Sink instance; replaces any sink with the same name
+        """
+        _sinks[sink.name] = sink
+
+    @staticmethod
+    def init_app(app) -> None:
+        """
+        Check INGESTION_SINKS once at startup, after the sinks are registered
+
+        Args:
+            app: Flask application
+
+        Raises:
+            ValueError: If a configured sink is not registered
+        """
+        for name in app.config['INGESTION_SINKS']:
+            if name not in _sinks:
+                raise ValueError(f"Unknown ingestion sink '{name}' in INGESTION_SINKS")
+
+    @staticmethod
+    def get_sinks() -> List[IngestionSink]:
+        """
+        Get the sinks enabled by INGESTION_SINKS, in configured order
+
+        Returns:
+            List of sink instances
+        """
+        return [_sinks[name] for name in current_app.config['INGESTION_SINKS']]
+
+    @staticmethod
+    def enrich(tracking_data: Dict[str, Any], request_metadata: Dict[str, Any],
+               is_bot: bool = False, timestamp: Optional[datetime] = None) -> Dict[str, Any]:
+        """
+        Build the enriched event from validated request data, once for all sinks
+
+        Bot events are neither geolocated nor sessionized, so they cost no
+        geolocation calls or session cache entries.
+
+        Args:
+            tracking_data: Validated tracking data from request
+            request_metadata: Request metadata (IP, user agent, etc.)
+            is_bot: Whether the bot filter matched the event
+            timestamp: Time the event was received (default: now, UTC)
+
+        Returns:
+            Event dictionary with every key of EVENT_FIELDS
+        """
+        ip_address = request_metadata.get('ip_address')
+
+        referrer = RequestProcessingService.resolve_referrer(
+            tracking_data.get('referrer'),
+            request_metadata.get('referer_header')
+        )
+
+        country = tracking_data.get('country')
+        city = tracking_data.get('city')
+        if not is_bot and GeolocationService.should_geolocate_ip(ip_address, country):
+            location_data = GeolocationService.get_location_from_ip(ip_address)
+            country = location_data.get('country')
+            city = city or location_data.get('city')
+
+        # One timestamp so every sink's row agrees
+        timestamp = timestamp or datetime.utcnow()
+        client_session_id = tracking_data.get('session_id')
+        if is_bot:
+            session_id = client_session_id[:MAX_CLIENT_ID_LENGTH] if client_session_id else None
+        else:
+            session_id = SessionizationService.assign_session(client_session_id, timestamp)
+
+        return {
+            'session_id': session_id,
+            'client_session_id': client_session_id,
+            'client_event_id': tracking_data.get('client_event_id'),
+            'page_url': tracking_data.get('page_url'),
+            'ip_address': ip_address,
+            'user_agent': request_metadata.get('user_agent'),
+            'referrer': referrer,
+            'browser': tracking_data.get('browser'),
+            'os': tracking_data.get('os'),
+            'device': tracking_data.get('device'),
+            'country': country,
+            'city': city,
+            'is_entry_page': bool(tracking_data.get('is_entry_page', False)),
+            'is_exit_page': bool(tracking_data.get('is_exit_page', False)),
+            'event_name': tracking_data.get('event_name'),
+            'event_data': tracking_data.get('event_data'),
+            'is_bot': is_bot,
+            'timestamp': timestamp
+        }
+
+    @staticmethod
+    def store(event: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Write an enriched event to every enabled sink in a single transaction
+
+        Args:
+            event: Enriched event from enrich()
+
+        Returns:
+            Dictionary with each sink's result_key mapped to the new row id
+            (None if the sink skipped the event), the derived session_id, the
+            event timestamp, whether it was flagged as a bot and whether it
+            was a duplicate caught by the unique client_event_id index
+        """
+        sinks = [(sink, sink.build(event)) for sink in IngestionService.get_sinks() if sink.accepts(event)]
+
+        try:
+            IngestionService._set_statement_timeout()
+            for _, record in sinks:
+                db.session.add(record)
+            db.session.flush()
+
+            for sink, record in sinks:
+                sink.before_commit(record, event)
+
+            IngestionService.commit_changes()
+        except IntegrityError as e:
+            if not event['client_event_id']:
+                IngestionService.handle_db_error("store", e)
+            # Stored earlier by another worker, or before the dedup window
+            db.session.rollback()
+            MetricsService.record_duplicate('database')
+            return IngestionService._skipped_result(duplicate=True)
+        except Exception as e:
+            IngestionService.handle_db_error("store", e)
+
+        for sink, record in sinks:
+            try:
+                sink.after_commit(record, event)
+            except Exception as e:
+                logger.error(f"Error in {sink.name} sink after commit: {str(e)}")
+
+        result = {sink.result_key: None for sink in IngestionService.get_sinks()}
+        result.update({sink.result_key: record.id for sink, record in sinks})
+        result['session_id'] = event['session_id']
+        result['timestamp'] = event['timestamp']
+        result['is_bot'] = event['is_bot']
+        result['duplicate'] = False
+        result['queued'] = False
+        return result
+
+    @staticmethod
+    def _set_statement_timeout() -> None:
+        """Bound the ingest transaction's statements so a slow database fails fast and events are spooled"""
+        timeout = current_app.config.get('INGEST_STATEMENT_TIMEOUT_MS', 0)
+        if timeout and db.engine.dialect.name == 'postgresql':
+            db.session.execute(text(f"SET LOCAL statement_timeout = {int(timeout)}"))
+
+    @staticmethod
+    def store_batch(events: List[Dict[str, Any]]) -> Dict[str, int]:
+        """
+        Write many enriched events to every enabled sink in a single transaction
+
+        Used to replay spooled events and by ingest workers. Events whose
+        client_event_id is already stored are skipped, so replaying a batch
+        twice is harmless. Replayed events still inside the realtime window
+        are passed to each sink's after_commit, so the realtime view does not
+        miss the events of a short outage (with INGEST_MODE=queue the API
+        processes follow the database instead).
+
+        Args:
+            events: Enriched events in arrival order
+
+        Returns:
+            Dictionary with the number of rows written per sink name
+        """
+        stored = {}
+        written = []
+        try:
+            for sink in IngestionService.get_sinks():
+                new_events = DeduplicationService.filter_new(
+                    sink.model, [event for event in events if sink.accepts(event)]
+                )
+                written.append((sink, new_events, sink.store_batch(new_events)))
+                stored[sink.name] = len(new_events)
+            IngestionService.commit_changes()
+        except Exception as e:
+            IngestionService.handle_db_error("store_batch", e)
+
+        if current_app.config.get('INGEST_MODE') == 'queue':
+            # API processes feed their windows by following the database
+            return stored
+        for sink, new_events, ids in written:
+            for event, row_id in zip(new_events, ids):
+                if not RealtimeService.in_window(event['timestamp']):
+                    continue
+                try:
+                    record = sink.build(event)
+                    record.id = row_id
+                    sink.after_commit(record, event)
+                except Exception as e:
+                    logger.error(f"Error in {sink.name} sink after commit: {str(e)}")
+        return stored
+
+    @staticmethod
+    def enqueue(data: Dict[str, Any], request_metadata: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Queue a validated /api/track request for an ingest worker (INGEST_MODE=queue)
+
+        Args:
+            data: Validated request data (VisitRequest.model_dump()); the
+                worker validates it again before storing
+            request_metadata: Request metadata (IP, user agent, etc.)
+
+        Returns:
+            Result in the shape of ingest(), with 'queued' set
+        """
+        received_at = datetime.utcnow()
+        IngestQueueService.enqueue(data, request_metadata, received_at)
+        return IngestionService._skipped_result(timestamp=received_at, dropped=False, queued=True)
+
+    @staticmethod
+    def ingest_batch(records: List[Dict[str, Any]]) -> Dict[str, int]:
+        """
+        Validate, enrich and store a batch of queued requests (see IngestQueueService)
+
+        Invalid requests, repeated deliveries and, with BOT_FILTER_MODE=drop,
+        bot events are skipped; the rest are written with store_batch(). If
+        the batch fails for a reason other than the database being
+        unavailable, its events are stored one by one, so a single bad event
+        cannot block the queue.
+
+        Args:
+            records: Queued records with 'data', 'metadata' and 'received_at'
+
+        Returns:
+            Dictionary with the number of events stored, invalid, duplicate
+            and dropped as bot traffic
+
+        Raises:
+            Exception: One of DATABASE_UNAVAILABLE_ERRORS; the batch can be
+                retried as a whole
+        """
+        summary = {'stored': 0, 'invalid': 0, 'duplicates': 0, 'dropped': 0}
+        events = []
+        for record in records:
+            try:
+                tracking_data = VisitRequest(**record['data']).model_dump()
+            except (ValidationError, TypeError) as e:
+                logger.warning(f"Discarding invalid queued event: {str(e)}")
+                summary['invalid'] += 1
+                continue
+            request_metadata = record['metadata']
+            if not DeduplicationService.claim(tracking_data.get('client_event_id')):
+                summary['duplicates'] += 1
+                continue
+            bot_reason = BotDetectionService.classify(
+                request_metadata.get('user_agent'), request_metadata.get('ip_address')
+            )
+            if bot_reason and BotDetectionService.get_mode() == 'drop':
+                summary['dropped'] += 1
+                continue
+            events.append(IngestionService.enrich(
+                tracking_data, request_metadata, is_bot=bot_reason is not None, timestamp=record['received_at']
+            ))
+
+        try:
+            try:
+                IngestionService.store_batch(events)
+                summary['stored'] = len(events)
+            except DATABASE_UNAVAILABLE_ERRORS:
+                raise
+            except Exception as e:
+                logger.warning(f"Batch of {len(events)} queued events failed, storing them one by one: {str(e)}")
+                for key, count in IngestionService._store_one_by_one(events, 'queued').items():
+                    # Events the database rejects count as invalid
+                    summary['invalid' if key == 'discarded' else key] += count
+        except DATABASE_UNAVAILABLE_ERRORS:
+            # Let the retried batch through the dedup window
+            for event in events:
+                DeduplicationService.release(event['client_event_id'])
+            raise
+        return summary
+
+    @staticmethod
+    def _store_one_by_one(events: List[Dict[str, Any]], label: str) -> Dict[str, int]:
+        """
+        Store events individually after their batch failed, discarding the
+        ones that cannot be stored (e.g. a value too long for its column)
+
+        Args:
+            events: Enriched events
+            label: Where the events came from, for log messages
+
+        Returns:
+            Dictionary with the number of events stored, duplicate and discarded
+
+        Raises:
+            Exception: One of DATABASE_UNAVAILABLE_ERRORS, which is not the
+                events' fault
+        """
+        summary = {'stored': 0, 'duplicates': 0, 'discarded': 0}
+        for event in events:
+            try:
+                result = IngestionService.store(event)
+            except DATABASE_UNAVAILABLE_ERRORS:
+                raise
+            except Exception as e:
+                logger.error(f"Discarding {label} event that cannot be stored: {str(e)}")
+                summary['discarded'] += 1
+                continue
+            summary['duplicates' if result['duplicate'] else 'stored'] += 1
+        return summary
+
+    @staticmethod
+    def replay_batch(events: List[Dict[str, Any]]) -> None:
+        """
+        Store a batch of spooled events (the SpoolService replay handler)
+
+        The batch is written with store_batch(); if that fails for a reason
+        other than the database being unavailable, the events are stored one
+        by one and those that still fail are discarded, so a single bad event
+        cannot block the spool.
+
+        Args:
+            events: Enriched events in arrival order
+
+        Raises:
+            Exception: One of DATABASE_UNAVAILABLE_ERRORS; the batch stays
+                spooled and is retried as a whole
+        """
+        try:
+            IngestionService.store_batch(events)
+            return
+        except DATABASE_UNAVAILABLE_ERRORS:
+            raise
+        except Exception as e:
+            logger.warning(f"Batch of {len(events)} spooled events failed, storing them one by one: {str(e)}")
+        discarded = IngestionService._store_one_by_one(events, 'spooled')['discarded']
+        if discarded:
+            MetricsService.record_spool('discarded', discarded)
+
+    @staticmethod
+    def spool(event: Dict[str, Any]) -> Dict[str, Any]:
+        """Queue an enriched event in the local spool, to be stored once the database is available"""
+        SpoolService.append(event)
+        return IngestionService._skipped_result(
+            session_id=event['session_id'], timestamp=event['timestamp'], is_bot=event['is_bot'], queued=True
+        )
+
+    @staticmethod
+    def _skipped_result(**flags) -> Dict[str, Any]:
+        """Result for an event that was not stored, with no row ids set"""
+        result: Dict[str, Any] = {sink.result_key: None for sink in IngestionService.get_sinks()}
+        result.update({
+            'session_id': None, 'timestamp': datetime.utcnow(), 'is_bot': False, 'duplicate': False, 'queued': False
+        })
+        result.update(flags)
+        return result
+
+    @staticmethod
+    def ingest(tracking_data: Dict[str, Any], request_metadata: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Enrich and store one tracked page view or custom event
+
+        Repeated deliveries of an event (same client_event_id) and, with
+        BOT_FILTER_MODE=drop, bot events are discarded before any enrichment
+        or database work. If the database is unavailable the event is spooled
+        (see SpoolService) and 'queued' is set in the result.
+
+        Args:
+            tracking_data: Validated tracking data from request
+            request_metadata: Request metadata (IP, user agent, etc.)
+
+        Returns:
+            Result of store(), plus 'dropped' (True if the event was discarded
+            as bot traffic). No row ids are set for dropped or duplicate events
+        """
+        client_event_id = tracking_data.get('client_event_id')
+        if not DeduplicationService.claim(client_event_id):
+            return IngestionService._skipped_result(dropped=False, duplicate=True)
+
+        try:
+            bot_reason = BotDetectionService.classify(
+                request_metadata.get('user_agent'), request_metadata.get('ip_address')
+            )
+            if bot_reason and BotDetectionService.get_mode() == 'drop':
+                return IngestionService._skipped_result(is_bot=True, dropped=True)
+
+            event = IngestionService.enrich(tracking_data, request_metadata, is_bot=bot_reason is not None)
+            spool_enabled = SpoolService.is_enabled()
+            if spool_enabled and SpoolService.is_engaged():
+                result = IngestionService.spool(event)
+            else:
+                try:
+                    result = IngestionService.store(event)
+                except DATABASE_UNAVAILABLE_ERRORS as e:
+                    if not spool_enabled:
+                        raise
+                    SpoolService.trip(e)
+                    result = IngestionService.spool(event)
+        except Exception:
+            # Let a retry of the failed event through
+            DeduplicationService.release(client_event_id)
+            raise
+
+        result['dropped'] = False
+        if result['queued']:
+            logger.info(f"Spooled event for session {event['session_id']} until the database is available")
+        elif not result['duplicate']:
+            logger.info(f"Ingested event for session {event['session_id']} into {', '.join(current_app.config['INGESTION_SINKS'])}")
+        return result
+
+
+IngestionService.register_sink(VisitSink())
+IngestionService.register_sink(TrackingEventSink())
+SpoolService.set_replay_handler(IngestionService.replay_batch)
@@ -0,0 +1,282 @@
+"""
+Metrics service - in-process request, database and enrichment metrics
+exposed in the Prometheus text exposition format
+"""
+from typing import Optional, Dict, Any, Callable, Sequence, Tuple
+from bisect import bisect_left
+from flask import g, request, has_request_context
+from services.query_profiler_service import QueryProfilerService
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Latency buckets in seconds, tuned for sub-millisecond to multi-second work
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+
+def _escape_label_value(value: Any) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labelnames: Sequence[str], labelvalues: Tuple[str, ...], extra: str = '') -> str:
+    """Render a Prometheus label set such as {route="/api/stats",method="GET"}"""
+    pairs = [f'{name}="{_escape_label_value(value)}"' for name, value in zip(labelnames, labelvalues)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class Counter:
+    """Monotonically increasing counter with optional labels"""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labelvalues: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0.0) + amount
+
+    def value(self, *labelvalues: str) -> float:
+        return self._values.get(labelvalues, 0.0)
+
+    def render(self) -> str:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} counter']
+        with self._lock:
+            items = list(self._values.items())
+        for labelvalues, value in items:
+            lines.append(f'{self.name}{_format_labels(self.labelnames, labelvalues)} {value}')
+        return '\n'.join(lines)
+
+
+class Gauge:
+    """Point-in-time value, either set directly or read from a callback at scrape time"""
+
+    def __init__(self, name: str, documentation: str):
+        self.name = name
+        self.documentation = documentation
+        self._value = 0.0
+        self._callback: Optional[Callable[[], float]] = None
+
+    def set(self, value: float) -> None:
+        self._value = value
+
+    def set_function(self, callback: Callable[[], float]) -> None:
+        self._callback = callback
+
+    def render(self) -> str:
+        value = self._value
+        if self._callback is not None:
+            try:
+                value = self._callback()
+            except Exception as e:
+                logger.error(f"Error reading gauge {self.name}: {str(e)}")
+        return '\n'.join([
+            f'# HELP {self.name} {self.documentation}',
+            f'# TYPE {self.name} gauge',
+            f'{self.name} {value}'
+        ])
+
+
+class Histogram:
+    """Bucketed distribution with optional labels"""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: per-bucket counts (plus +Inf), sum and count
+        self._series: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labelvalues: str) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> str:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            items = [(labels, (list(s[0]), s[1], s[2])) for labels, s in self._series.items()]
+        for labelvalues, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                labels = _format_labels(self.labelnames, labelvalues, 'le="' + le + '"')
+                lines.append(f'{self.name}_bucket{labels} {cumulative}')
+            labels = _format_labels(self.labelnames, labelvalues)
+            lines.append(f'{self.name}_sum{labels} {total}')
+            lines.append(f'{self.name}_count{labels} {count}')
+        return '\n'.join(lines)
+
+
+class MetricsRegistry:
+    """Collection of metrics rendered together on scrape"""
+
+    def __init__(self):
+        self._metrics: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str) -> Gauge:
+        return self.register(Gauge(name, documentation))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return '\n'.join(metric.render() for metric in metrics) + '\n'
+
+
+# Process-wide registry. With several worker processes each one exposes its
+# own values; Prometheus aggregates them per instance.
+registry = MetricsRegistry()
+
+HTTP_REQUESTS = registry.counter(
+    'http_requests_total', 'HTTP requests handled', ('blueprint', 'route', 'method', 'status'))
+HTTP_REQUEST_LATENCY = registry.histogram(
+    'http_request_duration_seconds', 'HTTP request latency', ('blueprint', 'route', 'method'))
+HTTP_REQUEST_DB_QUERIES = registry.histogram(
+    'http_request_db_queries', 'Database statements executed per HTTP request', ('route',),
+    buckets=QUERY_COUNT_BUCKETS)
+HTTP_REQUEST_DB_TIME = registry.histogram(
+    'http_request_db_duration_seconds', 'Database time spent per HTTP request', ('route',))
+DB_QUERIES = registry.counter('db_queries_total', 'Database statements executed')
+DB_QUERY_LATENCY = registry.histogram('db_query_duration_seconds', 'Database statement latency')
+GEOLOCATION_LATENCY = registry.histogram(
+    'geolocation_request_duration_seconds', 'Latency of calls to the geolocation API', ('kind',))
+GEOLOCATION_CACHE = registry.counter(
+    'geolocation_cache_requests_total', 'Geolocation cache lookups', ('result',))
+INGEST_DUPLICATES = registry.counter(
+    'ingest_duplicates_total', 'Duplicate tracked events skipped, by where they were caught', ('source',))
+INGEST_SPOOL_EVENTS = registry.counter(
+    'ingest_spool_events_total', 'Events written to and replayed from the local ingest spool', ('action',))
+INGEST_QUEUE_EVENTS = registry.counter(
+    'ingest_queue_events_total', 'Events handed to ingest workers through the local queue', ('action',))
+BOT_FILTER_EVENTS = registry.counter(
+    'bot_filter_events_total', 'Ingested events classified by the bot filter', ('verdict', 'reason'))
+
+
+class MetricsService:
+    """Service for recording and exposing application metrics"""
+
+    @staticmethod
+    def record_db_query(duration: float) -> None:
+        """
+        Record one executed database statement
+
+        Args:
+            duration: Statement duration in seconds
+        """
+        DB_QUERIES.inc()
+        DB_QUERY_LATENCY.observe(duration)
+        if has_request_context():
+            g._metrics_db_queries = g.get('_metrics_db_queries', 0) + 1
+            g._metrics_db_time = g.get('_metrics_db_time', 0.0) + duration
+
+    @staticmethod
+    def record_geolocation_call(duration: float, kind: str = 'single') -> None:
+        """Record the latency of a call to the geolocation API"""
+        GEOLOCATION_LATENCY.observe(duration, kind)
+
+    @staticmethod
+    def record_geolocation_cache(hit: bool, count: int = 1) -> None:
+        """Record geolocation cache hits or misses"""
+        GEOLOCATION_CACHE.inc('hit' if hit else 'miss', amount=count)
+
+    @staticmethod
+    def record_duplicate(source: str, count: int = 1) -> None:
+        """Record skipped duplicate events ('memory', 'database' or 'batch')"""
+        INGEST_DUPLICATES.inc(source, amount=count)
+
+    @staticmethod
+    def record_spool(action: str, count: int = 1) -> None:
+        """Record spooled ('spooled'), replayed ('replayed') or unstorable, discarded ('discarded') events"""
+        INGEST_SPOOL_EVENTS.inc(action, amount=count)
+
+    @staticmethod
+    def record_queue(action: str, count: int = 1) -> None:
+        """Record events queued by the API ('enqueued') or taken by an ingest worker ('consumed')"""
+        INGEST_QUEUE_EVENTS.inc(action, amount=count)
+
+    @staticmethod
+    def record_bot_verdict(reason: Optional[str], count: int = 1) -> None:
+        """Record bot filter verdicts; reason is None for human traffic"""
+        BOT_FILTER_EVENTS.inc('bot' if reason else 'human', reason or 'none', amount=count)
+
+    @staticmethod
+    def register_gauge(name: str, documentation: str, callback: Callable[[], float]) -> Gauge:
+        """
+        Register a gauge read from a callback at scrape time, e.g. a queue depth
+
+        Args:
+            name: Metric name
+            documentation: Metric help text
+            callback: Zero-argument function returning the current value
+
+        Returns:
+            The registered gauge
+        """
+        gauge = registry.gauge(name, documentation)
+        gauge.set_function(callback)
+        return gauge
+
+    @staticmethod
+    def render() -> str:
+        """Render all metrics in the Prometheus text exposition format"""
+        return registry.render()
+
+    @staticmethod
+    def _before_request() -> None:
+        g._metrics_started = time.perf_counter()
+
+    @staticmethod
+    def _after_request(response):
+        started = g.get('_metrics_started')
+        if started is None:
+            return response
+
+        duration = time.perf_counter() - started
+        route = request.url_rule.rule if request.url_rule else '<unmatched>'
+        blueprint = request.blueprint or ''
+
+        HTTP_REQUESTS.inc(blueprint, route, request.method, str(response.status_code))
+        HTTP_REQUEST_LATENCY.observe(duration, blueprint, route, request.method)
+        HTTP_REQUEST_DB_QUERIES.observe(g.get('_metrics_db_queries', 0), route)
+        HTTP_REQUEST_DB_TIME.observe(g.get('_metrics_db_time', 0.0), route)
+        return response
+
+    @staticmethod
+    def init_app(app) -> None:
+        """
+        Install request timing hooks and database statement listeners
+
+        Args:
+            app: Flask application
+        """
+        app.before_request(MetricsService._before_request)
+        app.after_request(MetricsService._after_request)
+        QueryProfilerService.add_observer(MetricsService.record_db_query)
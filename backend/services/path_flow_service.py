@@ -0,0 +1,162 @@
+"""
+Path flow service - next/previous page and path analysis across sessions
+
+Page views are streamed ordered by (session_id, timestamp) and counted into
+Space-Saving counters, so memory is bounded by PATH_FLOW_CAPACITY entries per
+counter however many distinct pages or paths there are.
+"""
+from typing import Optional, List, Dict, Any, Tuple
+from datetime import datetime, timedelta
+from urllib.parse import urlsplit
+from flask import current_app
+from sqlalchemy import and_, or_, false
+from models.database import get_read_session
+from models.db_models import TrackingEvent
+from services.base_service import BaseService
+from utils.top_k import SpaceSavingCounter
+import itertools
+import logging
+import operator
+
+logger = logging.getLogger(__name__)
+
+# Rows fetched per round trip while streaming page views
+PATH_FLOW_BATCH_SIZE = 5000
+
+# Placeholders for the start and end of a session
+ENTRANCE = '(entrance)'
+EXIT = '(exit)'
+
+
+def normalize_page(page_url: Optional[str]) -> Optional[str]:
+    """Drop the query string and fragment so variants of a page are counted together"""
+    if not page_url:
+        return None
+    parts = urlsplit(page_url)
+    if parts.netloc:
+        return f"{parts.scheme}://{parts.netloc}{parts.path or '/'}"
+    return parts.path or '/'
+
+
+def _escape_like(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+class PathFlowService(BaseService):
+    """Service for navigation flow analysis"""
+
+    @staticmethod
+    def _page_matcher(page_url: str):
+        """
+        Build a predicate for the analysed page
+
+        A full URL is compared with normalized page URLs; a path (e.g.
+        '/pricing') is compared with the path of each page URL.
+        """
+        target = normalize_page(page_url)
+        if '://' in target:
+            return lambda page: page == target
+        return lambda page: page == target or (
+            '://' in page and (urlsplit(page).path or '/') == target
+        )
+
+    @staticmethod
+    def session_pages(rows) -> List[str]:
+        """Normalize one session's page URLs, collapsing consecutive repeats (reloads)"""
+        pages = []
+        for row in rows:
+            page = normalize_page(row[1])
+            if page and (not pages or pages[-1] != page):
+                pages.append(page)
+        return pages
+
+    @staticmethod
+    def get_flow(page_url: str, days: int = 30, limit: int = 10, path_length: int = 0) -> Dict[str, Any]:
+        """
+        Get the top pages viewed before and after a page, and optionally the
+        top paths starting at it
+
+        Args:
+            page_url: Page to analyse (full URL or path)
+            days: Number of days of page views to include
+            limit: Number of pages (and paths) to return
+            path_length: Maximum pages per path, starting with page_url (0 disables paths)
+
+        Returns:
+            Dictionary with occurrences, sessions, next_pages, previous_pages,
+            paths and whether the counts are exact
+        """
+        capacity = max(current_app.config.get('PATH_FLOW_CAPACITY', 1000), limit)
+        next_pages = SpaceSavingCounter(capacity)
+        previous_pages = SpaceSavingCounter(capacity)
+        paths = SpaceSavingCounter(capacity) if path_length > 1 else None
+        is_target = PathFlowService._page_matcher(page_url)
+
+        session = get_read_session()
+        cutoff = datetime.utcnow() - timedelta(days=days)
+        page_views = and_(
+            TrackingEvent.timestamp >= cutoff,
+            TrackingEvent.is_bot == false(),
+            or_(TrackingEvent.event_name.is_(None), TrackingEvent.event_name == '')
+        )
+
+        # Only sessions that may contain the page are streamed; the LIKE
+        # prefilter is a superset, matched exactly in Python
+        target = normalize_page(page_url)
+        candidate_sessions = session.query(TrackingEvent.session_id).filter(
+            page_views,
+            TrackingEvent.page_url.like(f"%{_escape_like(target)}%", escape='\\')
+        )
+        rows = session.query(TrackingEvent.session_id, TrackingEvent.page_url).filter(
+            page_views,
+            TrackingEvent.session_id.in_(candidate_sessions)
+        ).order_by(TrackingEvent.session_id, TrackingEvent.timestamp).yield_per(PATH_FLOW_BATCH_SIZE)
+
+        occurrences = 0
+        sessions = 0
+        for _, session_rows in itertools.groupby(rows, key=operator.itemgetter(0)):
+            pages = PathFlowService.session_pages(session_rows)
+            matched = False
+            for index, page in enumerate(pages):
+                if not is_target(page):
+                    continue
+                matched = True
+                occurrences += 1
+                previous_pages.add(pages[index - 1] if index else ENTRANCE)
+                next_pages.add(pages[index + 1] if index + 1 < len(pages) else EXIT)
+                if paths is not None:
+                    path: Tuple[str, ...] = tuple(pages[index:index + path_length])
+                    if len(path) < path_length:
+                        path += (EXIT,)
+                    paths.add(path)
+            sessions += matched
+
+        def ranked(counter: SpaceSavingCounter) -> List[Dict[str, Any]]:
+            return [
+                {
+                    'page_url': key,
+                    'count': count,
+                    'share': round(count / occurrences * 100, 2) if occurrences else 0.0,
+                    'error': error
+                }
+                for key, count, error in counter.top(limit)
+            ]
+
+        logger.info(f"Computed page flow for {page_url} over {sessions} sessions")
+        return {
+            'page_url': page_url,
+            'occurrences': occurrences,
+            'sessions': sessions,
+            'next_pages': ranked(next_pages),
+            'previous_pages': ranked(previous_pages),
+            'paths': [
+                {
+                    'pages': list(key),
+                    'count': count,
+                    'share': round(count / occurrences * 100, 2) if occurrences else 0.0,
+                    'error': error
+                }
+                for key, count, error in paths.top(limit)
+            ] if paths is not None else [],
+            'exact': all(counter.is_exact for counter in (next_pages, previous_pages, paths) if counter is not None)
+        }
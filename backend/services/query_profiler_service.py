@@ -0,0 +1,170 @@
+"""
+Query profiler service - per-request SQL statement counting, slow query
+logging and N+1 / query budget detection
+"""
+from typing import Optional, Dict, Any, Callable, List
+from flask import current_app, g, request, has_request_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+import logging
+import re
+import time
+
+logger = logging.getLogger(__name__)
+
+# Collapses expanded IN lists and literal whitespace so repeated statements
+# that only differ in their number of bound parameters compare equal
+_IN_LIST_RE = re.compile(r'\(\s*(?:%\(\w+\)s|\?)(?:\s*,\s*(?:%\(\w+\)s|\?))*\s*\)')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+# Callbacks invoked with the duration (seconds) of every executed statement
+_observers: List[Callable[[float], None]] = []
+
+
+def normalize_statement(statement: str) -> str:
+    """Normalize a SQL statement for grouping repeated executions"""
+    return _IN_LIST_RE.sub('(?)', _WHITESPACE_RE.sub(' ', statement).strip())
+
+
+def describe_parameters(parameters: Any, executemany: bool = False) -> str:
+    """
+    Describe the shape of bound parameters without exposing their values
+
+    Args:
+        parameters: DBAPI parameters (dict, sequence or list of those)
+        executemany: Whether the statement was run with executemany
+
+    Returns:
+        Shape description such as {'session_id': 'str', 'param_1': 'int'}
+    """
+    if executemany and isinstance(parameters, (list, tuple)) and parameters:
+        return f"{len(parameters)} x {describe_parameters(parameters[0])}"
+    if isinstance(parameters, dict):
+        return repr({key: type(value).__name__ for key, value in parameters.items()})
+    if isinstance(parameters, (list, tuple)):
+        return repr([type(value).__name__ for value in parameters])
+    return type(parameters).__name__
+
+
+class QueryProfilerService:
+    """Service for profiling SQL statements executed while handling requests"""
+
+    @staticmethod
+    def add_observer(callback: Callable[[float], None]) -> None:
+        """
+        Register a callback invoked with the duration of every statement
+
+        Args:
+            callback: Function receiving the statement duration in seconds
+        """
+        if callback not in _observers:
+            _observers.append(callback)
+        QueryProfilerService.install_listeners()
+
+    @staticmethod
+    def install_listeners() -> None:
+        """Attach cursor execute listeners to all engines (idempotent)"""
+        if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+            event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+
+    @staticmethod
+    def get_request_profile() -> Optional[Dict[str, Any]]:
+        """
+        Get the statement profile collected for the current request
+
+        Returns:
+            Dictionary with count, total time and per-statement [count, time],
+            or None outside of a request
+        """
+        if not has_request_context():
+            return None
+        if '_query_profile' not in g:
+            g._query_profile = {'count': 0, 'duration': 0.0, 'statements': {}}
+        return g._query_profile
+
+    @staticmethod
+    def record_statement(statement: str, parameters: Any, executemany: bool, duration: float) -> None:
+        """
+        Record one executed statement against the current request and log it if slow
+
+        Args:
+            statement: SQL statement text
+            parameters: Bound parameters
+            executemany: Whether the statement was run with executemany
+            duration: Statement duration in seconds
+        """
+        for observer in _observers:
+            observer(duration)
+
+        if not has_request_context() or not current_app.config.get('QUERY_PROFILING_ENABLED', True):
+            return
+
+        profile = QueryProfilerService.get_request_profile()
+        normalized = normalize_statement(statement)
+        profile['count'] += 1
+        profile['duration'] += duration
+        totals = profile['statements'].setdefault(normalized, [0, 0.0])
+        totals[0] += 1
+        totals[1] += duration
+
+        threshold_ms = current_app.config.get('SLOW_QUERY_THRESHOLD_MS', 200)
+        duration_ms = duration * 1000
+        if duration_ms >= threshold_ms:
+            logger.warning(
+                f"Slow query ({duration_ms:.1f} ms) in {request.method} {request.path}: "
+                f"{normalized} params={describe_parameters(parameters, executemany)}"
+            )
+
+    @staticmethod
+    def _after_request(response):
+        profile = g.get('_query_profile')
+        if profile is None or not current_app.debug:
+            return response
+
+        route = request.url_rule.rule if request.url_rule else request.path
+        budget = current_app.config.get('QUERY_BUDGET_PER_REQUEST', 30)
+        repeat_threshold = current_app.config.get('N_PLUS_ONE_THRESHOLD', 5)
+
+        if profile['count'] > budget:
+            logger.warning(
+                f"Query budget exceeded in {request.method} {route}: "
+                f"{profile['count']} statements (budget {budget}), {profile['duration'] * 1000:.1f} ms"
+            )
+
+        for statement, (count, duration) in profile['statements'].items():
+            if count >= repeat_threshold:
+                logger.warning(
+                    f"Possible N+1 in {request.method} {route}: statement executed {count} times "
+                    f"({duration * 1000:.1f} ms total): {statement}"
+                )
+
+        response.headers['Server-Timing'] = (
+            f'db;dur={profile["duration"] * 1000:.1f};desc="{profile["count"]} queries"'
+        )
+        return response
+
+    @staticmethod
+    def init_app(app) -> None:
+        """
+        Install statement listeners and the debug-mode request report
+
+        Args:
+            app: Flask application
+        """
+        QueryProfilerService.install_listeners()
+        app.after_request(QueryProfilerService._after_request)
+
+
+# A connection runs one statement at a time, so a single start slot is enough;
+# a statement that fails simply leaves a stale value that the next one overwrites
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info['_query_start'] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.pop('_query_start', None)
+    if started is not None:
+        QueryProfilerService.record_statement(
+            statement, parameters, executemany, time.perf_counter() - started
+        )
@@ -0,0 +1,519 @@
+"""
+Realtime service - in-memory sliding-window aggregation of ingested events
+and Server-Sent Events fan-out to dashboard viewers
+"""
+from typing import Optional, Dict, Any, List, Set
+from collections import Counter, deque
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import func, desc, false
+from models.database import get_read_session
+from models.db_instance import db
+from models.db_models import TrackingEvent, Visit
+import calendar
+import json
+import logging
+import queue
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Events kept for incremental pushes; a tick only sends the ones it has not sent yet
+RECENT_EVENTS_BUFFER = 100
+
+# Rows read per table per poll when following the database
+FOLLOW_BATCH_SIZE = 5000
+
+
+class SlidingWindowAggregator:
+    """
+    Ring buffer of per-minute buckets holding active sessions and page views
+
+    Timestamps are naive UTC, matching the model defaults. Each bucket is
+    [minute, session ids, page views]; a bucket is reset when its slot is
+    reused for a newer minute, so reads only touch window_minutes buckets.
+    """
+
+    def __init__(self, window_minutes: int = 60, active_minutes: int = 30,
+                 top_pages: int = 5, recent_events: int = 10):
+        self.window_minutes = window_minutes
+        self.active_minutes = active_minutes
+        self.top_pages = top_pages
+        self.recent_events = recent_events
+        self._buckets: List[list] = [[None, set(), 0] for _ in range(window_minutes)]
+        self._day: Optional[int] = None
+        self._day_pages: Counter = Counter()
+        self._recent: deque = deque(maxlen=RECENT_EVENTS_BUFFER)
+        self._sequence = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _minute(timestamp: datetime) -> int:
+        return calendar.timegm(timestamp.utctimetuple()) // 60
+
+    def record(self, timestamp: datetime, session_id: Optional[str], page_url: Optional[str],
+               is_page_view: bool, event: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Add one ingested event to the window
+
+        Args:
+            timestamp: Event time (naive UTC)
+            session_id: Session identifier, if any
+            page_url: Page URL
+            is_page_view: Whether the event counts as a page view
+            event: Serialised event for the recent events feed
+        """
+        minute = self._minute(timestamp)
+        now_minute = self._minute(datetime.utcnow())
+        day = minute // 1440
+
+        with self._lock:
+            if now_minute - minute < self.window_minutes:
+                bucket = self._buckets[minute % self.window_minutes]
+                if bucket[0] != minute:
+                    if bucket[0] is not None and bucket[0] > minute:
+                        bucket = None  # Slot already holds a newer minute
+                    else:
+                        bucket[0], bucket[1], bucket[2] = minute, set(), 0
+                if bucket is not None:
+                    if session_id:
+                        bucket[1].add(session_id)
+                    if is_page_view:
+                        bucket[2] += 1
+
+            if is_page_view and page_url:
+                if self._day is None or day > self._day:
+                    self._day = day
+                    self._day_pages = Counter()
+                if day == self._day:
+                    self._day_pages[page_url] += 1
+
+            if event is not None:
+                self._sequence += 1
+                self._recent.append((self._sequence, event))
+
+    def seed(self, window_events, day_pages: Dict[str, int], recent_events: List[Dict[str, Any]]) -> None:
+        """
+        Load the window from stored events, replacing its current contents
+
+        Args:
+            window_events: Iterable of (timestamp, session_id, is_page_view) within the window
+            day_pages: Page view counts per page URL for the current UTC day
+            recent_events: Serialised recent events, oldest first
+        """
+        now_minute = self._minute(datetime.utcnow())
+        buckets = [[None, set(), 0] for _ in range(self.window_minutes)]
+        for timestamp, session_id, is_page_view in window_events:
+            minute = self._minute(timestamp)
+            if now_minute - minute >= self.window_minutes or minute > now_minute:
+                continue
+            bucket = buckets[minute % self.window_minutes]
+            bucket[0] = minute
+            if session_id:
+                bucket[1].add(session_id)
+            if is_page_view:
+                bucket[2] += 1
+
+        with self._lock:
+            self._buckets = buckets
+            self._day = now_minute // 1440
+            self._day_pages = Counter(day_pages)
+            self._recent.clear()
+            for event in recent_events[-RECENT_EVENTS_BUFFER:]:
+                self._sequence += 1
+                self._recent.append((self._sequence, event))
+
+    @property
+    def sequence(self) -> int:
+        """Number of events recorded so far"""
+        return self._sequence
+
+    def get_stats(self, since_sequence: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Read the current window
+
+        Args:
+            since_sequence: If given, also return the events recorded after it
+
+        Returns:
+            Dictionary with active_sessions, page_views_last_hour, top_pages_today,
+            recent_events, sequence and (optionally) new_events
+        """
+        now_minute = self._minute(datetime.utcnow())
+        today = now_minute // 1440
+        sessions: Set[str] = set()
+        page_views = 0
+
+        with self._lock:
+            for minute, bucket_sessions, bucket_views in self._buckets:
+                if minute is None or now_minute - minute >= self.window_minutes:
+                    continue
+                page_views += bucket_views
+                if now_minute - minute < self.active_minutes:
+                    sessions.update(bucket_sessions)
+
+            top_pages = self._day_pages.most_common(self.top_pages) if self._day == today else []
+            recent = list(self._recent)
+            sequence = self._sequence
+
+        stats = {
+            'active_sessions': len(sessions),
+            'page_views_last_hour': page_views,
+            'top_pages_today': [{'page_url': page, 'views': views} for page, views in top_pages],
+            'recent_events': [event for _, event in reversed(recent[-self.recent_events:])],
+            'sequence': sequence,
+        }
+        if since_sequence is not None:
+            stats['new_events'] = [event for seq, event in recent if seq > since_sequence]
+        return stats
+
+
+class RealtimeBroadcaster:
+    """
+    Pushes aggregator updates to subscribed SSE streams
+
+    A single background thread computes one update per tick and hands the
+    same payload to every subscriber, so N viewers cost one computation.
+    """
+
+    def __init__(self, aggregator: SlidingWindowAggregator, interval: float = 2, max_queued: int = 10):
+        self.aggregator = aggregator
+        self.interval = interval
+        self.max_queued = max_queued
+        self._subscribers: Set[queue.Queue] = set()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._sequence = 0
+        self._last_totals: Optional[Dict[str, Any]] = None
+
+    def subscribe(self, interval: Optional[float] = None) -> queue.Queue:
+        """
+        Register a subscriber and start the tick thread if needed
+
+        Args:
+            interval: Seconds between ticks, applied if this call starts the
+                thread (default: keep the current interval)
+        """
+        subscriber = queue.Queue(maxsize=self.max_queued)
+        with self._lock:
+            self._subscribers.add(subscriber)
+            if self._thread is None or not self._thread.is_alive():
+                if interval is not None:
+                    self.interval = interval
+                # Events recorded while nobody was listening are covered by the snapshot
+                self._sequence = self.aggregator.sequence
+                self._thread = threading.Thread(target=self._run, name='realtime-broadcaster', daemon=True)
+                self._thread.start()
+        return subscriber
+
+    def unsubscribe(self, subscriber: queue.Queue) -> None:
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Full state for a newly connected subscriber"""
+        return self.aggregator.get_stats()
+
+    def tick(self) -> Optional[Dict[str, Any]]:
+        """Compute one update and deliver it to all subscribers"""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        if not subscribers:
+            return None
+
+        update = self.aggregator.get_stats(since_sequence=self._sequence)
+        self._sequence = update['sequence']
+        # Subscribers already have the recent events from their snapshot
+        del update['recent_events']
+        totals = {key: value for key, value in update.items() if key not in ('new_events', 'sequence')}
+        if not update['new_events'] and totals == self._last_totals:
+            return None  # Nothing changed; the stream's heartbeat keeps it open
+        self._last_totals = totals
+
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(update)
+            except queue.Full:
+                # A slow client only needs the newest state; drop its oldest update
+                try:
+                    subscriber.get_nowait()
+                    subscriber.put_nowait(update)
+                except (queue.Empty, queue.Full):
+                    pass
+        return update
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.tick()
+            except Exception as e:
+                logger.error(f"Error computing realtime update: {str(e)}")
+            with self._lock:
+                if not self._subscribers:
+                    self._thread = None
+                    return
+
+
+tracking_aggregator = SlidingWindowAggregator()
+# Ticks every REALTIME_PUSH_INTERVAL seconds, read when a stream starts the thread
+tracking_broadcaster = RealtimeBroadcaster(tracking_aggregator)
+visit_aggregator = SlidingWindowAggregator()
+
+_follower: Dict[str, Optional[threading.Thread]] = {'thread': None}
+_follower_lock = threading.Lock()
+
+# Whether the windows have been seeded from the database (or seeding is disabled)
+_seeded: Dict[str, bool] = {'done': False}
+_seed_lock = threading.Lock()
+
+
+def _awaiting_seed() -> bool:
+    """Whether a recorded event would be loaded again, and counted twice, by the pending seed"""
+    return not _seeded['done'] and current_app.config.get('REALTIME_SEED', True)
+
+
+class RealtimeService:
+    """Service for realtime tracking statistics and their SSE stream"""
+
+    @staticmethod
+    def record_tracking_event(event: Dict[str, Any], timestamp: datetime) -> None:
+        """
+        Feed an ingested tracking event into the realtime window
+
+        Args:
+            event: Serialised tracking event (TrackingEvent.to_dict())
+            timestamp: Event timestamp (naive UTC)
+        """
+        if _awaiting_seed():
+            return
+        try:
+            tracking_aggregator.record(
+                timestamp,
+                event.get('session_id'),
+                event.get('page_url'),
+                not event.get('event_name'),
+                event
+            )
+        except Exception as e:
+            logger.error(f"Error recording realtime event: {str(e)}")
+
+    @staticmethod
+    def record_visit(visit: Dict[str, Any], timestamp: datetime) -> None:
+        """
+        Feed an ingested visit into the realtime window
+
+        Args:
+            visit: Serialised visit (Visit.to_dict())
+            timestamp: Visit timestamp (naive UTC)
+        """
+        if _awaiting_seed():
+            return
+        try:
+            visit_aggregator.record(
+                timestamp,
+                visit.get('session_id'),
+                visit.get('page_url'),
+                visit.get('event_name') in (None, 'page_view'),
+                visit
+            )
+        except Exception as e:
+            logger.error(f"Error recording realtime visit: {str(e)}")
+
+    @staticmethod
+    def in_window(timestamp: datetime) -> bool:
+        """Whether an event at `timestamp` (naive UTC) still counts towards the realtime window"""
+        return timestamp >= datetime.utcnow() - timedelta(minutes=tracking_aggregator.window_minutes)
+
+    @staticmethod
+    def get_tracking_stats() -> Dict[str, Any]:
+        """Get realtime tracking event statistics from the in-memory window"""
+        RealtimeService.ensure_started()
+        return tracking_aggregator.get_stats()
+
+    @staticmethod
+    def get_visit_stats() -> Dict[str, Any]:
+        """Get realtime visit statistics from the in-memory window"""
+        RealtimeService.ensure_started()
+        return visit_aggregator.get_stats()
+
+    @staticmethod
+    def _load(model, is_page_view) -> Dict[str, Any]:
+        """Read what a window needs from one table: last-hour rows, today's page counts, recent rows"""
+        session = get_read_session()
+        now = datetime.utcnow()
+        window_start = now - timedelta(minutes=tracking_aggregator.window_minutes)
+        today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+
+        window_events = [
+            (timestamp, session_id, is_page_view(event_name))
+            for timestamp, session_id, event_name in session.query(
+                model.timestamp, model.session_id, model.event_name
+            ).filter(model.timestamp >= window_start, model.is_bot == false())
+        ]
+
+        day_pages: Dict[str, int] = {}
+        for page_url, event_name, views in session.query(
+            model.page_url, model.event_name, func.count(model.id)
+        ).filter(
+            model.timestamp >= today_start, model.is_bot == false()
+        ).group_by(model.page_url, model.event_name):
+            if page_url and is_page_view(event_name):
+                day_pages[page_url] = day_pages.get(page_url, 0) + views
+
+        recent = session.query(model).filter(
+            model.is_bot == false()
+        ).order_by(desc(model.timestamp)).limit(RECENT_EVENTS_BUFFER).all()
+
+        return {
+            'window_events': window_events,
+            'day_pages': day_pages,
+            'recent_events': [row.to_dict() for row in reversed(recent)],
+        }
+
+    @staticmethod
+    def seed() -> None:
+        """
+        Seed the realtime windows from the database
+
+        Must run inside an application context. Failures are logged and leave
+        the windows empty, so realtime statistics still work without a database.
+        """
+        sources = (
+            ('tracking events', TrackingEvent, tracking_aggregator, lambda name: not name),
+            ('visits', Visit, visit_aggregator, lambda name: name in (None, 'page_view')),
+        )
+        for label, model, aggregator, is_page_view in sources:
+            try:
+                loaded = RealtimeService._load(model, is_page_view)
+                aggregator.seed(**loaded)
+                logger.info(
+                    f"Seeded realtime window with {len(loaded['window_events'])} {label} from the last hour"
+                )
+            except Exception as e:
+                logger.warning(f"Could not seed realtime window from {label}: {str(e)}")
+
+    @staticmethod
+    def ensure_started() -> None:
+        """
+        Prepare the windows on first use
+
+        Seeds them from the database (REALTIME_SEED), so processes that never
+        serve realtime statistics - CLI commands, ingest workers - do not
+        query for them, and starts following the database when ingest
+        workers store the events. Until the seed, recorded events are
+        skipped, as the seed loads them anyway.
+        """
+        if not _seeded['done']:
+            with _seed_lock:
+                if not _seeded['done']:
+                    if current_app.config.get('REALTIME_SEED', True):
+                        RealtimeService.seed()
+                    _seeded['done'] = True
+        if _follower['thread'] is None and current_app.config.get('INGEST_MODE') == 'queue':
+            RealtimeService.follow(current_app._get_current_object())
+
+    @staticmethod
+    def follow(app) -> None:
+        """
+        Feed the windows from rows other processes insert
+
+        With INGEST_MODE=queue, events are stored by ingest workers rather
+        than by this process, so a background thread reads rows with an id
+        above the last one seen every REALTIME_PUSH_INTERVAL seconds (an
+        index range scan on the primary key). Rows committed out of id order
+        by concurrent workers can be missed, which only affects the
+        realtime view.
+
+        Args:
+            app: Flask application
+        """
+        with _follower_lock:
+            if _follower['thread'] is not None:
+                return
+            thread = threading.Thread(target=RealtimeService._follow_loop, args=(app,), name='realtime-follower', daemon=True)
+            _follower['thread'] = thread
+            thread.start()
+
+    @staticmethod
+    def _follow_loop(app) -> None:
+        sources = (
+            (TrackingEvent, RealtimeService.record_tracking_event),
+            (Visit, RealtimeService.record_visit),
+        )
+        last_ids: Dict[Any, Optional[int]] = {model: None for model, _ in sources}
+        interval = app.config.get('REALTIME_PUSH_INTERVAL', 2)
+        while True:
+            with app.app_context():
+                session = get_read_session()
+                for model, record in sources:
+                    try:
+                        if last_ids[model] is None:
+                            # Rows up to now were covered by seed()
+                            last_ids[model] = session.query(func.max(model.id)).scalar() or 0
+                            continue
+                        rows = session.query(model).filter(
+                            model.id > last_ids[model]
+                        ).order_by(model.id).limit(FOLLOW_BATCH_SIZE).all()
+                        for row in rows:
+                            if not row.is_bot:
+                                record(row.to_dict(), row.timestamp)
+                        if rows:
+                            last_ids[model] = rows[-1].id
+                    except Exception as e:
+                        session.rollback()
+                        logger.error(f"Error following {model.__tablename__} for realtime stats: {str(e)}")
+                db.session.remove()
+            time.sleep(interval)
+
+    @staticmethod
+    def format_sse(data: Dict[str, Any], event: str) -> str:
+        """
+        Format one Server-Sent Events message
+
+        Args:
+            data: JSON-serialisable payload
+            event: SSE event name
+
+        Returns:
+            Message text terminated by a blank line
+        """
+        return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+    @staticmethod
+    def stream_tracking_updates():
+        """
+        Generate the SSE stream for one dashboard viewer
+
+        Sends a 'snapshot' with the full state, then an 'update' per tick
+        (with only the events recorded since the previous tick) and
+        comment heartbeats so proxies keep the connection open.
+
+        The intervals are read from the app config here, as the returned
+        generator runs after the request context is gone.
+
+        Returns:
+            Generator of SSE message strings
+        """
+        push_interval = current_app.config.get('REALTIME_PUSH_INTERVAL', 2)
+        heartbeat_interval = current_app.config.get('REALTIME_HEARTBEAT_INTERVAL', 15)
+
+        def messages():
+            subscriber = tracking_broadcaster.subscribe(push_interval)
+            try:
+                yield RealtimeService.format_sse(tracking_broadcaster.snapshot(), 'snapshot')
+                while True:
+                    try:
+                        update = subscriber.get(timeout=heartbeat_interval)
+                    except queue.Empty:
+                        yield ': keep-alive\n\n'
+                        continue
+                    yield RealtimeService.format_sse(update, 'update')
+            finally:
+                tracking_broadcaster.unsubscribe(subscriber)
+
+        return messages()
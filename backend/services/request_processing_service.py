@@ -2,11 +2,41 @@
 Request processing service - business logic for HTTP request processing
 """
 from typing import Optional, Dict, Any
+from functools import lru_cache
 from flask import request
 import logging
+import re
 
 logger = logging.getLogger(__name__)
 
+# Mirrors the browser/OS/device detection done client-side in tracker.js
+_BROWSER_PATTERNS = (
+    ('Firefox', 'Firefox'),
+    ('SamsungBrowser', 'Samsung Browser'),
+    ('Opera', 'Opera'),
+    ('OPR', 'Opera'),
+    ('Edg', 'Edge'),
+    ('Chrome', 'Chrome'),
+    ('Safari', 'Safari'),
+    ('MSIE', 'Internet Explorer'),
+    ('Trident', 'Internet Explorer'),
+)
+_OS_PATTERNS = (
+    ('Windows NT 10.0', 'Windows 10'),
+    ('Windows NT 6.3', 'Windows 8.1'),
+    ('Windows NT 6.2', 'Windows 8'),
+    ('Windows NT 6.1', 'Windows 7'),
+    ('Windows NT', 'Windows'),
+    ('iPhone', 'iOS'),
+    ('iPad', 'iOS'),
+    ('iPod', 'iOS'),
+    ('Android', 'Android'),
+    ('Mac', 'macOS'),
+    ('Linux', 'Linux'),
+)
+_MOBILE_RE = re.compile(r'Mobi|Android|iPhone|iPad|iPod|BlackBerry|IEMobile|Opera Mini', re.IGNORECASE)
+_TABLET_RE = re.compile(r'iPad|Tablet|Android(?!.*Mobile)', re.IGNORECASE)
+
 
 class RequestProcessingService:
     """Service for processing HTTP request data"""
@@ -62,3 +92,31 @@ class RequestProcessingService:
             
         # Add more validation as needed
         return True
+    
+    @staticmethod
+    @lru_cache(maxsize=4096)
+    def parse_user_agent(user_agent: Optional[str]) -> Dict[str, Optional[str]]:
+        """
+        Derive browser, OS and device type from a User-Agent string
+        
+        Results are memoised per distinct User-Agent, which keeps batch
+        enrichment cheap since real traffic only has a few thousand of them.
+        
+        Args:
+            user_agent: Raw User-Agent header value
+            
+        Returns:
+            Dictionary with browser, os and device
+        """
+        if not user_agent:
+            return {'browser': None, 'os': None, 'device': None}
+        
+        browser = next((name for token, name in _BROWSER_PATTERNS if token in user_agent), 'Unknown')
+        os_name = next((name for token, name in _OS_PATTERNS if token in user_agent), 'Unknown')
+        
+        if _MOBILE_RE.search(user_agent):
+            device = 'Tablet' if _TABLET_RE.search(user_agent) else 'Mobile'
+        else:
+            device = 'Desktop'
+        
+        return {'browser': browser, 'os': os_name, 'device': device}
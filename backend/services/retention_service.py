@@ -0,0 +1,252 @@
+"""
+Retention service - incrementally built daily and weekly retention cohorts
+
+Visitors (identified by session ID or IP address) belong to the cohort of the
+day or week they were first seen. Each build processes only the days since the
+last build: new visitors are added to visitor_first_seen and the newest matrix
+column (the day, and the week containing it) is recomputed and stored in
+retention_cohorts. The API reads the stored matrix and never rescans history.
+"""
+from typing import Optional, List, Dict, Any
+from datetime import date, datetime, timedelta
+from sqlalchemy import func, and_, exists, false, insert, literal, select
+from flask import current_app
+from models.db_instance import db
+from models.database import get_read_session
+from models.db_models import TrackingEvent, VisitorFirstSeen, RetentionCohort
+from services.base_service import BaseService
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Columns of tracking_events usable as the visitor key. The tracker's own
+# session ID is used rather than the inactivity-split session_id, so a
+# returning tab counts as the same visitor
+VISITOR_KEY_COLUMNS = {
+    'session': func.coalesce(TrackingEvent.client_session_id, TrackingEvent.session_id),
+    'ip': TrackingEvent.ip_address,
+}
+
+GRANULARITIES = ('day', 'week')
+
+
+def _week_start(day: date) -> date:
+    """Monday of the ISO week containing day"""
+    return day - timedelta(days=day.weekday())
+
+
+def _day_range(start: date, end: date):
+    """Filter for human tracking events on days start..end inclusive"""
+    return and_(
+        TrackingEvent.is_bot == false(),
+        TrackingEvent.timestamp >= datetime.combine(start, datetime.min.time()),
+        TrackingEvent.timestamp < datetime.combine(end + timedelta(days=1), datetime.min.time())
+    )
+
+
+class RetentionService(BaseService):
+    """Service for building and reading retention cohort matrices"""
+
+    @staticmethod
+    def get_last_built(key_type: str, session=None) -> Optional[date]:
+        """
+        Get the last day included in the stored matrices
+
+        Args:
+            key_type: Visitor key ('session' or 'ip')
+            session: SQLAlchemy session to query with (default: primary)
+
+        Returns:
+            Date of the newest built column, or None if nothing was built
+        """
+        session = session or db.session
+        return session.query(func.max(RetentionCohort.period_start)).filter(
+            RetentionCohort.granularity == 'day',
+            RetentionCohort.key_type == key_type
+        ).scalar()
+
+    @staticmethod
+    def _cohort_counts(key_type: str, start: date, end: date) -> Dict[date, int]:
+        """Count distinct visitors active on days start..end, by first-seen day"""
+        key_column = VISITOR_KEY_COLUMNS[key_type]
+        rows = db.session.query(
+            VisitorFirstSeen.first_seen, func.count(func.distinct(key_column))
+        ).join(
+            VisitorFirstSeen,
+            and_(VisitorFirstSeen.key_type == key_type, VisitorFirstSeen.visitor_key == key_column)
+        ).filter(_day_range(start, end)).group_by(VisitorFirstSeen.first_seen).all()
+        return {first_seen: count for first_seen, count in rows}
+
+    @staticmethod
+    def _replace_column(granularity: str, key_type: str, period_start: date,
+                        counts: Dict[date, int]) -> None:
+        """Replace the stored cells of one matrix column"""
+        RetentionCohort.query.filter(
+            RetentionCohort.granularity == granularity,
+            RetentionCohort.key_type == key_type,
+            RetentionCohort.period_start == period_start
+        ).delete(synchronize_session=False)
+
+        step = 1 if granularity == 'day' else 7
+        db.session.add_all([
+            RetentionCohort(
+                granularity=granularity,
+                key_type=key_type,
+                cohort_start=cohort_start,
+                period=(period_start - cohort_start).days // step,
+                period_start=period_start,
+                visitors=visitors
+            )
+            for cohort_start, visitors in counts.items()
+        ])
+
+    @staticmethod
+    def build_day(key_type: str, day: date) -> int:
+        """
+        Add one day to the retention matrices
+
+        Days must be built in order, since a visitor's first-seen day is the
+        first built day they appear on.
+
+        Args:
+            key_type: Visitor key ('session' or 'ip')
+            day: Day to build (UTC)
+
+        Returns:
+            Number of visitors first seen on the day
+        """
+        key_column = VISITOR_KEY_COLUMNS[key_type]
+        try:
+            new_visitors = select(
+                literal(key_type), key_column, literal(day)
+            ).where(
+                _day_range(day, day),
+                key_column.is_not(None),
+                ~exists().where(and_(
+                    VisitorFirstSeen.key_type == key_type,
+                    VisitorFirstSeen.visitor_key == key_column
+                ))
+            ).distinct()
+            result = db.session.execute(
+                insert(VisitorFirstSeen).from_select(['key_type', 'visitor_key', 'first_seen'], new_visitors)
+            )
+
+            # Daily column: visitors active on the day
+            RetentionService._replace_column(
+                'day', key_type, day, RetentionService._cohort_counts(key_type, day, day)
+            )
+
+            # Weekly column: visitors active so far in the day's week
+            week = _week_start(day)
+            weekly_counts: Dict[date, int] = {}
+            for first_seen, visitors in RetentionService._cohort_counts(key_type, week, day).items():
+                cohort_week = _week_start(first_seen)
+                weekly_counts[cohort_week] = weekly_counts.get(cohort_week, 0) + visitors
+            RetentionService._replace_column('week', key_type, week, weekly_counts)
+
+            RetentionService.commit_changes()
+            return result.rowcount
+        except Exception as e:
+            RetentionService.handle_db_error("build_day", e)
+
+    @staticmethod
+    def build(key_type: str = 'session', through: Optional[date] = None, rebuild: bool = False) -> Dict[str, Any]:
+        """
+        Bring the retention matrices up to date
+
+        Resumes from the last built day (rebuilt, since it may have been
+        partial); on the first build, history starts RETENTION_BACKFILL_DAYS
+        days back.
+
+        Args:
+            key_type: Visitor key ('session' or 'ip')
+            through: Last day to build (default: today, UTC)
+            rebuild: Drop stored cohorts and first-seen days and start over
+
+        Returns:
+            Summary with the built day range and the number of new visitors
+        """
+        if key_type not in VISITOR_KEY_COLUMNS:
+            raise ValueError(f"Unknown visitor key '{key_type}'")
+        through = through or datetime.utcnow().date()
+
+        if rebuild:
+            try:
+                RetentionCohort.query.filter(RetentionCohort.key_type == key_type).delete(synchronize_session=False)
+                VisitorFirstSeen.query.filter(VisitorFirstSeen.key_type == key_type).delete(synchronize_session=False)
+                RetentionService.commit_changes()
+            except Exception as e:
+                RetentionService.handle_db_error("build", e)
+
+        start = RetentionService.get_last_built(key_type)
+        if start is None:
+            first_event = db.session.query(func.min(TrackingEvent.timestamp)).scalar()
+            if first_event is None:
+                return {'key_type': key_type, 'start': None, 'end': None, 'days': 0, 'new_visitors': 0}
+            backfill_days = current_app.config.get('RETENTION_BACKFILL_DAYS', 90)
+            start = max(first_event.date(), through - timedelta(days=backfill_days - 1))
+
+        days = 0
+        new_visitors = 0
+        day = start
+        while day <= through:
+            new_visitors += RetentionService.build_day(key_type, day)
+            days += 1
+            day += timedelta(days=1)
+
+        logger.info(f"Built {key_type} retention cohorts for {start} to {through}: {new_visitors} new visitors")
+        return {'key_type': key_type, 'start': start, 'end': through, 'days': days, 'new_visitors': new_visitors}
+
+    @staticmethod
+    def get_matrix(granularity: str = 'week', key_type: str = 'session', cohorts: int = 12) -> Dict[str, Any]:
+        """
+        Read a stored retention matrix
+
+        Args:
+            granularity: 'day' or 'week'
+            key_type: Visitor key ('session' or 'ip')
+            cohorts: Number of most recent cohorts to return
+
+        Returns:
+            Dictionary with one entry per cohort (size and per-period visitors
+            and retention rate, oldest cohort first) and the last built day
+        """
+        session = get_read_session()
+        last_built = RetentionService.get_last_built(key_type, session)
+        if last_built is None:
+            return {'granularity': granularity, 'key_type': key_type, 'last_built': None, 'cohorts': []}
+
+        step = 1 if granularity == 'day' else 7
+        newest = last_built if granularity == 'day' else _week_start(last_built)
+        oldest = newest - timedelta(days=(cohorts - 1) * step)
+
+        rows = session.query(
+            RetentionCohort.cohort_start, RetentionCohort.period, RetentionCohort.visitors
+        ).filter(
+            RetentionCohort.granularity == granularity,
+            RetentionCohort.key_type == key_type,
+            RetentionCohort.cohort_start >= oldest
+        ).order_by(RetentionCohort.cohort_start, RetentionCohort.period).all()
+
+        matrix: Dict[date, Dict[int, int]] = {}
+        for cohort_start, period, visitors in rows:
+            matrix.setdefault(cohort_start, {})[period] = visitors
+
+        results: List[Dict[str, Any]] = []
+        for cohort_start, periods in matrix.items():
+            size = periods.get(0, 0)
+            results.append({
+                'cohort_start': cohort_start,
+                'visitors': size,
+                # Every elapsed period, including those nobody returned in
+                'periods': [
+                    {
+                        'period': period,
+                        'visitors': periods.get(period, 0),
+                        'retention_rate': round(periods.get(period, 0) / size * 100, 2) if size else 0.0
+                    }
+                    for period in range((newest - cohort_start).days // step + 1)
+                ]
+            })
+
+        return {'granularity': granularity, 'key_type': key_type, 'last_built': last_built, 'cohorts': results}
@@ -0,0 +1,220 @@
+"""
+Script cache service - pre-rendered, precompressed tracker scripts
+"""
+from typing import Optional, Dict, Any, List, Tuple
+from flask import Response
+from config import Config
+from services.file_serving_service import FileServingService
+import gzip
+import hashlib
+import logging
+import os
+import threading
+import time
+
+try:
+    import brotli
+except ImportError:  # Brotli is optional; gzip is always available
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# URL placeholders patched per script, as (search, replacement template)
+SCRIPT_REPLACEMENTS: Dict[str, List[Tuple[str, str]]] = {
+    'tracker.js': [
+        ("const API_ENDPOINT = 'http://localhost:5000/api/track';",
+         "const API_ENDPOINT = '{api_url}/api/track';"),
+        ("const TAGS_ENDPOINT = 'http://localhost:5000/api/tags';",
+         "const TAGS_ENDPOINT = '{api_url}/api/tags';"),
+    ],
+    'tracker.min.js': [
+        ('"http://localhost:5000/api/track"', '"{api_url}/api/track"'),
+        ('"http://localhost:5000/api/tags"', '"{api_url}/api/tags"'),
+    ],
+    'tag-manager.js': [
+        ("const API_URL = 'http://localhost:5000';", "const API_URL = '{api_url}';"),
+    ],
+    'tracker-with-tags.min.js': [
+        ('"http://localhost:5000/api/track"', '"{api_url}/api/track"'),
+        ('"http://localhost:5000/api/tags"', '"{api_url}/api/tags"'),
+    ],
+}
+
+_cache: Dict[str, Dict[str, Any]] = {}
+_cache_lock = threading.Lock()
+
+
+class ScriptCacheService:
+    """Service for serving tracker scripts from an in-memory, precompressed cache"""
+
+    @staticmethod
+    def compress(content: bytes) -> Dict[str, bytes]:
+        """
+        Build every supported encoding of a payload
+
+        Args:
+            content: Uncompressed bytes
+
+        Returns:
+            Dictionary mapping content-coding ('identity', 'gzip', 'br') to bytes
+        """
+        encodings = {
+            'identity': content,
+            'gzip': gzip.compress(content, compresslevel=9, mtime=0),
+        }
+        if brotli is not None:
+            encodings['br'] = brotli.compress(content, quality=11)
+        return encodings
+
+    @staticmethod
+    def render_script(filename: str) -> Optional[Dict[str, Any]]:
+        """
+        Read a script, patch in the configured API URL and precompress it
+
+        Args:
+            filename: Script file name (a key of SCRIPT_REPLACEMENTS)
+
+        Returns:
+            Cache entry with mtime, etag and encoded bodies, or None if missing
+        """
+        static_path = FileServingService.get_frontend_static_path()
+        if not FileServingService.validate_file_exists(static_path, filename):
+            return None
+
+        full_path = os.path.join(static_path, filename)
+        mtime = os.stat(full_path).st_mtime
+        with open(full_path, 'r', encoding='utf-8') as f:
+            content = f.read()
+
+        for search, replacement in SCRIPT_REPLACEMENTS.get(filename, []):
+            content = content.replace(search, replacement.format(api_url=Config.API_BASE_URL))
+
+        body = content.encode('utf-8')
+        digest = hashlib.sha256(body).hexdigest()[:32]
+        logger.info(f"Rendered {filename} ({len(body)} bytes, etag {digest})")
+
+        return {
+            'mtime': mtime,
+            'checked_at': time.monotonic(),
+            'etag': digest,
+            'encodings': ScriptCacheService.compress(body),
+        }
+
+    @staticmethod
+    def get_script(filename: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the cached rendering of a script, re-rendering it if the file changed
+
+        The file's mtime is checked at most every SCRIPT_MTIME_CHECK_INTERVAL
+        seconds, so steady-state requests do no disk I/O at all.
+
+        Args:
+            filename: Script file name
+
+        Returns:
+            Cache entry or None if the script does not exist
+        """
+        entry = _cache.get(filename)
+        now = time.monotonic()
+        if entry is not None and now - entry['checked_at'] < Config.SCRIPT_MTIME_CHECK_INTERVAL:
+            return entry
+
+        with _cache_lock:
+            entry = _cache.get(filename)
+            if entry is not None and now - entry['checked_at'] < Config.SCRIPT_MTIME_CHECK_INTERVAL:
+                return entry
+
+            try:
+                full_path = os.path.join(FileServingService.get_frontend_static_path(), filename)
+                if entry is not None and os.stat(full_path).st_mtime == entry['mtime']:
+                    entry['checked_at'] = now
+                    return entry
+            except OSError:
+                pass
+
+            entry = ScriptCacheService.render_script(filename)
+            if entry is None:
+                _cache.pop(filename, None)
+            else:
+                _cache[filename] = entry
+            return entry
+
+    @staticmethod
+    def warm() -> None:
+        """Render all script variants up front so the first requests are served from memory"""
+        for filename in SCRIPT_REPLACEMENTS:
+            try:
+                ScriptCacheService.get_script(filename)
+            except Exception as e:
+                logger.error(f"Error pre-rendering {filename}: {e}")
+
+    @staticmethod
+    def choose_encoding(flask_request, available) -> str:
+        """
+        Pick the best content-coding the client accepts
+
+        Args:
+            flask_request: Flask request object
+            available: Encodings present in the cache entry
+
+        Returns:
+            'br', 'gzip' or 'identity'
+        """
+        accepted = flask_request.accept_encodings
+        for encoding in ('br', 'gzip'):
+            if encoding in available and accepted[encoding] > 0:
+                return encoding
+        return 'identity'
+
+    @staticmethod
+    def encoded_response(entry: Dict[str, Any], flask_request, max_age: int) -> Response:
+        """
+        Build a 200/304 response for a precompressed cache entry
+
+        Args:
+            entry: Cache entry with 'etag' and 'encodings' (see compress)
+            flask_request: Flask request object
+            max_age: Cache-Control max-age in seconds
+
+        Returns:
+            200 response in the best accepted encoding, or 304 if unchanged
+        """
+        encoding = ScriptCacheService.choose_encoding(flask_request, entry['encodings'])
+        etag = entry['etag'] if encoding == 'identity' else f"{entry['etag']}-{encoding}"
+        headers = {
+            'Cache-Control': f'public, max-age={max_age}',
+            'Vary': 'Accept-Encoding',
+            'ETag': f'"{etag}"',
+        }
+
+        # Every encoding carries the same content, so any of our tags validates
+        client_tags = {tag.rsplit('-', 1)[0] if tag.endswith(('-gzip', '-br')) else tag
+                       for tag in flask_request.if_none_match.as_set()}
+        if entry['etag'] in client_tags:
+            return Response(status=304, headers=headers)
+
+        if encoding != 'identity':
+            headers['Content-Encoding'] = encoding
+        return Response(
+            entry['encodings'][encoding],
+            mimetype='application/javascript',
+            headers=headers
+        )
+
+    @staticmethod
+    def build_response(filename: str, flask_request) -> Optional[Response]:
+        """
+        Build the HTTP response for a cached script, honouring If-None-Match
+
+        Args:
+            filename: Script file name
+            flask_request: Flask request object
+
+        Returns:
+            200 or 304 response, or None if the script does not exist
+        """
+        entry = ScriptCacheService.get_script(filename)
+        if entry is None:
+            return None
+
+        return ScriptCacheService.encoded_response(entry, flask_request, Config.SCRIPT_CACHE_MAX_AGE)
@@ -0,0 +1,174 @@
+"""
+Sessionization service - splits client sessions on inactivity at ingest
+
+The tracker's session ID lives in sessionStorage, so a tab left open for days
+reports one "session". Events are instead assigned a derived session ID that
+changes after SESSION_INACTIVITY_TIMEOUT seconds without activity. The client's
+ID is kept in client_session_id.
+
+The last activity per client session is held in an in-memory LRU map, so the
+database is only consulted when a client is not in the map (new client,
+evicted entry, or another worker process saw it last) or its session appears
+to have timed out.
+"""
+from typing import Optional, Tuple, Callable, Dict
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from flask import current_app
+from sqlalchemy import desc
+from models.db_instance import db
+from models.db_models import Visit, TrackingEvent
+from services.spool_service import SpoolService
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Tables that can answer a client's latest session when it is not cached, by
+# sink name in order of preference. Every sink stores the same session IDs in
+# one transaction, so only the first enabled one is queried
+LOOKUP_MODELS = {'tracking_events': TrackingEvent, 'visits': Visit}
+
+# Room left for the suffix of derived session IDs within the 255-character column
+MAX_CLIENT_ID_LENGTH = 240
+
+
+def derive_session_id(client_session_id: str, started_at: datetime) -> str:
+    """Session ID for a session that starts after a client's first one"""
+    started = int(started_at.replace(tzinfo=timezone.utc).timestamp())
+    return f"{client_session_id[:MAX_CLIENT_ID_LENGTH]}~{started}"
+
+
+class SessionTracker:
+    """
+    Assigns derived session IDs from an LRU map of client sessions
+
+    Args:
+        timeout: Inactivity after which a new session starts
+        capacity: Maximum client sessions kept in memory
+        lookup: Optional callable returning (session_id, last_seen) of a client
+            session's latest stored event, or None
+    """
+
+    def __init__(self, timeout: timedelta, capacity: int,
+                 lookup: Optional[Callable[[str], Optional[Tuple[str, datetime]]]] = None):
+        self.timeout = timeout
+        self.capacity = capacity
+        self.lookup = lookup
+        self._sessions: 'OrderedDict[str, list]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'lookups': 0, 'splits': 0, 'evictions': 0}
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def assign(self, client_session_id: str, timestamp: datetime) -> str:
+        """
+        Get the session ID for a client event
+
+        Args:
+            client_session_id: Session ID sent by the tracker
+            timestamp: Event time (UTC)
+
+        Returns:
+            Derived session ID
+        """
+        with self._lock:
+            entry = self._sessions.get(client_session_id)
+            if entry is not None and timestamp - entry[1] <= self.timeout:
+                self.stats['hits'] += 1
+                entry[1] = max(entry[1], timestamp)
+                self._sessions.move_to_end(client_session_id)
+                return entry[0]
+
+        # Not cached, or apparently expired: the latest stored event is
+        # authoritative (e.g. another worker handled the client since)
+        stored = None
+        if self.lookup is not None:
+            self.stats['lookups'] += 1
+            stored = self.lookup(client_session_id)
+        if entry is not None and (stored is None or stored[1] < entry[1]):
+            stored = (entry[0], entry[1])
+
+        if stored is None:
+            session_id = client_session_id[:MAX_CLIENT_ID_LENGTH]
+            last_seen = timestamp
+        elif timestamp - stored[1] <= self.timeout:
+            session_id, last_seen = stored[0], max(stored[1], timestamp)
+        else:
+            self.stats['splits'] += 1
+            session_id, last_seen = derive_session_id(client_session_id, timestamp), timestamp
+
+        with self._lock:
+            self._sessions[client_session_id] = [session_id, last_seen]
+            self._sessions.move_to_end(client_session_id)
+            while len(self._sessions) > self.capacity:
+                self._sessions.popitem(last=False)
+                self.stats['evictions'] += 1
+        return session_id
+
+
+_tracker: Dict[str, Optional[SessionTracker]] = {'instance': None}
+_tracker_lock = threading.Lock()
+
+
+class SessionizationService:
+    """Service for assigning inactivity-based session IDs at ingest"""
+
+    @staticmethod
+    def lookup_last_event(client_session_id: str) -> Optional[Tuple[str, datetime]]:
+        """
+        Find the session ID and time of a client session's latest stored event
+
+        Args:
+            client_session_id: Session ID sent by the tracker
+
+        Returns:
+            Tuple of (session_id, timestamp), or None if the client is new
+            or the database is unavailable (events are being spooled)
+        """
+        if SpoolService.is_engaged():
+            return None
+        sinks = current_app.config.get('INGESTION_SINKS', [])
+        model = next((model for sink, model in LOOKUP_MODELS.items() if sink in sinks), None)
+        if model is None:
+            return None
+        row = db.session.query(model.session_id, model.timestamp).filter(
+            model.client_session_id == client_session_id
+        ).order_by(desc(model.timestamp)).first()
+        return (row[0], row[1]) if row is not None else None
+
+    @staticmethod
+    def get_tracker() -> SessionTracker:
+        """Get the process-wide session tracker, creating it from config on first use"""
+        if _tracker['instance'] is None:
+            with _tracker_lock:
+                if _tracker['instance'] is None:
+                    _tracker['instance'] = SessionTracker(
+                        timedelta(seconds=current_app.config.get('SESSION_INACTIVITY_TIMEOUT', 1800)),
+                        current_app.config.get('SESSION_CACHE_SIZE', 100000),
+                        lookup=SessionizationService.lookup_last_event
+                        if current_app.config.get('SESSION_DB_LOOKUP', True) else None
+                    )
+        return _tracker['instance']
+
+    @staticmethod
+    def assign_session(client_session_id: Optional[str], timestamp: datetime) -> Optional[str]:
+        """
+        Get the derived session ID for an ingested event
+
+        Args:
+            client_session_id: Session ID sent by the tracker (may be None)
+            timestamp: Event time (UTC)
+
+        Returns:
+            Derived session ID, or client_session_id if sessionization is
+            disabled (SESSION_INACTIVITY_TIMEOUT=0) or no ID was sent
+        """
+        if not client_session_id or not current_app.config.get('SESSION_INACTIVITY_TIMEOUT', 1800):
+            return client_session_id
+        try:
+            return SessionizationService.get_tracker().assign(client_session_id, timestamp)
+        except Exception as e:
+            logger.error(f"Error assigning session for {client_session_id}: {str(e)}")
+            return client_session_id[:MAX_CLIENT_ID_LENGTH]
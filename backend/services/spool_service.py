@@ -0,0 +1,261 @@
+"""
+Spool service - keeps ingestion available while the database is down or slow
+
+When storing an event fails with a connection error or statement timeout,
+the enriched event is appended to a local segmented spool (utils/spool.py)
+and the database is not tried again for SPOOL_RETRY_INTERVAL seconds. While
+more than SPOOL_RESUME_BYTES of events are spooled, new events are appended
+behind them, so a background replayer can drain them into the database in
+bulk and in arrival order; below that, new events go to the database again
+while the replayer finishes the tail.
+
+Each process spools to its own directory under SPOOL_DIR, locked for the
+process lifetime. Directories left by processes that exited are adopted and
+drained by the next replay (on platforms with fcntl).
+"""
+from typing import Optional, List, Dict, Any, Callable
+from datetime import datetime
+from flask import current_app
+from models.database import DATABASE_UNAVAILABLE_ERRORS
+from models.db_instance import db
+from services.metrics_service import MetricsService
+from utils.spool import SegmentedSpool
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+WORKER_DIR_PREFIX = 'worker-'
+# A spool directory is created under this prefix and renamed once locked
+STAGING_DIR_PREFIX = '.new-'
+
+_state: Dict[str, Any] = {
+    'spool': None,
+    # monotonic time before which the database is not tried again
+    'retry_at': 0.0,
+    'replayer': None,
+    # Callable storing a batch of events, set by the ingestion service
+    'handler': None,
+}
+_state_lock = threading.Lock()
+
+
+def _encode(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Cannot spool value of type {type(value).__name__}")
+
+
+def _decode(record: Dict[str, Any]) -> Dict[str, Any]:
+    if isinstance(record.get('timestamp'), str):
+        record['timestamp'] = datetime.fromisoformat(record['timestamp'])
+    return record
+
+
+class SpoolService:
+    """Service for spooling events to local disk during database outages"""
+
+    @staticmethod
+    def set_replay_handler(handler: Callable[[List[Dict[str, Any]]], Any]) -> None:
+        """
+        Set the function that writes a batch of replayed events to the database
+
+        Args:
+            handler: Callable taking a list of enriched events; it must commit,
+                deal with events that cannot be stored itself, and raise one of
+                DATABASE_UNAVAILABLE_ERRORS if the database is unavailable
+        """
+        _state['handler'] = handler
+
+    @staticmethod
+    def is_enabled() -> bool:
+        return current_app.config.get('SPOOL_ENABLED', True)
+
+    @staticmethod
+    def get_spool() -> SegmentedSpool:
+        """Get this process's spool, creating and locking its directory on first use"""
+        if _state['spool'] is None:
+            with _state_lock:
+                if _state['spool'] is None:
+                    # Unique per process start: PIDs repeat across container restarts, and
+                    # a reused name would hide the previous run's spool from adoption
+                    name = f"{WORKER_DIR_PREFIX}{os.getpid()}-{uuid.uuid4().hex[:8]}"
+                    root = current_app.config['SPOOL_DIR']
+                    # Created and locked under a name replayers do not scan, so none can
+                    # adopt the new, not yet locked directory as an orphan. Without
+                    # fcntl orphans are never adopted, and Windows cannot rename a
+                    # directory holding open files
+                    staged = SegmentedSpool.supports_locking
+                    spool = SegmentedSpool(
+                        os.path.join(root, f"{STAGING_DIR_PREFIX}{name}" if staged else name),
+                        segment_bytes=current_app.config.get('SPOOL_SEGMENT_BYTES', 16 * 1024 * 1024),
+                        fsync_interval=current_app.config.get('SPOOL_FSYNC_INTERVAL', 0.2),
+                        encoder=_encode
+                    )
+                    if not spool.acquire():
+                        raise RuntimeError(f"Spool directory {spool.directory} is locked by another process")
+                    if staged:
+                        spool.move(os.path.join(root, name))
+                    MetricsService.register_gauge(
+                        'ingest_spool_pending_bytes', 'Bytes of spooled events waiting to be replayed',
+                        spool.pending_bytes
+                    )
+                    _state['spool'] = spool
+        return _state['spool']
+
+    @staticmethod
+    def is_engaged() -> bool:
+        """
+        Whether new events must go to the spool instead of the database
+
+        True while the database is in its retry back-off, and while more than
+        SPOOL_RESUME_BYTES of earlier events are still spooled (so a backlog
+        is stored in arrival order). Waiting for an empty spool instead would
+        keep a busy process spooling long after the database recovered.
+        """
+        if time.monotonic() < _state['retry_at']:
+            return True
+        spool = _state['spool']
+        if spool is None or spool.is_empty:
+            return False
+        return spool.pending_bytes() > current_app.config.get('SPOOL_RESUME_BYTES', 1024 * 1024)
+
+    @staticmethod
+    def trip(error: Exception) -> None:
+        """Stop trying the database for SPOOL_RETRY_INTERVAL seconds after a failure"""
+        retry_interval = current_app.config.get('SPOOL_RETRY_INTERVAL', 5)
+        if time.monotonic() >= _state['retry_at']:
+            logger.warning(f"Database unavailable for ingestion, spooling events: {str(error)}")
+        _state['retry_at'] = time.monotonic() + retry_interval
+
+    @staticmethod
+    def append(event: Dict[str, Any]) -> None:
+        """
+        Spool one enriched event and make sure the replayer is running
+
+        Args:
+            event: Enriched event (see IngestionService.enrich)
+        """
+        SpoolService.get_spool().append(event)
+        MetricsService.record_spool('spooled')
+        SpoolService.start_replayer(current_app._get_current_object())
+
+    @staticmethod
+    def _orphaned_directories() -> List[str]:
+        """Spool directories other than this process's own, live or not"""
+        root = current_app.config['SPOOL_DIR']
+        spool = _state['spool']
+        own = os.path.basename(spool.directory) if spool is not None else None
+        if not os.path.isdir(root):
+            return []
+        return sorted(
+            os.path.join(root, name) for name in os.listdir(root)
+            if name.startswith(WORKER_DIR_PREFIX) and name != own
+        )
+
+    @staticmethod
+    def _replay_batch(records: List[Dict[str, Any]]) -> None:
+        try:
+            _state['handler']([_decode(record) for record in records])
+        except Exception:
+            db.session.rollback()
+            raise
+        MetricsService.record_spool('replayed', len(records))
+
+    @staticmethod
+    def replay() -> Dict[str, int]:
+        """
+        Drain this process's spool and any orphaned spools into the database
+
+        Returns:
+            Dictionary with the number of events replayed and spool
+            directories adopted
+
+        Raises:
+            Exception: If the database is still unavailable; events not yet
+                replayed stay spooled
+        """
+        if _state['handler'] is None:
+            raise RuntimeError('No spool replay handler registered')
+        batch_size = current_app.config.get('SPOOL_REPLAY_BATCH_SIZE', 1000)
+        summary = {'replayed': 0, 'adopted': 0}
+
+        orphaned = SpoolService._orphaned_directories() if SegmentedSpool.supports_locking else []
+        for directory in orphaned:
+            orphan = SegmentedSpool(directory, encoder=_encode)
+            if not orphan.acquire():
+                continue  # Owned by a live process
+            try:
+                summary['replayed'] += orphan.drain(SpoolService._replay_batch, batch_size)
+            finally:
+                orphan.release()
+            shutil.rmtree(directory, ignore_errors=True)
+            summary['adopted'] += 1
+            logger.info(f"Adopted and drained orphaned spool {directory}")
+
+        spool = _state['spool']
+        if spool is not None:
+            while not spool.is_empty:
+                summary['replayed'] += spool.drain(SpoolService._replay_batch, batch_size)
+
+        if summary['replayed']:
+            logger.info(f"Replayed {summary['replayed']} spooled events")
+        return summary
+
+    @staticmethod
+    def start_replayer(app) -> None:
+        """Start the background replayer thread unless it is already running"""
+        with _state_lock:
+            replayer: Optional[threading.Thread] = _state['replayer']
+            if replayer is not None and replayer.is_alive():
+                return
+            replayer = threading.Thread(target=SpoolService._replay_loop, args=(app,), name='spool-replayer', daemon=True)
+            _state['replayer'] = replayer
+            replayer.start()
+
+    @staticmethod
+    def _replay_loop(app) -> None:
+        interval = app.config.get('SPOOL_RETRY_INTERVAL', 5)
+        # Back off before the first attempt too: the database just failed
+        time.sleep(max(interval, 0.1))
+        while True:
+            with app.app_context():
+                try:
+                    SpoolService.replay()
+                    _state['retry_at'] = 0.0
+                except DATABASE_UNAVAILABLE_ERRORS as e:
+                    SpoolService.trip(e)
+                    time.sleep(max(interval, 0.1))
+                    continue
+                except Exception as e:
+                    # Not an outage, so new events keep going to the database
+                    logger.error(f"Error replaying spooled events: {str(e)}")
+                    time.sleep(max(interval, 0.1))
+                    continue
+                finally:
+                    db.session.remove()
+
+                with _state_lock:
+                    spool = _state['spool']
+                    if spool is None or spool.is_empty:
+                        _state['replayer'] = None
+                        return
+
+    @staticmethod
+    def init_app(app) -> None:
+        """
+        Start replaying events spooled before a restart, if there are any
+
+        Args:
+            app: Flask application
+        """
+        with app.app_context():
+            if not SpoolService.is_enabled():
+                return
+            root = app.config['SPOOL_DIR']
+            if os.path.isdir(root) and any(name.startswith(WORKER_DIR_PREFIX) for name in os.listdir(root)):
+                SpoolService.start_replayer(app)
@@ -3,10 +3,11 @@ Statistics service - business logic for comprehensive analytics
 """
 from typing import Optional, List, Dict, Any
 from datetime import datetime, timedelta
-from sqlalchemy import func, desc, and_
-from models.db_instance import db
+from sqlalchemy import func, desc, and_, false
+from models.database import get_read_session, disable_transaction_statement_timeout
 from models.db_models import Visit
 from services.base_service import BaseService
+from services.realtime_service import RealtimeService
 import logging
 import csv
 import io
@@ -21,38 +22,45 @@ class StatsService(BaseService):
     def get_visit_stats() -> Dict[str, Any]:
         """Get comprehensive visit statistics"""
         try:
+            session = get_read_session()
+            # Flagged bot traffic is left out of all statistics
+            human = Visit.is_bot == false()
+            
             # Total visits
-            total_visits = Visit.query.count()
+            total_visits = session.query(Visit).filter(human).count()
             
             # Unique visitors (by IP)
-            unique_visitors = db.session.query(func.count(func.distinct(Visit.ip_address))).scalar()
+            unique_visitors = session.query(func.count(func.distinct(Visit.ip_address))).filter(human).scalar()
             
             # Page views (visits without event_name or with event_name='page_view')
-            page_views = Visit.query.filter(
+            page_views = session.query(Visit).filter(
+                human,
                 (Visit.event_name.is_(None)) | (Visit.event_name == 'page_view')
             ).count()
             
             # Calculate bounce rate (sessions with only one page view)
-            session_counts = db.session.query(
+            session_counts = session.query(
                 Visit.session_id,
                 func.count(Visit.id).label('page_count')
             ).filter(
+                human,
                 Visit.session_id.isnot(None),
                 (Visit.event_name.is_(None)) | (Visit.event_name == 'page_view')
             ).group_by(Visit.session_id).subquery()
             
-            total_sessions = db.session.query(func.count()).select_from(session_counts).scalar()
-            bounce_sessions = db.session.query(func.count()).select_from(session_counts).filter(
+            total_sessions = session.query(func.count()).select_from(session_counts).scalar()
+            bounce_sessions = session.query(func.count()).select_from(session_counts).filter(
                 session_counts.c.page_count == 1
             ).scalar()
             
             bounce_rate = (bounce_sessions / total_sessions * 100) if total_sessions > 0 else 0
             
             # Average session duration
-            session_durations = db.session.query(
+            session_durations = session.query(
                 Visit.session_id,
                 (func.max(Visit.timestamp) - func.min(Visit.timestamp)).label('duration')
             ).filter(
+                human,
                 Visit.session_id.isnot(None)
             ).group_by(Visit.session_id).having(
                 func.count(Visit.id) > 1
@@ -65,67 +73,76 @@ class StatsService(BaseService):
                 avg_duration = None
             
             # Top pages
-            top_pages = db.session.query(
+            top_pages = session.query(
                 Visit.page_url,
                 func.count(Visit.id).label('count')
+            ).filter(
+                human
             ).group_by(Visit.page_url).order_by(desc('count')).limit(10).all()
             
             # Top referrers
-            top_referrers = db.session.query(
+            top_referrers = session.query(
                 Visit.referrer,
                 func.count(Visit.id).label('count')
             ).filter(
+                human,
                 Visit.referrer.isnot(None),
                 Visit.referrer != ''
             ).group_by(Visit.referrer).order_by(desc('count')).limit(10).all()
             
             # Countries
-            countries = db.session.query(
+            countries = session.query(
                 Visit.country,
                 func.count(Visit.id).label('count')
             ).filter(
+                human,
                 Visit.country.isnot(None)
             ).group_by(Visit.country).order_by(desc('count')).limit(10).all()
             
             # Browsers
-            browsers = db.session.query(
+            browsers = session.query(
                 Visit.browser,
                 func.count(Visit.id).label('count')
             ).filter(
+                human,
                 Visit.browser.isnot(None)
             ).group_by(Visit.browser).order_by(desc('count')).limit(10).all()
             
             # Operating systems
-            operating_systems = db.session.query(
+            operating_systems = session.query(
                 Visit.os,
                 func.count(Visit.id).label('count')
             ).filter(
+                human,
                 Visit.os.isnot(None)
             ).group_by(Visit.os).order_by(desc('count')).limit(10).all()
             
             # Devices
-            devices = db.session.query(
+            devices = session.query(
                 Visit.device,
                 func.count(Visit.id).label('count')
             ).filter(
+                human,
                 Visit.device.isnot(None)
             ).group_by(Visit.device).order_by(desc('count')).limit(10).all()
             
             # Hourly visits (last 24 hours)
             last_24h = datetime.utcnow() - timedelta(hours=24)
-            hourly_visits = db.session.query(
+            hourly_visits = session.query(
                 func.extract('hour', Visit.timestamp).label('hour'),
                 func.count(Visit.id).label('count')
             ).filter(
+                human,
                 Visit.timestamp >= last_24h
             ).group_by(func.extract('hour', Visit.timestamp)).order_by('hour').all()
             
             # Daily visits (last 30 days)
             last_30d = datetime.utcnow() - timedelta(days=30)
-            daily_visits = db.session.query(
+            daily_visits = session.query(
                 func.date(Visit.timestamp).label('date'),
                 func.count(Visit.id).label('count')
             ).filter(
+                human,
                 Visit.timestamp >= last_30d
             ).group_by(func.date(Visit.timestamp)).order_by('date').all()
             
@@ -168,7 +185,11 @@ class StatsService(BaseService):
     def generate_stats_csv() -> Optional[io.StringIO]:
         """Generate CSV file with visit statistics"""
         try:
-            visits = Visit.query.order_by(desc(Visit.timestamp)).all()
+            session = get_read_session()
+            # The export reads every visit; don't cut it off at DB_STATEMENT_TIMEOUT_MS
+            disable_transaction_statement_timeout(session)
+            
+            visits = session.query(Visit).order_by(desc(Visit.timestamp)).all()
             
             if not visits:
                 return None
@@ -214,28 +235,35 @@ class StatsService(BaseService):
     def get_comprehensive_stats(days: int = 30) -> Dict[str, Any]:
         """Get comprehensive statistics for a specified time period"""
         try:
+            session = get_read_session()
+            
             cutoff_date = datetime.utcnow() - timedelta(days=days)
+            # Flagged bot traffic is left out of all statistics
+            human = Visit.is_bot == false()
             
             # Total page views
-            total_page_views = Visit.query.filter(
+            total_page_views = session.query(Visit).filter(
                 Visit.timestamp >= cutoff_date,
+                human,
                 (Visit.event_name.is_(None)) | (Visit.event_name == 'page_view')
             ).count()
             
             # Unique sessions
-            unique_sessions = db.session.query(
+            unique_sessions = session.query(
                 func.count(func.distinct(Visit.session_id))
             ).filter(
                 Visit.timestamp >= cutoff_date,
+                human,
                 Visit.session_id.isnot(None)
             ).scalar()
             
             # Average session duration
-            session_durations = db.session.query(
+            session_durations = session.query(
                 Visit.session_id,
                 (func.max(Visit.timestamp) - func.min(Visit.timestamp)).label('duration')
             ).filter(
                 Visit.timestamp >= cutoff_date,
+                human,
                 Visit.session_id.isnot(None)
             ).group_by(Visit.session_id).having(
                 func.count(Visit.id) > 1
@@ -247,66 +275,73 @@ class StatsService(BaseService):
                 avg_session_duration = round(avg_duration / 60, 2)  # Convert to minutes
             
             # Daily stats
-            daily_stats = db.session.query(
+            daily_stats = session.query(
                 func.date(Visit.timestamp).label('date'),
                 func.count(Visit.id).label('page_views')
             ).filter(
                 Visit.timestamp >= cutoff_date,
+                human,
                 (Visit.event_name.is_(None)) | (Visit.event_name == 'page_view')
             ).group_by(func.date(Visit.timestamp)).order_by(desc('date')).all()
             
             # Top pages
-            top_pages = db.session.query(
+            top_pages = session.query(
                 Visit.page_url,
                 func.count(Visit.id).label('views')
             ).filter(
                 Visit.timestamp >= cutoff_date,
+                human,
                 (Visit.event_name.is_(None)) | (Visit.event_name == 'page_view')
             ).group_by(Visit.page_url).order_by(desc('views')).limit(10).all()
             
             # Top referrers
-            top_referrers = db.session.query(
+            top_referrers = session.query(
                 Visit.referrer,
                 func.count(Visit.id).label('count')
             ).filter(
                 Visit.timestamp >= cutoff_date,
+                human,
                 Visit.referrer.isnot(None),
                 Visit.referrer != ''
             ).group_by(Visit.referrer).order_by(desc('count')).limit(10).all()
             
             # Browser stats
-            browser_stats = db.session.query(
+            browser_stats = session.query(
                 Visit.browser,
                 func.count(Visit.id).label('count')
             ).filter(
                 Visit.timestamp >= cutoff_date,
+                human,
                 Visit.browser.isnot(None)
             ).group_by(Visit.browser).order_by(desc('count')).limit(10).all()
             
             # OS stats
-            os_stats = db.session.query(
+            os_stats = session.query(
                 Visit.os,
                 func.count(Visit.id).label('count')
             ).filter(
                 Visit.timestamp >= cutoff_date,
+                human,
                 Visit.os.isnot(None)
             ).group_by(Visit.os).order_by(desc('count')).limit(10).all()
             
             # Device stats
-            device_stats = db.session.query(
+            device_stats = session.query(
                 Visit.device,
                 func.count(Visit.id).label('count')
             ).filter(
                 Visit.timestamp >= cutoff_date,
+                human,
                 Visit.device.isnot(None)
             ).group_by(Visit.device).order_by(desc('count')).limit(5).all()
             
             # Country stats
-            country_stats = db.session.query(
+            country_stats = session.query(
                 Visit.country,
                 func.count(Visit.id).label('count')
             ).filter(
                 Visit.timestamp >= cutoff_date,
+                human,
                 Visit.country.isnot(None)
             ).group_by(Visit.country).order_by(desc('count')).limit(10).all()
             
@@ -340,42 +375,20 @@ class StatsService(BaseService):
     
     @staticmethod
     def get_realtime_stats() -> Dict[str, Any]:
-        """Get real-time statistics"""
+        """
+        Get real-time statistics
+        
+        Served from the in-memory sliding window fed by ingestion and seeded
+        from the database at startup, so no queries are run.
+        """
         try:
-            now = datetime.utcnow()
-            
-            # Active sessions (last 30 minutes)
-            active_sessions = db.session.query(
-                func.count(func.distinct(Visit.session_id))
-            ).filter(
-                Visit.timestamp >= now - timedelta(minutes=30),
-                Visit.session_id.isnot(None)
-            ).scalar()
-            
-            # Page views in last hour
-            hourly_views = Visit.query.filter(
-                Visit.timestamp >= now - timedelta(hours=1),
-                (Visit.event_name.is_(None)) | (Visit.event_name == 'page_view')
-            ).count()
-            
-            # Most visited page today
-            today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
-            top_pages_today = db.session.query(
-                Visit.page_url,
-                func.count(Visit.id).label('views')
-            ).filter(
-                Visit.timestamp >= today_start,
-                (Visit.event_name.is_(None)) | (Visit.event_name == 'page_view')
-            ).group_by(Visit.page_url).order_by(desc('views')).limit(5).all()
-            
-            # Recent visits (last 10)
-            recent_visits = Visit.query.order_by(desc(Visit.timestamp)).limit(10).all()
+            stats = RealtimeService.get_visit_stats()
             
             return {
-                'active_sessions': active_sessions,
-                'hourly_views': hourly_views,
-                'top_pages_today': [{'page_url': p.page_url, 'views': p.views} for p in top_pages_today],
-                'recent_visits': [visit.to_dict() for visit in recent_visits]
+                'active_sessions': stats['active_sessions'],
+                'hourly_views': stats['page_views_last_hour'],
+                'top_pages_today': stats['top_pages_today'],
+                'recent_visits': stats['recent_events']
             }
             
         except Exception as e:
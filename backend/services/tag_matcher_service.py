@@ -0,0 +1,273 @@
+"""
+Tag matcher service - compiles tag triggers into server-side matchers
+
+A trigger is either a plain event name ('page_view', 'click', ...) or a JSON
+object such as:
+
+    {"type": "page_view", "url": "/checkout/*", "properties": {"plan": {"in": ["pro", "team"]}}}
+
+Supported keys:
+    type / event: Event name, or a list of names; 'all_pages' matches any page view
+    url:          Glob pattern ('*' wildcard), matched against the full URL if it
+                  contains '://', otherwise against the URL path
+    url_regex:    Regular expression searched in the full URL
+    properties:   Mapping of property name to a value (equality) or an operator
+                  dict using eq, ne, in, nin, contains, gt, gte, lt, lte, exists
+    target:       CSS selector for click triggers; evaluated in the browser only
+"""
+from typing import Optional, Dict, Any, List, Callable, Tuple
+from urllib.parse import urlsplit
+from services.tag_snapshot_service import TagSnapshotService
+import fnmatch
+import json
+import logging
+import re
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Trigger names that fire on every page view regardless of URL
+PAGE_VIEW_EVENT = 'page_view'
+ALL_PAGES_TRIGGER = 'all_pages'
+
+_PROPERTY_OPERATORS: Dict[str, Callable[[Any, Any], bool]] = {
+    'eq': lambda actual, expected: actual == expected,
+    'ne': lambda actual, expected: actual != expected,
+    'in': lambda actual, expected: actual in expected,
+    'nin': lambda actual, expected: actual not in expected,
+    'contains': lambda actual, expected: actual is not None and expected in actual,
+    'gt': lambda actual, expected: actual is not None and actual > expected,
+    'gte': lambda actual, expected: actual is not None and actual >= expected,
+    'lt': lambda actual, expected: actual is not None and actual < expected,
+    'lte': lambda actual, expected: actual is not None and actual <= expected,
+}
+
+_compiled: Dict[str, Any] = {'version': None, 'by_event': {}, 'any_event': []}
+_compile_lock = threading.Lock()
+
+
+class CompiledTrigger:
+    """A tag trigger compiled into URL and property predicates"""
+
+    __slots__ = ('tag', 'events', 'url_pattern', 'url_on_path', 'url_regex', 'predicates')
+
+    def __init__(self, tag: Dict[str, Any], events: Optional[Tuple[str, ...]],
+                 url_pattern=None, url_on_path: bool = True, url_regex=None,
+                 predicates: Optional[List[Callable[[Dict[str, Any]], bool]]] = None):
+        self.tag = tag
+        self.events = events
+        self.url_pattern = url_pattern
+        self.url_on_path = url_on_path
+        self.url_regex = url_regex
+        self.predicates = predicates or []
+
+    def matches_event(self, event: str) -> bool:
+        """Check the event name, for callers that do not use the event index"""
+        if self.events is None:
+            return True
+        return event in self.events or (event == PAGE_VIEW_EVENT and ALL_PAGES_TRIGGER in self.events)
+
+    def matches(self, url: Optional[str], path: Optional[str], properties: Dict[str, Any]) -> bool:
+        """Check the URL and property predicates (the event is matched by the index)"""
+        if self.url_pattern is not None:
+            subject = path if self.url_on_path else url
+            if subject is None or not self.url_pattern.match(subject):
+                return False
+        if self.url_regex is not None and (url is None or not self.url_regex.search(url)):
+            return False
+        for predicate in self.predicates:
+            try:
+                if not predicate(properties):
+                    return False
+            except TypeError:
+                # e.g. comparing a string property with a number
+                return False
+        return True
+
+
+def _compile_property(name: str, condition: Any) -> Callable[[Dict[str, Any]], bool]:
+    """Compile one property condition into a predicate over an event's properties"""
+    if not isinstance(condition, dict):
+        return lambda properties: properties.get(name) == condition
+
+    checks = []
+    for operator, expected in condition.items():
+        if operator == 'exists':
+            checks.append(lambda properties, expected=expected: (name in properties) == bool(expected))
+            continue
+        compare = _PROPERTY_OPERATORS.get(operator)
+        if compare is None:
+            raise ValueError(f"Unknown property operator '{operator}'")
+        checks.append(
+            lambda properties, compare=compare, expected=expected: compare(properties.get(name), expected)
+        )
+    return lambda properties: all(check(properties) for check in checks)
+
+
+class TagMatcherService:
+    """Service for matching active tags against page URLs and events"""
+
+    @staticmethod
+    def parse_trigger(trigger: Optional[str]) -> Optional[Dict[str, Any]]:
+        """
+        Parse a trigger string into its object form
+
+        Args:
+            trigger: Plain event name or JSON object string
+
+        Returns:
+            Trigger dictionary, or None if the tag has no trigger
+        """
+        if not trigger:
+            return None
+        trigger = trigger.strip()
+        if trigger.startswith('{'):
+            parsed = json.loads(trigger)
+            if not isinstance(parsed, dict):
+                raise ValueError('Trigger JSON must be an object')
+            return parsed
+        return {'type': trigger}
+
+    @staticmethod
+    def compile_trigger(tag: Dict[str, Any]) -> Optional[CompiledTrigger]:
+        """
+        Compile a tag's trigger into a matcher
+
+        Args:
+            tag: Tag dictionary with a 'trigger' key
+
+        Returns:
+            CompiledTrigger, or None if the tag has no trigger
+
+        Raises:
+            ValueError: If the trigger is malformed
+        """
+        spec = TagMatcherService.parse_trigger(tag.get('trigger'))
+        if spec is None:
+            return None
+        return TagMatcherService.compile_spec(spec, tag)
+
+    @staticmethod
+    def compile_spec(spec: Dict[str, Any], tag: Optional[Dict[str, Any]] = None) -> CompiledTrigger:
+        """
+        Compile a trigger object into a matcher
+
+        Args:
+            spec: Trigger dictionary (type/event, url, url_regex, properties)
+            tag: Object the matcher reports on a match (e.g. the tag)
+
+        Returns:
+            CompiledTrigger
+
+        Raises:
+            ValueError: If the trigger is malformed
+        """
+        event = spec.get('type', spec.get('event'))
+        if event is None:
+            events = None
+        elif isinstance(event, str):
+            events = (event,)
+        elif isinstance(event, list) and all(isinstance(name, str) for name in event):
+            events = tuple(event)
+        else:
+            raise ValueError('Trigger type must be a string or a list of strings')
+
+        url_pattern = None
+        url_on_path = True
+        if spec.get('url'):
+            pattern = str(spec['url'])
+            url_on_path = '://' not in pattern
+            url_pattern = re.compile(fnmatch.translate(pattern))
+
+        url_regex = re.compile(spec['url_regex']) if spec.get('url_regex') else None
+
+        properties = spec.get('properties') or {}
+        if not isinstance(properties, dict):
+            raise ValueError('Trigger properties must be an object')
+        predicates = [_compile_property(name, condition) for name, condition in properties.items()]
+
+        return CompiledTrigger(tag or {}, events, url_pattern, url_on_path, url_regex, predicates)
+
+    @staticmethod
+    def compile_tags(tags: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Compile tags into an index keyed by event name
+
+        Tags whose trigger cannot be compiled are logged and skipped.
+
+        Args:
+            tags: Tag dictionaries
+
+        Returns:
+            Dictionary with 'by_event' (event -> matchers) and 'any_event' matchers
+        """
+        by_event: Dict[str, List[CompiledTrigger]] = {}
+        any_event: List[CompiledTrigger] = []
+
+        for tag in tags:
+            try:
+                compiled = TagMatcherService.compile_trigger(tag)
+            except (ValueError, re.error) as e:
+                logger.warning(f"Skipping tag {tag.get('id')} ({tag.get('name')}): invalid trigger: {str(e)}")
+                continue
+            if compiled is None:
+                continue
+            if compiled.events is None:
+                any_event.append(compiled)
+                continue
+            for event in compiled.events:
+                # 'all_pages' is an alias for page views on any URL
+                key = PAGE_VIEW_EVENT if event == ALL_PAGES_TRIGGER else event
+                by_event.setdefault(key, []).append(compiled)
+
+        return {'by_event': by_event, 'any_event': any_event}
+
+    @staticmethod
+    def get_compiled() -> Dict[str, Any]:
+        """
+        Get the compiled matchers for the current tag snapshot
+
+        The compiled set is rebuilt whenever the snapshot version changes.
+
+        Returns:
+            Compiled index as returned by compile_tags
+        """
+        snapshot = TagSnapshotService.get_snapshot()
+        if _compiled['version'] != snapshot['version']:
+            with _compile_lock:
+                if _compiled['version'] != snapshot['version']:
+                    compiled = TagMatcherService.compile_tags(snapshot['tags'])
+                    _compiled['by_event'] = compiled['by_event']
+                    _compiled['any_event'] = compiled['any_event']
+                    _compiled['version'] = snapshot['version']
+                    logger.info(f"Compiled tag triggers for snapshot {snapshot['version']}")
+        return _compiled
+
+    @staticmethod
+    def match(event: str = PAGE_VIEW_EVENT, url: Optional[str] = None,
+              properties: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """
+        Get the active tags whose trigger matches an event
+
+        Args:
+            event: Event name, e.g. 'page_view' or 'click'
+            url: Page URL the event occurred on
+            properties: Event properties for property predicates
+
+        Returns:
+            List of matching tag dictionaries, in snapshot order
+        """
+        compiled = TagMatcherService.get_compiled()
+        key = PAGE_VIEW_EVENT if event == ALL_PAGES_TRIGGER else event
+        candidates = compiled['by_event'].get(key, []) + compiled['any_event']
+        if not candidates:
+            return []
+
+        path = (urlsplit(url).path or '/') if url else None
+        properties = properties or {}
+
+        matched = {}
+        for candidate in candidates:
+            if candidate.tag['id'] not in matched and candidate.matches(url, path, properties):
+                matched[candidate.tag['id']] = candidate.tag
+        return sorted(matched.values(), key=lambda tag: tag['name'])
@@ -7,6 +7,7 @@ from sqlalchemy import desc
 from models.db_instance import db
 from models.db_models import Tag
 from services.base_service import BaseService
+from services.tag_snapshot_service import TagSnapshotService
 import logging
 
 logger = logging.getLogger(__name__)
@@ -41,6 +42,7 @@ class TagService(BaseService):
             
             db.session.add(tag)
             TagService.commit_changes()
+            TagSnapshotService.invalidate()
             
             logger.info(f"Created tag {tag.id}: {name}")
             return tag.id
@@ -123,6 +125,7 @@ class TagService(BaseService):
             tag.updated_at = datetime.utcnow()
             
             TagService.commit_changes()
+            TagSnapshotService.invalidate()
             logger.info(f"Updated tag {tag_id}: {tag.name}")
             return True
             
@@ -150,6 +153,7 @@ class TagService(BaseService):
                 logger.info(f"Hard deleted tag {tag_id}: {tag.name}")
             
             TagService.commit_changes()
+            TagSnapshotService.invalidate()
             return True
             
         except Exception as e:
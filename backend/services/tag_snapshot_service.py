@@ -0,0 +1,116 @@
+"""
+Tag snapshot service - in-memory, pre-serialised snapshot of active tags
+"""
+from typing import Optional, Dict, Any
+from flask import Response, current_app
+from models.db_models import Tag
+from schemas.tag_schemas import TagResponse, TagsListResponse
+from utils.validation import map_db_results_to_schemas
+from utils.serialization import dumps
+import hashlib
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+# 'snapshot' is replaced as a whole on rebuild, so readers never see a mix of
+# two snapshots' fields
+_state: Dict[str, Any] = {
+    'snapshot': {'version': None, 'etag': None, 'body': None, 'tags': []},
+    'built_at': 0.0,
+    'stale': True,
+}
+
+
+class TagSnapshotService:
+    """Service for serving active tags from a versioned in-memory snapshot"""
+
+    @staticmethod
+    def invalidate() -> None:
+        """Mark the snapshot stale so the next read rebuilds it"""
+        _state['stale'] = True
+
+    @staticmethod
+    def _is_fresh() -> bool:
+        ttl = current_app.config.get('TAG_SNAPSHOT_TTL', 30)
+        return not _state['stale'] and time.monotonic() - _state['built_at'] < ttl
+
+    @staticmethod
+    def rebuild() -> None:
+        """
+        Load active tags and serialise them once
+
+        The version is a digest of the serialised content, so every worker
+        process - and the same process after a restart - produces the same
+        version and ETag for the same tags, and a TTL-driven rebuild with
+        nothing new keeps clients' ETags valid.
+        """
+        # Clear the flag first so an invalidation racing with the load is not lost
+        _state['stale'] = False
+
+        try:
+            tags = Tag.query.filter_by(is_active=True).order_by(Tag.name).all()
+            payload = TagsListResponse(
+                tags=map_db_results_to_schemas([tag.to_dict() for tag in tags], TagResponse)
+            ).model_dump()
+            body = dumps(payload)
+        except Exception:
+            _state['stale'] = True
+            raise
+
+        version = hashlib.sha256(body).hexdigest()[:16]
+
+        if version != _state['snapshot']['version']:
+            _state['snapshot'] = {
+                'version': version,
+                'etag': f"tags-{version}",
+                'body': body,
+                'tags': payload['tags'],
+            }
+            logger.info(f"Rebuilt tag snapshot {version} with {len(payload['tags'])} active tags")
+
+        _state['built_at'] = time.monotonic()
+
+    @staticmethod
+    def get_snapshot() -> Dict[str, Any]:
+        """
+        Get the current snapshot, rebuilding it if stale
+
+        Tags can be changed through another worker process, so the snapshot
+        is also rebuilt after TAG_SNAPSHOT_TTL seconds.
+
+        Returns:
+            Dictionary with version (content digest), etag, serialised body
+            and tag response dicts; treat it as read-only
+        """
+        if not TagSnapshotService._is_fresh():
+            with _lock:
+                if not TagSnapshotService._is_fresh():
+                    TagSnapshotService.rebuild()
+
+        return _state['snapshot']
+
+    @staticmethod
+    def build_response(flask_request) -> Response:
+        """
+        Build the HTTP response for the tag list, honouring If-None-Match
+
+        Args:
+            flask_request: Flask request object
+
+        Returns:
+            200 response with the serialised snapshot, or 304 if unchanged
+        """
+        snapshot = TagSnapshotService.get_snapshot()
+        headers = {
+            'ETag': f'"{snapshot["etag"]}"',
+            'Cache-Control': 'no-cache',
+            'X-Tags-Version': snapshot['version'],
+        }
+
+        if flask_request.if_none_match.contains(snapshot['etag']):
+            return Response(status=304, headers=headers)
+
+        return Response(snapshot['body'], mimetype='application/json', headers=headers)
@@ -0,0 +1,109 @@
+"""
+Tracker bundle service - single-request tracker scripts with the active tags inlined
+"""
+from typing import Optional, Dict, Any, List, Tuple
+from flask import Response, current_app
+from services.script_cache_service import ScriptCacheService
+from services.tag_snapshot_service import TagSnapshotService
+import hashlib
+import json
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Script the bundle is built from; it reads window.VisitTrackerConfig.tags
+# instead of fetching /api/tags when the list is present
+BASE_SCRIPT = 'tracker-with-tags.min.js'
+
+# Only what the browser needs to evaluate and execute a tag
+BUNDLED_TAG_FIELDS = ('id', 'name', 'trigger', 'config')
+
+_bundles: Dict[Tuple[int, str], Dict[str, Any]] = {}
+_bundles_lock = threading.Lock()
+
+
+class TrackerBundleService:
+    """Service for building and serving tracker bundles with inlined tags"""
+
+    @staticmethod
+    def build_preamble(tags: List[Dict[str, Any]], version: str) -> str:
+        """
+        Build the configuration statement prepended to the base script
+
+        Args:
+            tags: Tag response dictionaries from the snapshot
+            version: Tag snapshot version (content digest)
+
+        Returns:
+            JavaScript statement assigning window.VisitTrackerConfig
+        """
+        bundled = [
+            {field: tag.get(field) for field in BUNDLED_TAG_FIELDS}
+            for tag in tags if tag.get('trigger')
+        ]
+        config = json.dumps(
+            {'tagsVersion': version, 'tags': bundled},
+            separators=(',', ':'),
+            default=str
+        )
+        # Keep a tag value containing "</script>" from ending an inline <script> block
+        config = config.replace('</', '<\\/')
+        return f'window.VisitTrackerConfig={config};\n'
+
+    @staticmethod
+    def get_bundle() -> Optional[Dict[str, Any]]:
+        """
+        Get the bundle for the current tag snapshot and base script
+
+        Bundles are cached by (tag version, base script etag); entries for
+        older versions are dropped when a new one is built.
+
+        Returns:
+            Cache entry with etag and encoded bodies, or None if the base script is missing
+        """
+        script = ScriptCacheService.get_script(BASE_SCRIPT)
+        if script is None:
+            return None
+
+        snapshot = TagSnapshotService.get_snapshot()
+        key = (snapshot['version'], script['etag'])
+        bundle = _bundles.get(key)
+        if bundle is not None:
+            return bundle
+
+        with _bundles_lock:
+            bundle = _bundles.get(key)
+            if bundle is not None:
+                return bundle
+
+            preamble = TrackerBundleService.build_preamble(snapshot['tags'], snapshot['version'])
+            body = preamble.encode('utf-8') + script['encodings']['identity']
+            digest = hashlib.sha256(body).hexdigest()[:32]
+            bundle = {
+                'etag': f"bundle-{digest}",
+                'encodings': ScriptCacheService.compress(body),
+            }
+
+            _bundles.clear()
+            _bundles[key] = bundle
+            logger.info(f"Built tracker bundle for tags {snapshot['version']} ({len(body)} bytes)")
+            return bundle
+
+    @staticmethod
+    def build_response(flask_request) -> Optional[Response]:
+        """
+        Build the HTTP response for the tracker bundle, honouring If-None-Match
+
+        Args:
+            flask_request: Flask request object
+
+        Returns:
+            200 or 304 response, or None if the base script does not exist
+        """
+        bundle = TrackerBundleService.get_bundle()
+        if bundle is None:
+            return None
+
+        max_age = current_app.config.get('TRACKER_BUNDLE_MAX_AGE', 300)
+        return ScriptCacheService.encoded_response(bundle, flask_request, max_age)
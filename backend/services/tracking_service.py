@@ -3,16 +3,23 @@ Tracking events service - business logic for event tracking
 """
 from typing import Optional, List, Dict, Any
 from datetime import datetime, timedelta
-from sqlalchemy import func, desc, and_, or_
+from sqlalchemy import func, desc, and_, or_, false
 from models.db_instance import db
+from models.database import get_read_session
 from models.db_models import TrackingEvent
 from services.base_service import BaseService
-from services.geolocation_service import GeolocationService
-from services.request_processing_service import RequestProcessingService
+from services.realtime_service import RealtimeService
+import itertools
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Rows fetched per round trip when streaming large results
+STREAM_BATCH_SIZE = 1000
+
+# Columns of TrackingEvent in to_dict() order; list endpoints accept any subset via ?fields=
+TRACKING_EVENT_FIELDS = [column.name for column in TrackingEvent.__table__.columns]
+
 
 class TrackingService(BaseService):
     """Service for tracking events operations"""
@@ -55,6 +62,7 @@ class TrackingService(BaseService):
             
             db.session.add(event)
             TrackingService.commit_changes()
+            RealtimeService.record_tracking_event(event.to_dict(), event.timestamp)
             
             logger.info(f"Created tracking event {event.id} for session {session_id}")
             return {
@@ -102,105 +110,142 @@ class TrackingService(BaseService):
         )
     
     @staticmethod
-    def get_tracking_events(limit: int = 100, offset: int = 0) -> List[Dict[str, Any]]:
-        """Get tracking events with pagination"""
+    def _list_events(criteria, limit: int, offset: int, fields: Optional[List[str]]) -> List[Dict[str, Any]]:
+        """List events newest first as plain dicts, loading only the requested columns"""
+        session = get_read_session()
+        fields = fields or TRACKING_EVENT_FIELDS
+        
+        query = TrackingService.select_rows(session, TrackingEvent, fields)
+        if criteria is not None:
+            query = query.filter(criteria)
+        rows = query.order_by(desc(TrackingEvent.timestamp)).limit(limit).offset(offset)
+        return TrackingService.rows_to_dicts(rows, fields)
+    
+    @staticmethod
+    def get_tracking_events(limit: int = 100, offset: int = 0, fields: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Get tracking events with pagination, optionally limited to some fields"""
         try:
-            events = TrackingEvent.query.order_by(desc(TrackingEvent.timestamp)).limit(limit).offset(offset).all()
-            return [event.to_dict() for event in events]
+            return TrackingService._list_events(None, limit, offset, fields)
         except Exception as e:
             logger.error(f"Error getting tracking events: {str(e)}")
             return []
     
     @staticmethod
-    def get_page_views(limit: int = 100, offset: int = 0) -> List[Dict[str, Any]]:
+    def get_page_views(limit: int = 100, offset: int = 0, fields: Optional[List[str]] = None) -> List[Dict[str, Any]]:
         """Get page views (excluding custom events)"""
         try:
-            events = TrackingEvent.query.filter(
-                or_(TrackingEvent.event_name.is_(None), TrackingEvent.event_name == '')
-            ).order_by(desc(TrackingEvent.timestamp)).limit(limit).offset(offset).all()
-            return [event.to_dict() for event in events]
+            return TrackingService._list_events(
+                or_(TrackingEvent.event_name.is_(None), TrackingEvent.event_name == ''),
+                limit, offset, fields
+            )
         except Exception as e:
             logger.error(f"Error getting page views: {str(e)}")
             return []
     
     @staticmethod
-    def get_custom_events(limit: int = 100, offset: int = 0) -> List[Dict[str, Any]]:
+    def get_custom_events(limit: int = 100, offset: int = 0, fields: Optional[List[str]] = None) -> List[Dict[str, Any]]:
         """Get custom events only"""
         try:
-            events = TrackingEvent.query.filter(
-                and_(TrackingEvent.event_name.is_not(None), TrackingEvent.event_name != '')
-            ).order_by(desc(TrackingEvent.timestamp)).limit(limit).offset(offset).all()
-            return [event.to_dict() for event in events]
+            return TrackingService._list_events(
+                and_(TrackingEvent.event_name.is_not(None), TrackingEvent.event_name != ''),
+                limit, offset, fields
+            )
         except Exception as e:
             logger.error(f"Error getting custom events: {str(e)}")
             return []
     
     @staticmethod
-    def get_session_data(session_id: str) -> Optional[Dict[str, Any]]:
-        """Get all tracking events for a specific session"""
-        try:
-            events = TrackingEvent.query.filter_by(session_id=session_id).order_by(TrackingEvent.timestamp).all()
-            
-            if not events:
-                return None
-            
-            # Calculate session metadata
-            first_event = events[0]
-            last_event = events[-1]
-            duration = None
-            if len(events) > 1:
-                duration = (last_event.timestamp - first_event.timestamp).total_seconds()
-            
-            return {
-                'session_id': session_id,
-                'events': [event.to_dict() for event in events],
-                'duration': duration,
-                'entry_page': first_event.page_url,
-                'exit_page': last_event.page_url,
-                'total_events': len(events)
-            }
+    def stream_session_events(session_id: str, fields: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Stream the events of a session without loading them all into memory
+        
+        Rows are fetched in batches of STREAM_BATCH_SIZE (a server-side cursor
+        on PostgreSQL). The summary is completed once the events are consumed.
+        
+        Args:
+            session_id: Session identifier
+            fields: Event fields to return (all if None)
             
-        except Exception as e:
-            logger.error(f"Error getting session data for {session_id}: {str(e)}")
+        Returns:
+            Dictionary with an 'events' iterator of dicts and a 'summary' dict
+            (total_events, duration, entry_page, exit_page), or None if the
+            session has no events
+        """
+        session = get_read_session()
+        fields = fields or TRACKING_EVENT_FIELDS
+        query_fields = list(fields) + [field for field in ('timestamp', 'page_url') if field not in fields]
+        timestamp_index = query_fields.index('timestamp')
+        page_url_index = query_fields.index('page_url')
+        
+        rows = iter(TrackingService.select_rows(session, TrackingEvent, query_fields).filter(
+            TrackingEvent.session_id == session_id
+        ).order_by(TrackingEvent.timestamp).yield_per(STREAM_BATCH_SIZE))
+        
+        first_row = next(rows, None)
+        if first_row is None:
             return None
+        
+        summary = {
+            'total_events': 0,
+            'duration': None,
+            'entry_page': first_row[page_url_index],
+            'exit_page': None
+        }
+        
+        def events():
+            last_row = first_row
+            for row in itertools.chain((first_row,), rows):
+                summary['total_events'] += 1
+                last_row = row
+                yield dict(zip(fields, row))
+            
+            summary['exit_page'] = last_row[page_url_index]
+            if summary['total_events'] > 1:
+                summary['duration'] = int((last_row[timestamp_index] - first_row[timestamp_index]).total_seconds())
+        
+        return {'events': events(), 'summary': summary}
     
     @staticmethod
     def get_session_analytics() -> Dict[str, Any]:
         """Get session analytics data"""
         try:
+            session = get_read_session()
+            # Flagged bot traffic is left out of all statistics
+            human = TrackingEvent.is_bot == false()
+            
             # Total sessions
-            total_sessions = db.session.query(func.count(func.distinct(TrackingEvent.session_id))).scalar()
+            total_sessions = session.query(func.count(func.distinct(TrackingEvent.session_id))).filter(human).scalar()
             
             # Average session duration (rough estimate)
             # This is a simplified calculation - in production you might want more sophisticated logic
-            avg_duration_query = db.session.query(
+            avg_duration_query = session.query(
                 func.avg(
                     func.extract('epoch', func.max(TrackingEvent.timestamp) - func.min(TrackingEvent.timestamp))
                 )
-            ).group_by(TrackingEvent.session_id).subquery()
+            ).filter(human).group_by(TrackingEvent.session_id).subquery()
             
-            avg_duration = db.session.query(func.avg(avg_duration_query.c.avg)).scalar()
+            avg_duration = session.query(func.avg(avg_duration_query.c.avg)).scalar()
             
             # Bounce rate (sessions with only one page view)
-            single_page_sessions = db.session.query(TrackingEvent.session_id).group_by(
+            single_page_sessions = session.query(TrackingEvent.session_id).filter(human).group_by(
                 TrackingEvent.session_id
             ).having(func.count(TrackingEvent.id) == 1).count()
             
             bounce_rate = (single_page_sessions / total_sessions * 100) if total_sessions > 0 else 0
             
             # Top entry pages
-            top_entry_pages = db.session.query(
+            top_entry_pages = session.query(
                 TrackingEvent.page_url,
                 func.count(TrackingEvent.id).label('count')
-            ).filter(TrackingEvent.is_entry_page == True).group_by(
+            ).filter(human, TrackingEvent.is_entry_page == True).group_by(
                 TrackingEvent.page_url
             ).order_by(desc('count')).limit(10).all()
             
             # Top exit pages
-            top_exit_pages = db.session.query(
+            top_exit_pages = session.query(
                 TrackingEvent.page_url,
                 func.count(TrackingEvent.id).label('count')
-            ).filter(TrackingEvent.is_exit_page == True).group_by(
+            ).filter(human, TrackingEvent.is_exit_page == True).group_by(
                 TrackingEvent.page_url
             ).order_by(desc('count')).limit(10).all()
             
@@ -226,38 +271,45 @@ class TrackingService(BaseService):
     def get_tracking_stats(days: int = 30) -> Dict[str, Any]:
         """Get comprehensive tracking statistics"""
         try:
+            session = get_read_session()
+            
             # Calculate date cutoff
             cutoff_date = datetime.now() - timedelta(days=days)
+            # Flagged bot traffic is left out of all statistics
+            human = TrackingEvent.is_bot == false()
             
             # Total page views
-            total_page_views = TrackingEvent.query.filter(
+            total_page_views = session.query(TrackingEvent).filter(
                 and_(
                     TrackingEvent.timestamp >= cutoff_date,
+                    human,
                     or_(TrackingEvent.event_name.is_(None), TrackingEvent.event_name == '')
                 )
             ).count()
             
             # Total custom events
-            total_custom_events = TrackingEvent.query.filter(
+            total_custom_events = session.query(TrackingEvent).filter(
                 and_(
                     TrackingEvent.timestamp >= cutoff_date,
+                    human,
                     TrackingEvent.event_name.is_not(None),
                     TrackingEvent.event_name != ''
                 )
             ).count()
             
             # Unique sessions
-            unique_sessions = db.session.query(
+            unique_sessions = session.query(
                 func.count(func.distinct(TrackingEvent.session_id))
-            ).filter(TrackingEvent.timestamp >= cutoff_date).scalar()
+            ).filter(TrackingEvent.timestamp >= cutoff_date, human).scalar()
             
             # Top pages
-            top_pages_query = db.session.query(
+            top_pages_query = session.query(
                 TrackingEvent.page_url,
                 func.count(TrackingEvent.id).label('views')
             ).filter(
                 and_(
                     TrackingEvent.timestamp >= cutoff_date,
+                    human,
                     or_(TrackingEvent.event_name.is_(None), TrackingEvent.event_name == '')
                 )
             ).group_by(TrackingEvent.page_url).order_by(desc('views')).limit(10)
@@ -265,12 +317,13 @@ class TrackingService(BaseService):
             top_pages = [{'page_url': page, 'views': views} for page, views in top_pages_query.all()]
             
             # Top events
-            top_events_query = db.session.query(
+            top_events_query = session.query(
                 TrackingEvent.event_name,
                 func.count(TrackingEvent.id).label('count')
             ).filter(
                 and_(
                     TrackingEvent.timestamp >= cutoff_date,
+                    human,
                     TrackingEvent.event_name.is_not(None),
                     TrackingEvent.event_name != ''
                 )
@@ -279,10 +332,10 @@ class TrackingService(BaseService):
             top_events = [{'event_name': event, 'count': count} for event, count in top_events_query.all()]
             
             # Daily stats
-            daily_stats_query = db.session.query(
+            daily_stats_query = session.query(
                 func.date(TrackingEvent.timestamp).label('date'),
                 func.count(TrackingEvent.id).label('events')
-            ).filter(TrackingEvent.timestamp >= cutoff_date).group_by(
+            ).filter(TrackingEvent.timestamp >= cutoff_date, human).group_by(
                 func.date(TrackingEvent.timestamp)
             ).order_by(desc('date'))
             
@@ -293,10 +346,10 @@ class TrackingService(BaseService):
             
             # Hourly stats (last 24 hours)
             hourly_cutoff = datetime.now() - timedelta(hours=24)
-            hourly_stats_query = db.session.query(
+            hourly_stats_query = session.query(
                 func.extract('hour', TrackingEvent.timestamp).label('hour'),
                 func.count(TrackingEvent.id).label('events')
-            ).filter(TrackingEvent.timestamp >= hourly_cutoff).group_by(
+            ).filter(TrackingEvent.timestamp >= hourly_cutoff, human).group_by(
                 func.extract('hour', TrackingEvent.timestamp)
             ).order_by('hour')
             
@@ -329,50 +382,20 @@ class TrackingService(BaseService):
     
     @staticmethod
     def get_realtime_stats() -> Dict[str, Any]:
-        """Get real-time tracking statistics"""
+        """
+        Get real-time tracking statistics
+        
+        Served from the in-memory sliding window fed by ingestion and seeded
+        from the database at startup, so no queries are run.
+        """
         try:
-            # Active sessions (last 30 minutes)
-            thirty_minutes_ago = datetime.now() - timedelta(minutes=30)
-            active_sessions = db.session.query(
-                func.count(func.distinct(TrackingEvent.session_id))
-            ).filter(TrackingEvent.timestamp >= thirty_minutes_ago).scalar()
-            
-            # Page views in last hour
-            one_hour_ago = datetime.now() - timedelta(hours=1)
-            page_views_last_hour = TrackingEvent.query.filter(
-                and_(
-                    TrackingEvent.timestamp >= one_hour_ago,
-                    or_(TrackingEvent.event_name.is_(None), TrackingEvent.event_name == '')
-                )
-            ).count()
-            
-            # Top pages today
-            today_start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-            top_pages_today_query = db.session.query(
-                TrackingEvent.page_url,
-                func.count(TrackingEvent.id).label('views')
-            ).filter(
-                and_(
-                    TrackingEvent.timestamp >= today_start,
-                    or_(TrackingEvent.event_name.is_(None), TrackingEvent.event_name == '')
-                )
-            ).group_by(TrackingEvent.page_url).order_by(desc('views')).limit(5)
-            
-            top_pages_today = [
-                {'page_url': page, 'views': views} 
-                for page, views in top_pages_today_query.all()
-            ]
-            
-            # Recent events (last 10 events)
-            recent_events = TrackingEvent.query.order_by(
-                desc(TrackingEvent.timestamp)
-            ).limit(10).all()
+            stats = RealtimeService.get_tracking_stats()
             
             return {
-                'active_sessions': active_sessions or 0,
-                'page_views_last_hour': page_views_last_hour,
-                'top_pages_today': top_pages_today,
-                'recent_events': [event.to_dict() for event in recent_events]
+                'active_sessions': stats['active_sessions'],
+                'page_views_last_hour': stats['page_views_last_hour'],
+                'top_pages_today': stats['top_pages_today'],
+                'recent_events': stats['recent_events']
             }
             
         except Exception as e:
@@ -401,69 +424,3 @@ class TrackingService(BaseService):
         except Exception as e:
             TrackingService.handle_db_error("update_exit_pages", e)
             return False
-    
-    @staticmethod
-    def process_tracking_event(
-        tracking_data: Dict[str, Any], 
-        request_metadata: Dict[str, Any]
-    ) -> Optional[Dict[str, Any]]:
-        """
-        Process a complete tracking event request with business logic
-        
-        Args:
-            tracking_data: Validated tracking data from request
-            request_metadata: Request metadata (IP, user agent, etc.)
-            
-        Returns:
-            Event result if successful, None otherwise
-        """
-        try:
-            # Extract and process request data
-            ip_address = request_metadata.get('ip_address')
-            user_agent = request_metadata.get('user_agent')
-            header_referrer = request_metadata.get('referer_header')
-            
-            # Resolve referrer
-            final_referrer = RequestProcessingService.resolve_referrer(
-                tracking_data.get('referrer'),
-                header_referrer
-            )
-            
-            # Handle geolocation if needed
-            country = tracking_data.get('country')
-            if GeolocationService.should_geolocate_ip(ip_address, country):
-                location_data = GeolocationService.get_location_from_ip(ip_address)
-                country = location_data.get('country')
-            
-            # Create the tracking event
-            result = TrackingService.add_tracking_event(
-                session_id=tracking_data.get('session_id'),
-                page_url=tracking_data.get('page_url'),
-                ip_address=ip_address,
-                user_agent=user_agent,
-                referrer=final_referrer,
-                browser=tracking_data.get('browser'),
-                os=tracking_data.get('os'),
-                device=tracking_data.get('device'),
-                country=country,
-                city=tracking_data.get('city'),
-                is_entry_page=tracking_data.get('is_entry_page', False),
-                is_exit_page=tracking_data.get('is_exit_page', False),
-                event_name=tracking_data.get('event_name'),
-                event_data=tracking_data.get('event_data')
-            )
-            
-            # Handle session exit page management
-            if (result and 
-                tracking_data.get('session_id') and 
-                not tracking_data.get('is_exit_page')):
-                TrackingService.update_exit_pages(
-                    tracking_data.get('session_id'), 
-                    result['id']
-                )
-            
-            return result
-            
-        except Exception as e:
-            logger.error(f"Error processing tracking event: {str(e)}")
-            return None
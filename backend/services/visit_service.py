@@ -5,14 +5,17 @@ from typing import Optional, List, Dict, Any
 from datetime import datetime, timedelta
 from sqlalchemy import func, desc, and_
 from models.db_instance import db
+from models.database import get_read_session
 from models.db_models import Visit
 from services.base_service import BaseService
-from services.geolocation_service import GeolocationService
-from services.request_processing_service import RequestProcessingService
+from services.realtime_service import RealtimeService
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Columns of Visit in to_dict() order; list queries accept any subset
+VISIT_FIELDS = [column.name for column in Visit.__table__.columns]
+
 
 class VisitService(BaseService):
     """Service for visit tracking operations"""
@@ -53,6 +56,7 @@ class VisitService(BaseService):
             
             db.session.add(visit)
             VisitService.commit_changes()
+            RealtimeService.record_visit(visit.to_dict(), visit.timestamp)
             
             logger.info(f"Created visit {visit.id} for page {page_url}")
             return visit.id
@@ -62,11 +66,14 @@ class VisitService(BaseService):
             return None
     
     @staticmethod
-    def get_visits(limit: int = 100, offset: int = 0) -> List[Dict[str, Any]]:
-        """Get visits with pagination"""
+    def get_visits(limit: int = 100, offset: int = 0, fields: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Get visits with pagination, optionally limited to some fields"""
         try:
-            visits = Visit.query.order_by(desc(Visit.timestamp)).limit(limit).offset(offset).all()
-            return [visit.to_dict() for visit in visits]
+            fields = fields or VISIT_FIELDS
+            rows = VisitService.select_rows(get_read_session(), Visit, fields).order_by(
+                desc(Visit.timestamp)
+            ).limit(limit).offset(offset)
+            return VisitService.rows_to_dicts(rows, fields)
         except Exception as e:
             logger.error(f"Error getting visits: {str(e)}")
             return []
@@ -82,11 +89,14 @@ class VisitService(BaseService):
             return None
     
     @staticmethod
-    def get_visits_by_session(session_id: str, limit: int = 100) -> List[Dict[str, Any]]:
+    def get_visits_by_session(session_id: str, limit: int = 100, fields: Optional[List[str]] = None) -> List[Dict[str, Any]]:
         """Get all visits for a specific session"""
         try:
-            visits = Visit.query.filter_by(session_id=session_id).order_by(Visit.timestamp).limit(limit).all()
-            return [visit.to_dict() for visit in visits]
+            fields = fields or VISIT_FIELDS
+            rows = VisitService.select_rows(get_read_session(), Visit, fields).filter(
+                Visit.session_id == session_id
+            ).order_by(Visit.timestamp).limit(limit)
+            return VisitService.rows_to_dicts(rows, fields)
         except Exception as e:
             logger.error(f"Error getting visits for session {session_id}: {str(e)}")
             return []
@@ -129,63 +139,3 @@ class VisitService(BaseService):
         except Exception as e:
             logger.error(f"Error getting unique sessions count: {str(e)}")
             return 0
-    
-    @staticmethod
-    def process_visit_tracking(
-        visit_data: Dict[str, Any], 
-        request_metadata: Dict[str, Any]
-    ) -> Optional[int]:
-        """
-        Process a complete visit tracking request with business logic
-        
-        Args:
-            visit_data: Validated visit data from request
-            request_metadata: Request metadata (IP, user agent, etc.)
-            
-        Returns:
-            Visit ID if successful, None otherwise
-        """
-        try:
-            # Extract and process request data
-            ip_address = request_metadata.get('ip_address')
-            user_agent = request_metadata.get('user_agent')
-            header_referrer = request_metadata.get('referer_header')
-            
-            # Resolve referrer
-            final_referrer = RequestProcessingService.resolve_referrer(
-                visit_data.get('referrer'),
-                header_referrer
-            )
-            
-            # Handle geolocation
-            country = visit_data.get('country')
-            if GeolocationService.should_geolocate_ip(ip_address, country):
-                location_data = GeolocationService.get_location_from_ip(ip_address)
-                country = location_data.get('country')
-            
-            # Create the visit
-            visit_id = VisitService.create_visit(
-                page_url=visit_data.get('page_url'),
-                ip_address=ip_address,
-                user_agent=user_agent,
-                referrer=final_referrer,
-                browser=visit_data.get('browser'),
-                os=visit_data.get('os'),
-                device=visit_data.get('device'),
-                country=country,
-                session_id=visit_data.get('session_id'),
-                is_entry_page=visit_data.get('is_entry_page', False),
-                is_exit_page=visit_data.get('is_exit_page', False),
-                event_name=visit_data.get('event_name'),
-                event_data=visit_data.get('event_data')
-            )
-            
-            # Handle session management for page visits (not events)
-            if visit_id and visit_data.get('session_id') and not visit_data.get('event_name'):
-                VisitService.update_exit_pages(visit_data.get('session_id'), visit_id)
-            
-            return visit_id
-            
-        except Exception as e:
-            logger.error(f"Error processing visit tracking: {str(e)}")
-            return None
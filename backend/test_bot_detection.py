@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Test script to verify bot detection User-Agent signatures
+"""
+import sys
+sys.path.append('.')
+
+from services.bot_detection_service import BotMatcher, DEFAULT_UA_SIGNATURES
+
+BOT_USER_AGENTS = [
+    'Mozilla/5.0 (compatible; Googlebot/2.1; +http://www.google.com/bot.html)',
+    'Mozilla/5.0 (compatible; bingbot/2.0; +http://www.bing.com/bingbot.htm)',
+    'Mozilla/5.0 (compatible; YandexBot/3.0; +http://yandex.com/bots)',
+    'Mozilla/5.0 (compatible; AhrefsBot/7.0; +http://ahrefs.com/robot/)',
+    'Mozilla/5.0 (Linux; Android 7.0;) AppleWebKit/537.36 (KHTML, like Gecko) Mobile Safari/537.36 '
+    '(compatible; PetalBot;+https://webmaster.petalsearch.com/site/petalbot)',
+    'Slackbot-LinkExpanding 1.0 (+https://api.slack.com/robots)',
+    'Twitterbot/1.0',
+    'Mozilla/5.0 AppleWebKit/537.36 (KHTML, like Gecko; compatible; GPTBot/1.2; +https://openai.com/gptbot)',
+    'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) HeadlessChrome/120.0.0.0 Safari/537.36',
+    'python-requests/2.31.0',
+    'curl/8.4.0',
+]
+
+HUMAN_USER_AGENTS = [
+    'Mozilla/5.0 (Linux; Android 10; CUBOT X30) AppleWebKit/537.36 (KHTML, like Gecko) '
+    'Chrome/120.0.0.0 Mobile Safari/537.36',
+    'Mozilla/5.0 (Linux; Android 11; CUBOT KINGKONG 5 Pro Build/RP1A.200720.011) AppleWebKit/537.36 '
+    '(KHTML, like Gecko) Chrome/119.0.0.0 Mobile Safari/537.36',
+    'Mozilla/5.0 (iPhone; CPU iPhone OS 17_2 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) '
+    'Version/17.2 Mobile/15E148 Safari/604.1',
+    'Mozilla/5.0 (Linux; Android 13; SM-S911B) AppleWebKit/537.36 (KHTML, like Gecko) '
+    'SamsungBrowser/23.0 Chrome/115.0.0.0 Mobile Safari/537.36',
+    'Mozilla/5.0 (Linux; Android 14; Pixel 8) AppleWebKit/537.36 (KHTML, like Gecko) '
+    'Chrome/120.0.0.0 Mobile Safari/537.36',
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:121.0) Gecko/20100101 Firefox/121.0',
+]
+
+
+def test_user_agent_signatures():
+    """Known crawlers are flagged and ordinary browsers, including CUBOT phones, are not"""
+    matcher = BotMatcher(DEFAULT_UA_SIGNATURES)
+    for user_agent in BOT_USER_AGENTS:
+        assert matcher.classify(user_agent, None) == 'user_agent', user_agent
+    for user_agent in HUMAN_USER_AGENTS:
+        assert matcher.classify(user_agent, None) is None, user_agent
+    print("✅ Bot detection User-Agent test completed successfully")
+
+
+if __name__ == '__main__':
+    test_user_agent_signatures()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Test script to verify event deduplication
+"""
+import sys
+sys.path.append('.')
+
+from flask import Flask
+from models.db_instance import db
+from models.db_models import TrackingEvent
+from services.deduplication_service import DeduplicationService
+from utils.recent_keys import RecentKeySet
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_window_expiry():
+    """A key is a duplicate within the window and accepted again after it"""
+    clock = FakeClock()
+    keys = RecentKeySet(window=60, capacity=10, clock=clock)
+    assert keys.add('a')
+    assert not keys.add('a') and 'a' in keys
+
+    clock.now += 30
+    assert keys.add('b')
+    clock.now += 31
+    # 'a' expired, 'b' is still inside the window
+    assert 'a' not in keys and 'b' in keys
+    assert keys.add('a') and not keys.add('b')
+    assert len(keys) == 2
+    print("✅ Recent key window expiry test completed successfully")
+
+
+def test_capacity_and_discard():
+    """The oldest key is forgotten early at capacity; discard() forgets a key at once"""
+    clock = FakeClock()
+    keys = RecentKeySet(window=60, capacity=2, clock=clock)
+    assert keys.add('a') and keys.add('b') and keys.add('c')
+    assert len(keys) == 2 and 'a' not in keys
+    assert keys.add('a')
+    assert 'b' not in keys
+
+    keys.discard('c')
+    keys.discard('missing')
+    assert 'c' not in keys and keys.add('c')
+
+    try:
+        RecentKeySet(window=60, capacity=0)
+        assert False, 'capacity 0 should be rejected'
+    except ValueError:
+        pass
+    print("✅ Recent key capacity and discard test completed successfully")
+
+
+def test_filter_new():
+    """Stored IDs and repeats within a batch are dropped; records without an ID are kept"""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        db.session.add(TrackingEvent(session_id='s1', page_url='/', client_event_id='stored'))
+        db.session.commit()
+
+        records = [
+            {'client_event_id': 'new', 'n': 0},
+            {'client_event_id': 'stored', 'n': 1},
+            {'client_event_id': None, 'n': 2},
+            {'client_event_id': 'new', 'n': 3},
+            {'n': 4},
+            {'client_event_id': 'other', 'n': 5},
+        ]
+        kept = DeduplicationService.filter_new(TrackingEvent, records)
+        assert [record['n'] for record in kept] == [0, 2, 4, 5]
+
+        without_ids = [{'n': 0}, {'n': 1}]
+        assert DeduplicationService.filter_new(TrackingEvent, without_ids) is without_ids
+        db.session.remove()
+    print("✅ Deduplication filter_new test completed successfully")
+
+
+if __name__ == '__main__':
+    test_window_expiry()
+    test_capacity_and_discard()
+    test_filter_new()
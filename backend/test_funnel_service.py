@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Test script to verify funnel progress within a session
+"""
+import sys
+sys.path.append('.')
+
+from datetime import datetime, timedelta
+from services.funnel_service import FunnelService
+
+START = datetime(2024, 1, 1, 12, 0, 0)
+WINDOW = timedelta(minutes=10)
+
+
+def _page(minutes, path):
+    return (START + timedelta(minutes=minutes), None, f"https://example.com{path}", None)
+
+
+def _event(minutes, name, data=None):
+    return (START + timedelta(minutes=minutes), name, 'https://example.com/', data)
+
+
+def _progress(steps, events):
+    compiled = [FunnelService.compile_step(step) for step in steps]
+    return FunnelService.session_progress(compiled, events, WINDOW)
+
+
+def test_elapsed_times():
+    """Elapsed times are measured from step 1 to each reached step"""
+    steps = ['/pricing', '/signup', {'event': 'purchase', 'properties': {'plan': 'pro'}}]
+    events = [
+        _page(0, '/pricing'),
+        _page(1, '/signup'),
+        _event(2, 'purchase', {'plan': 'team'}),
+        _event(3, 'purchase', {'plan': 'pro'}),
+    ]
+    assert _progress(steps, events) == (3, [0.0, 60.0, 180.0])
+    assert _progress(steps, events[:3]) == (2, [0.0, 60.0])
+    assert _progress(steps, [_page(0, '/signup')]) == (0, [])
+    print("✅ Funnel elapsed time test completed successfully")
+
+
+def test_reentry_after_window():
+    """A later entry into step 1 can complete the funnel after an earlier one expired"""
+    steps = ['/pricing', 'signup']
+    expired = [_page(0, '/pricing'), _event(20, 'signup')]
+    assert _progress(steps, expired) == (1, [0.0])
+
+    reentered = [_page(0, '/pricing'), _page(20, '/pricing'), _event(25, 'signup')]
+    # Step 1 counts from the first entry, step 2 from the entry that completed it
+    assert _progress(steps, reentered) == (2, [0.0, 300.0])
+    print("✅ Funnel re-entry test completed successfully")
+
+
+def test_one_step_per_event():
+    """An event matching several steps advances the chain by one step only"""
+    steps = ['click', 'click', 'click']
+    assert _progress(steps, [_event(0, 'click')]) == (1, [0.0])
+    assert _progress(steps, [_event(0, 'click'), _event(1, 'click')]) == (2, [0.0, 60.0])
+    three = [_event(0, 'click'), _event(1, 'click'), _event(2, 'click'), _event(3, 'click')]
+    assert _progress(steps, three) == (3, [0.0, 60.0, 120.0])
+    print("✅ Funnel one step per event test completed successfully")
+
+
+if __name__ == '__main__':
+    test_elapsed_times()
+    test_reentry_after_window()
+    test_one_step_per_event()
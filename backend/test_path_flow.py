@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Test script to verify Space-Saving counting and path flow session pages
+"""
+import sys
+sys.path.append('.')
+
+import random
+from collections import Counter
+from services.path_flow_service import PathFlowService
+from utils.top_k import SpaceSavingCounter
+
+
+def test_space_saving_eviction():
+    """A newcomer replaces the smallest key and inherits its count as error"""
+    counter = SpaceSavingCounter(2)
+    assert counter.is_exact
+    for key in ['a'] * 5 + ['b', 'c']:
+        counter.add(key)
+
+    assert counter.top(2) == [('a', 5, 0), ('c', 2, 1)]
+    assert counter.total == 7 and counter.evictions == 1 and not counter.is_exact
+
+    try:
+        SpaceSavingCounter(0)
+        assert False, 'capacity 0 should be rejected'
+    except ValueError:
+        pass
+    print("✅ Space-Saving eviction test completed successfully")
+
+
+def test_space_saving_error_bounds():
+    """Counts overestimate by at most their error, and frequent keys are always kept"""
+    rng = random.Random(7)
+    capacity = 20
+    counter = SpaceSavingCounter(capacity)
+    truth = Counter()
+    for _ in range(20000):
+        # Skewed: a few heavy keys over a long tail
+        key = f"page-{int(rng.paretovariate(1.2))}" if rng.random() < 0.7 else f"tail-{rng.randrange(500)}"
+        counter.add(key)
+        truth[key] += 1
+
+    assert len(counter) == capacity and counter.evictions > 0
+    for key, count, error in counter.top(capacity):
+        assert count - error <= truth[key] <= count, (key, count, error, truth[key])
+    kept = {key for key, _, _ in counter.top(capacity)}
+    for key, count in truth.items():
+        if count > counter.total / capacity:
+            assert key in kept, key
+    print("✅ Space-Saving error bound test completed successfully")
+
+
+def test_space_saving_compact():
+    """Stale heap entries are compacted away without changing the counts"""
+    counter = SpaceSavingCounter(3)
+    for key in ['a', 'b', 'c']:
+        counter.add(key)
+    for _ in range(50):
+        counter.add('a')
+        counter.add('b')
+        assert len(counter._heap) <= 4 * counter.capacity
+
+    # 'c' is still found as the minimum after compaction
+    counter.add('d')
+    assert counter.top(3) == [('a', 51, 0), ('b', 51, 0), ('d', 2, 1)]
+    print("✅ Space-Saving compaction test completed successfully")
+
+
+def test_session_pages():
+    """Consecutive views of one page (reloads, query variants) collapse into one"""
+    rows = [
+        ('s1', 'https://example.com/'),
+        ('s1', 'https://example.com/?utm_source=ad'),
+        ('s1', 'https://example.com/pricing'),
+        ('s1', 'https://example.com/pricing#plans'),
+        ('s1', None),
+        ('s1', 'https://example.com/'),
+        ('s1', '/signup?step=1'),
+        ('s1', '/signup?step=2'),
+    ]
+    assert PathFlowService.session_pages(rows) == [
+        'https://example.com/', 'https://example.com/pricing', 'https://example.com/', '/signup'
+    ]
+    assert PathFlowService.session_pages([]) == []
+    print("✅ Path flow session pages test completed successfully")
+
+
+if __name__ == '__main__':
+    test_space_saving_eviction()
+    test_space_saving_error_bounds()
+    test_space_saving_compact()
+    test_session_pages()
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Test script to verify realtime broadcaster ticks
+"""
+import sys
+sys.path.append('.')
+
+from datetime import datetime
+from services.realtime_service import SlidingWindowAggregator, RealtimeBroadcaster
+
+
+def test_idle_tick():
+    """A tick without new events pushes the first state, then nothing until it changes"""
+    aggregator = SlidingWindowAggregator()
+    broadcaster = RealtimeBroadcaster(aggregator, interval=60)
+    subscriber = broadcaster.subscribe()
+
+    update = broadcaster.tick()
+    assert update is not None and update['new_events'] == []
+    assert subscriber.get_nowait() is update
+    assert broadcaster.tick() is None
+
+    aggregator.record(datetime.utcnow(), 'session-1', 'https://example.com/', True, {'page_url': '/'})
+    update = broadcaster.tick()
+    assert update['active_sessions'] == 1 and len(update['new_events']) == 1
+    broadcaster.unsubscribe(subscriber)
+    print("✅ Realtime broadcaster idle tick test completed successfully")
+
+
+def test_interval_applied_on_start():
+    """The tick interval given by the subscriber that starts the thread is used"""
+    broadcaster = RealtimeBroadcaster(SlidingWindowAggregator(), interval=60)
+    first = broadcaster.subscribe(30)
+    second = broadcaster.subscribe(5)
+    # The thread is already running at the first subscriber's interval
+    assert broadcaster.interval == 30
+    broadcaster.unsubscribe(first)
+    broadcaster.unsubscribe(second)
+    print("✅ Realtime broadcaster interval test completed successfully")
+
+
+if __name__ == '__main__':
+    test_idle_tick()
+    test_interval_applied_on_start()
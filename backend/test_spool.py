@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the segmented spool and spool replay
+"""
+import sys
+sys.path.append('.')
+
+import os
+import tempfile
+from flask import Flask
+from services import spool_service
+from services.spool_service import SpoolService, STAGING_DIR_PREFIX
+from utils.spool import SegmentedSpool, OPEN_SUFFIX, lock_file
+
+
+def _segments(directory):
+    return sorted(name for name in os.listdir(directory) if name.startswith('segment-'))
+
+
+def test_drain_resumes_after_failure():
+    """A failed batch stops the drain and the next drain resumes at that batch"""
+    with tempfile.TemporaryDirectory() as directory:
+        spool = SegmentedSpool(directory, fsync_interval=0)
+        for n in range(5):
+            spool.append({'n': n})
+
+        handled = []
+
+        def failing_handler(batch):
+            if batch[0]['n'] == 2:
+                raise RuntimeError('database down')
+            handled.extend(record['n'] for record in batch)
+
+        try:
+            spool.drain(failing_handler, batch_size=2)
+            assert False, 'drain should re-raise handler errors'
+        except RuntimeError:
+            pass
+        assert handled == [0, 1] and not spool.is_empty
+
+        assert spool.drain(lambda batch: handled.extend(record['n'] for record in batch), batch_size=2) == 3
+        assert handled == [0, 1, 2, 3, 4]
+        assert spool.is_empty and _segments(directory) == []
+    print("✅ Spool drain and resume test completed successfully")
+
+
+def test_torn_last_line_skipped():
+    """A half-written final line from a crash is skipped, not replayed or fatal"""
+    with tempfile.TemporaryDirectory() as directory:
+        spool = SegmentedSpool(directory, fsync_interval=0)
+        spool.append({'n': 0})
+        spool.append({'n': 1})
+        spool.rotate()
+        with open(os.path.join(directory, _segments(directory)[0]), 'ab') as segment:
+            segment.write(b'{"n":')
+
+        drained = []
+        assert spool.drain(drained.extend) == 2
+        assert [record['n'] for record in drained] == [0, 1]
+    print("✅ Spool torn line test completed successfully")
+
+
+def test_acquire_seals_open_segments():
+    """Segments a crashed owner left open are closed and drainable after acquire()"""
+    with tempfile.TemporaryDirectory() as directory:
+        crashed = SegmentedSpool(directory, fsync_interval=0)
+        crashed.append({'n': 0})
+        assert _segments(directory)[0].endswith(OPEN_SUFFIX)
+
+        spool = SegmentedSpool(directory, fsync_interval=0)
+        assert spool.is_empty
+        assert spool.acquire()
+        assert not _segments(directory)[0].endswith(OPEN_SUFFIX) and not spool.is_empty
+
+        drained = []
+        assert spool.drain(drained.extend) == 1 and drained == [{'n': 0}]
+        spool.release()
+    print("✅ Spool acquire test completed successfully")
+
+
+def test_replay_adopts_orphaned_directories():
+    """replay() drains unlocked spools of exited processes and skips live and staging ones"""
+    if not SegmentedSpool.supports_locking:
+        print("Skipping orphan adoption test: directory locking is unavailable")
+        return
+    with tempfile.TemporaryDirectory() as root:
+        app = Flask(__name__)
+        app.config['SPOOL_DIR'] = root
+
+        orphan = SegmentedSpool(os.path.join(root, 'worker-1-0000aaaa'), fsync_interval=0)
+        orphan.append({'session_id': 'orphan', 'timestamp': '2024-01-01T00:00:00'})
+        live = SegmentedSpool(os.path.join(root, 'worker-2-0000bbbb'), fsync_interval=0)
+        live.append({'session_id': 'live'})
+        live.rotate()
+        live_lock = lock_file(os.path.join(live.directory, '.lock'))
+        staged = SegmentedSpool(os.path.join(root, f"{STAGING_DIR_PREFIX}worker-3-0000cccc"), fsync_interval=0)
+        staged.append({'session_id': 'staged'})
+        staged.rotate()
+
+        replayed = []
+        previous = dict(spool_service._state)
+        spool_service._state.update(spool=None, handler=replayed.extend)
+        try:
+            with app.app_context():
+                summary = SpoolService.replay()
+        finally:
+            spool_service._state.update(previous)
+            live_lock.close()
+
+        assert summary == {'replayed': 1, 'adopted': 1}
+        assert [event['session_id'] for event in replayed] == ['orphan']
+        assert replayed[0]['timestamp'].year == 2024
+        assert sorted(os.listdir(root)) == [f"{STAGING_DIR_PREFIX}worker-3-0000cccc", 'worker-2-0000bbbb']
+    print("✅ Spool orphan adoption test completed successfully")
+
+
+if __name__ == '__main__':
+    test_drain_resumes_after_failure()
+    test_torn_last_line_skipped()
+    test_acquire_seals_open_segments()
+    test_replay_adopts_orphaned_directories()
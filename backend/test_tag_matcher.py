@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Test script to verify server-side tag trigger matching
+"""
+import sys
+sys.path.append('.')
+
+from services.tag_matcher_service import TagMatcherService
+from services.tag_snapshot_service import TagSnapshotService
+
+
+def _matches(spec, url='https://example.com/', properties=None, path=None):
+    compiled = TagMatcherService.compile_spec(spec)
+    if path is None:
+        path = '/' + url.split('://', 1)[-1].split('/', 1)[-1].split('?', 1)[0]
+    return compiled.matches(url, path, properties or {})
+
+
+def test_url_matching():
+    """URL globs match the path unless they contain '://'; url_regex searches the full URL"""
+    url = 'https://shop.example.com/checkout/payment?step=2'
+    assert _matches({'url': '/checkout/*'}, url)
+    assert not _matches({'url': '/cart/*'}, url)
+    # A path glob does not see the host or query string
+    assert not _matches({'url': '*shop.example.com*'}, url)
+    assert _matches({'url': 'https://shop.example.com/checkout/*'}, url)
+    assert not _matches({'url': 'https://www.example.com/checkout/*'}, url)
+
+    assert _matches({'url_regex': r'step=\d'}, url)
+    assert _matches({'url_regex': r'^https://shop\.'}, url)
+    assert not _matches({'url_regex': r'^http://'}, url)
+    assert not TagMatcherService.compile_spec({'url_regex': 'step'}).matches(None, None, {})
+    print("✅ Tag matcher URL test completed successfully")
+
+
+def test_property_operators():
+    """Each property operator, plus comparisons that raise TypeError, which never match"""
+    properties = {'plan': 'pro', 'seats': 5, 'tags': ['beta', 'eu']}
+    cases = [
+        ({'plan': 'pro'}, True),
+        ({'plan': 'team'}, False),
+        ({'plan': {'eq': 'pro'}}, True),
+        ({'plan': {'ne': 'pro'}}, False),
+        ({'plan': {'in': ['pro', 'team']}}, True),
+        ({'plan': {'nin': ['pro', 'team']}}, False),
+        ({'tags': {'contains': 'beta'}}, True),
+        ({'tags': {'contains': 'us'}}, False),
+        ({'missing': {'contains': 'x'}}, False),
+        ({'seats': {'gt': 4}}, True),
+        ({'seats': {'gt': 5}}, False),
+        ({'seats': {'gte': 5}}, True),
+        ({'seats': {'lt': 5}}, False),
+        ({'seats': {'lte': 5}}, True),
+        ({'seats': {'gte': 2, 'lt': 10}}, True),
+        ({'missing': {'lt': 10}}, False),
+        ({'plan': {'exists': True}}, True),
+        ({'missing': {'exists': True}}, False),
+        ({'missing': {'exists': False}}, True),
+        # 'pro' > 3 raises TypeError
+        ({'plan': {'gt': 3}}, False),
+    ]
+    for condition, expected in cases:
+        assert _matches({'properties': condition}, properties=properties) is expected, condition
+
+    try:
+        TagMatcherService.compile_spec({'properties': {'plan': {'like': 'p%'}}})
+        assert False, 'unknown operators should be rejected'
+    except ValueError:
+        pass
+    print("✅ Tag matcher property operator test completed successfully")
+
+
+def test_compile_tags_and_match():
+    """all_pages fires on every page view, and tags with invalid triggers are skipped"""
+    tags = [
+        {'id': 1, 'name': 'Analytics', 'trigger': 'all_pages'},
+        {'id': 2, 'name': 'Checkout pixel', 'trigger': '{"type": "page_view", "url": "/checkout/*"}'},
+        {'id': 3, 'name': 'Signup click', 'trigger': '{"type": ["click"], "properties": {"id": "signup"}}'},
+        {'id': 4, 'name': 'Broken JSON', 'trigger': '{"type": '},
+        {'id': 5, 'name': 'Broken regex', 'trigger': '{"url_regex": "("}'},
+        {'id': 6, 'name': 'Broken operator', 'trigger': '{"properties": {"plan": {"like": "p"}}}'},
+        {'id': 7, 'name': 'No trigger', 'trigger': None},
+    ]
+    compiled = TagMatcherService.compile_tags(tags)
+    assert sorted(compiled['by_event']) == ['click', 'page_view']
+    assert compiled['any_event'] == []
+    assert [matcher.tag['id'] for matcher in compiled['by_event']['page_view']] == [1, 2]
+
+    snapshot = {'version': 'test', 'tags': tags}
+    get_snapshot = TagSnapshotService.get_snapshot
+    TagSnapshotService.get_snapshot = staticmethod(lambda: snapshot)
+    try:
+        def match_ids(*args, **kwargs):
+            return [tag['id'] for tag in TagMatcherService.match(*args, **kwargs)]
+
+        assert match_ids('page_view', 'https://example.com/') == [1]
+        assert match_ids('page_view', 'https://example.com/checkout/done') == [1, 2]
+        assert match_ids('all_pages', 'https://example.com/about') == [1]
+        assert match_ids('click', 'https://example.com/', {'id': 'signup'}) == [3]
+        assert match_ids('click', 'https://example.com/', {'id': 'login'}) == []
+    finally:
+        TagSnapshotService.get_snapshot = get_snapshot
+    print("✅ Tag matcher compile and match test completed successfully")
+
+
+if __name__ == '__main__':
+    test_url_matching()
+    test_property_operators()
+    test_compile_tags_and_match()
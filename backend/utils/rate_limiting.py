@@ -0,0 +1,30 @@
+"""
+Shared rate limiter and the limit classes applied to routes
+
+The limiter is bound to the app in app.py. Storage (RATELIMIT_STORAGE_URI),
+algorithm (RATELIMIT_STRATEGY) and the limit for unclassified routes
+(RATELIMIT_DEFAULT) are read from the app config by Flask-Limiter. Each
+class below is one budget per client IP shared by all routes in it, so for
+example a dashboard's parallel requests draw from a single read budget.
+"""
+from flask import current_app
+from flask_limiter import Limiter
+from flask_limiter.util import get_remote_address
+
+limiter = Limiter(key_func=get_remote_address)
+
+
+def _configured(key: str):
+    """Limit read from the app config on each request"""
+    return lambda: current_app.config[key]
+
+
+# /api/track, the tracker scripts and the tag lookups they make: requested
+# on every page view of every tracked site
+ingest_limit = limiter.shared_limit(_configured('RATELIMIT_INGEST'), scope='ingest')
+
+# Dashboard and API reads
+read_limit = limiter.shared_limit(_configured('RATELIMIT_READ'), scope='read')
+
+# CSV exports, which scan whole tables
+export_limit = limiter.shared_limit(_configured('RATELIMIT_EXPORT'), scope='export')
@@ -0,0 +1,66 @@
+"""
+Bounded, time-windowed set of recently seen keys
+"""
+from typing import Callable, Hashable
+from collections import OrderedDict
+import threading
+import time
+
+
+class RecentKeySet:
+    """
+    Remembers keys for `window` seconds, holding at most `capacity` of them
+
+    Keys are kept in insertion order, which is also expiry order, so expired
+    keys are trimmed from the front in amortised O(1) per add. When the set
+    is full the oldest key is forgotten early, so the window shrinks under
+    load rather than memory growing.
+    """
+
+    def __init__(self, window: float, capacity: int, clock: Callable[[], float] = time.monotonic):
+        if capacity < 1:
+            raise ValueError('capacity must be at least 1')
+        self.window = window
+        self.capacity = capacity
+        self._clock = clock
+        # key -> time added
+        self._keys: 'OrderedDict[Hashable, float]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            added = self._keys.get(key)
+            return added is not None and self._clock() - added < self.window
+
+    def add(self, key: Hashable) -> bool:
+        """
+        Add a key unless it was added within the window
+
+        Returns:
+            True if the key was added, False if it is a recent duplicate
+        """
+        now = self._clock()
+        with self._lock:
+            self._expire(now)
+            if key in self._keys:
+                return False
+            self._keys[key] = now
+            while len(self._keys) > self.capacity:
+                self._keys.popitem(last=False)
+            return True
+
+    def discard(self, key: Hashable) -> None:
+        """Forget a key, e.g. when the event it stands for failed to store"""
+        with self._lock:
+            self._keys.pop(key, None)
+
+    def _expire(self, now: float) -> None:
+        cutoff = now - self.window
+        while self._keys:
+            key, added = next(iter(self._keys.items()))
+            if added > cutoff:
+                break
+            self._keys.popitem(last=False)
@@ -0,0 +1,153 @@
+"""
+Fast JSON serialization for API responses
+"""
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional
+from datetime import date
+from pydantic import BaseModel
+from flask import Response, current_app, request, stream_with_context
+from werkzeug.http import http_date
+import dataclasses
+import decimal
+import logging
+import uuid
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; Flask's JSON provider is the fallback
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+if orjson is not None:
+    # Datetimes go through _default so the output matches Flask's jsonify
+    # (HTTP dates), keeping the wire format unchanged for existing clients
+    ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS | orjson.OPT_SORT_KEYS
+
+
+# Array items encoded per chunk when streaming
+STREAM_CHUNK_ITEMS = 200
+
+
+def _default(value: Any) -> Any:
+    """Encode the types Flask's default JSON provider supports"""
+    if isinstance(value, date):
+        return http_date(value)
+    if isinstance(value, (decimal.Decimal, uuid.UUID)):
+        return str(value)
+    if dataclasses.is_dataclass(value):
+        return dataclasses.asdict(value)
+    if hasattr(value, '__html__'):
+        return str(value.__html__())
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(payload: Any) -> bytes:
+    """
+    Serialize a payload to compact JSON bytes
+
+    Pydantic models are encoded straight from the model by pydantic-core,
+    without an intermediate model_dump() dict; response schemas use
+    HttpDateTime so datetimes keep jsonify's format. Payloads orjson cannot
+    encode (integers beyond 64 bits, e.g. from client-supplied event_data)
+    fall back to Flask's JSON provider.
+
+    Args:
+        payload: Pydantic model, ORM row (anything with to_dict()), or plain data
+
+    Returns:
+        UTF-8 encoded JSON that decodes to the same value as Flask's jsonify
+        output; unlike jsonify, non-ASCII characters are not \\u-escaped
+    """
+    if isinstance(payload, BaseModel):
+        return payload.model_dump_json().encode('utf-8')
+    if hasattr(payload, 'to_dict'):
+        payload = payload.to_dict()
+    if orjson is not None:
+        try:
+            return orjson.dumps(payload, default=_default, option=ORJSON_OPTIONS)
+        except TypeError:  # orjson.JSONEncodeError
+            pass
+    return current_app.json.dumps(payload, separators=(',', ':')).encode('utf-8')
+
+
+def json_response(payload: Any, status_code: int = 200, headers: Optional[Dict[str, str]] = None) -> Response:
+    """
+    Create a JSON response without going through jsonify
+
+    Args:
+        payload: Pydantic model, ORM row, or plain data
+        status_code: HTTP status code
+        headers: Extra response headers
+
+    Returns:
+        Flask Response with an application/json body
+    """
+    return Response(dumps(payload), status=status_code, mimetype='application/json', headers=headers)
+
+
+def stream_json_object(head: Dict[str, Any], array_key: str, items: Iterable[Any],
+                       tail: Optional[Callable[[], Dict[str, Any]]] = None,
+                       encode: Callable[[Any], bytes] = dumps) -> Iterator[bytes]:
+    """
+    Stream a JSON object holding one large array, encoding items as they arrive
+
+    Produces {**head, array_key: [items...], **tail()}. tail is called after
+    the items are consumed, so it can report totals gathered while streaming.
+
+    Args:
+        head: Keys written before the array
+        array_key: Key of the array
+        items: Iterable of array items (e.g. rows from a streamed query)
+        tail: Optional callable returning keys written after the array
+        encode: Encoder for one item
+
+    Yields:
+        Chunks of UTF-8 encoded JSON
+    """
+    opening = dumps(head)[:-1]
+    yield opening + (b',' if len(opening) > 1 else b'') + dumps(array_key) + b':['
+
+    separator = b''
+    batch = []
+    for item in items:
+        batch.append(encode(item))
+        if len(batch) >= STREAM_CHUNK_ITEMS:
+            yield separator + b','.join(batch)
+            separator = b','
+            batch = []
+    if batch:
+        yield separator + b','.join(batch)
+
+    closing = dumps(tail()) if tail is not None else b'{}'
+    yield b']' + (b',' + closing[1:] if len(closing) > 2 else b'}')
+
+
+def _log_stream_errors(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    try:
+        yield from chunks
+    except Exception as e:
+        logger.error(f"Error streaming response body for {request.path}: {str(e)}")
+        raise
+
+
+def streaming_json_response(chunks: Iterable[bytes], status_code: int = 200) -> Response:
+    """
+    Create a streamed JSON response
+
+    The request context is kept alive while the body is generated, so the
+    chunks may keep reading from a database session.
+
+    The status line is sent before the first chunk, so an error while
+    generating the body cannot turn into an error response. It is logged and
+    re-raised, and the server aborts the connection without ending the body:
+    clients see an incomplete response (and invalid JSON), never a complete
+    200 with a truncated body.
+
+    Args:
+        chunks: Iterable of encoded JSON chunks
+        status_code: HTTP status code
+
+    Returns:
+        Flask Response streaming the chunks
+    """
+    return Response(stream_with_context(_log_stream_errors(chunks)), status=status_code, mimetype='application/json')
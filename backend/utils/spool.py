@@ -0,0 +1,358 @@
+"""
+Segmented append-only log of JSON records with batched fsync
+
+Records are appended as JSON lines to the active segment file, which is
+rotated once it reaches `segment_bytes`. Appends only write to the OS page
+cache; a background thread fsyncs the active segment every `fsync_interval`
+seconds, so callers never wait on the disk and at most that much data is
+exposed to a power loss. Closed segments are immutable and are drained in
+order, with a checkpoint so a failed drain resumes where it stopped.
+
+The active segment carries an extra '.open' suffix that is dropped when it
+is closed, so another process can drain a live writer's closed segments
+(see drain(rotate=False)) without ever reading a half-written one.
+"""
+from typing import IO, Any, Callable, Dict, Iterator, List, Optional, Tuple
+import json
+import logging
+import os
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows: directories cannot be locked, so orphaned spools are not adopted
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_PREFIX = 'segment-'
+SEGMENT_SUFFIX = '.jsonl'
+OPEN_SUFFIX = '.open'
+CHECKPOINT_FILE = 'checkpoint.json'
+LOCK_FILE = '.lock'
+
+
+def _fsync_directory(directory: str) -> None:
+    """Persist file creations, renames and deletions in a directory"""
+    if not hasattr(os, 'O_DIRECTORY'):
+        return
+    fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def lock_file(path: str) -> Optional[IO]:
+    """
+    Open `path` and take a non-blocking exclusive lock on it
+
+    Returns:
+        The open file, which holds the lock until closed (always returned
+        without fcntl), or None if another live process holds the lock
+    """
+    handle = open(path, 'a')
+    if fcntl is None:
+        return handle
+    try:
+        fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        handle.close()
+        return None
+    return handle
+
+
+def _sequence(name: str) -> int:
+    return int(name[len(SEGMENT_PREFIX):].split('.', 1)[0])
+
+
+class SegmentedSpool:
+    """
+    Single-writer spool in one directory
+
+    `supports_locking` is False where fcntl is unavailable; acquire() then
+    always succeeds, so callers must not use it to detect other owners.
+
+    Args:
+        directory: Directory holding the segment files (created if missing)
+        segment_bytes: Size at which the active segment is closed
+        fsync_interval: Seconds between background fsyncs of the active
+            segment (0 fsyncs on every append)
+        encoder: JSON `default` hook for values json cannot serialize
+        max_segment_age: Seconds after which the active segment is closed
+            even if not full, bounding how long records wait for a reader in
+            another process (0 closes segments by size only)
+    """
+
+    supports_locking = fcntl is not None
+
+    def __init__(self, directory: str, segment_bytes: int = 16 * 1024 * 1024,
+                 fsync_interval: float = 0.2, encoder: Optional[Callable[[Any], Any]] = None,
+                 max_segment_age: float = 0):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.fsync_interval = fsync_interval
+        self.max_segment_age = max_segment_age
+        self._encoder = encoder
+        os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._lock_file = None
+        self._active = None
+        self._active_name = ''
+        self._active_size = 0
+        self._active_opened = 0.0
+        self._dirty = False
+        self._flusher: Optional[threading.Thread] = None
+        self._closed: List[str] = self._list_closed()
+        # New appends always start a new segment after any left by a previous run
+        names = self._list_segments()
+        self._next_sequence = max(_sequence(name) for name in names) + 1 if names else 0
+
+    def _list_segments(self) -> List[str]:
+        return sorted(name for name in os.listdir(self.directory) if name.startswith(SEGMENT_PREFIX))
+
+    def _list_closed(self) -> List[str]:
+        return [name for name in self._list_segments() if name.endswith(SEGMENT_SUFFIX)]
+
+    # Ownership
+
+    def acquire(self) -> bool:
+        """
+        Take an exclusive lock on the directory for this process
+
+        An active segment left open by a previous owner is closed, since
+        nobody else can still be appending to it.
+
+        Returns:
+            True if the lock is held (always True without fcntl), False if
+            another live process owns the directory
+        """
+        self._lock_file = lock_file(os.path.join(self.directory, LOCK_FILE))
+        if self._lock_file is None:
+            return False
+        with self._lock:
+            for name in self._list_segments():
+                if name.endswith(OPEN_SUFFIX) and name != self._active_name + OPEN_SUFFIX:
+                    os.replace(os.path.join(self.directory, name),
+                               os.path.join(self.directory, name[:-len(OPEN_SUFFIX)]))
+            self._closed = self._list_closed()
+        return True
+
+    def move(self, directory: str) -> None:
+        """
+        Rename the spool directory, keeping the lock and active segment
+
+        Lets an owner create and lock a directory under a name readers do not
+        scan, then publish it only once it is owned.
+        """
+        with self._lock:
+            os.rename(self.directory, directory)
+            self.directory = directory
+        _fsync_directory(os.path.dirname(os.path.abspath(directory)))
+
+    def release(self) -> None:
+        """Close the active segment and give up the directory lock"""
+        self.rotate()
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+    # Writing
+
+    def append(self, record: Dict[str, Any]) -> None:
+        """Append one record to the active segment"""
+        line = (json.dumps(record, default=self._encoder, separators=(',', ':')) + '\n').encode('utf-8')
+        with self._lock:
+            if self._active is None:
+                self._open_segment()
+            self._active.write(line)
+            self._active.flush()
+            self._active_size += len(line)
+            self._dirty = True
+            if self.fsync_interval <= 0:
+                os.fsync(self._active.fileno())
+                self._dirty = False
+            if self._active_size >= self.segment_bytes:
+                self._close_segment()
+        if self.fsync_interval > 0 or self.max_segment_age > 0:
+            self._ensure_flusher()
+
+    def _open_segment(self) -> None:
+        name = f"{SEGMENT_PREFIX}{self._next_sequence:012d}{SEGMENT_SUFFIX}"
+        self._next_sequence += 1
+        self._active = open(os.path.join(self.directory, name + OPEN_SUFFIX), 'ab')
+        self._active_name = name
+        self._active_size = 0
+        self._active_opened = time.monotonic()
+        _fsync_directory(self.directory)
+
+    def _close_segment(self) -> None:
+        """Fsync, close and seal the active segment (lock held)"""
+        self._active.flush()
+        os.fsync(self._active.fileno())
+        self._active.close()
+        path = os.path.join(self.directory, self._active_name)
+        os.replace(path + OPEN_SUFFIX, path)
+        _fsync_directory(self.directory)
+        self._closed.append(self._active_name)
+        self._active = None
+        self._active_name = ''
+        self._active_size = 0
+        self._dirty = False
+
+    def rotate(self) -> None:
+        """Close the active segment if it holds any records, making it drainable"""
+        with self._lock:
+            if self._active is not None and self._active_size:
+                self._close_segment()
+
+    def sync(self) -> None:
+        """Fsync the active segment if it has unsynced records, without blocking appends"""
+        with self._lock:
+            if self._active is None or not self._dirty:
+                return
+            self._dirty = False
+            # A duplicate descriptor stays valid if the segment is rotated meanwhile
+            fileno = os.dup(self._active.fileno())
+        try:
+            os.fsync(fileno)
+        finally:
+            os.close(fileno)
+
+    def _ensure_flusher(self) -> None:
+        if self._flusher is not None and self._flusher.is_alive():
+            return
+        with self._lock:
+            if self._flusher is None or not self._flusher.is_alive():
+                self._flusher = threading.Thread(target=self._flush_loop, name='spool-fsync', daemon=True)
+                self._flusher.start()
+
+    def _flush_loop(self) -> None:
+        interval = min(value for value in (self.fsync_interval, self.max_segment_age) if value > 0)
+        while True:
+            time.sleep(interval)
+            try:
+                if self.max_segment_age > 0 and time.monotonic() - self._active_opened >= self.max_segment_age:
+                    self.rotate()
+                    # Forget segments another process has drained meanwhile
+                    with self._lock:
+                        self._closed = [
+                            name for name in self._closed if os.path.exists(os.path.join(self.directory, name))
+                        ]
+                if self.fsync_interval > 0:
+                    self.sync()
+            except Exception as e:
+                logger.error(f"Error syncing spool segment in {self.directory}: {str(e)}")
+            if self._active is None and not self._dirty:
+                # Idle: stop until the next append
+                with self._lock:
+                    if self._active is None:
+                        self._flusher = None
+                        return
+
+    # Reading
+
+    @property
+    def is_empty(self) -> bool:
+        """Whether no records are waiting to be drained"""
+        return not self._closed and not self._active_size
+
+    def pending_bytes(self) -> int:
+        """Total size of undrained segments"""
+        total = self._active_size
+        for name in list(self._closed):
+            try:
+                total += os.path.getsize(os.path.join(self.directory, name))
+            except OSError:
+                pass
+        return total
+
+    def read_segment(self, name: str, offset: int = 0) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """
+        Read the records of a closed segment
+
+        Args:
+            name: Segment file name
+            offset: Byte offset to start at
+
+        Yields:
+            Tuples of (offset after the record, record). A torn final line
+            (crash mid-append) is skipped.
+        """
+        with open(os.path.join(self.directory, name), 'rb') as segment:
+            segment.seek(offset)
+            for line in segment:
+                offset += len(line)
+                try:
+                    yield offset, json.loads(line)
+                except ValueError:
+                    logger.warning(f"Skipping unreadable record in spool segment {name} at byte {offset - len(line)}")
+
+    def _read_checkpoint(self) -> Tuple[Optional[str], int]:
+        try:
+            with open(os.path.join(self.directory, CHECKPOINT_FILE)) as checkpoint:
+                data = json.load(checkpoint)
+            return data.get('segment'), int(data.get('offset', 0))
+        except (OSError, ValueError):
+            return None, 0
+
+    def _write_checkpoint(self, name: str, offset: int) -> None:
+        path = os.path.join(self.directory, CHECKPOINT_FILE)
+        with open(path + '.tmp', 'w') as checkpoint:
+            json.dump({'segment': name, 'offset': offset}, checkpoint)
+            checkpoint.flush()
+            os.fsync(checkpoint.fileno())
+        os.replace(path + '.tmp', path)
+
+    def drain(self, handler: Callable[[List[Dict[str, Any]]], None], batch_size: int = 1000,
+              rotate: bool = True) -> int:
+        """
+        Hand all records to `handler` in append order, in batches
+
+        The active segment is rotated first, so appends made while draining
+        go to a new segment (drained by the next call). A process that does
+        not own the directory passes rotate=False and only drains segments
+        the owner has closed; it must hold its own lock so that only one
+        reader drains the directory at a time. A batch counts as
+        done once `handler` returns; if it raises, the drain stops and the
+        next drain resumes at that batch. A crash between a handler call and
+        the checkpoint write replays that batch once more, so handlers should
+        be idempotent.
+
+        Args:
+            handler: Callable taking a list of records
+            batch_size: Maximum records per handler call
+            rotate: Whether to close the active segment first (owner only)
+
+        Returns:
+            Number of records drained
+        """
+        if rotate:
+            self.rotate()
+        with self._lock:
+            self._closed = self._list_closed()
+        drained = 0
+        checkpoint_segment, checkpoint_offset = self._read_checkpoint()
+
+        for name in list(self._closed):
+            offset = checkpoint_offset if name == checkpoint_segment else 0
+            batch: List[Dict[str, Any]] = []
+            for end, record in self.read_segment(name, offset):
+                batch.append(record)
+                if len(batch) >= batch_size:
+                    handler(batch)
+                    drained += len(batch)
+                    self._write_checkpoint(name, end)
+                    batch = []
+            if batch:
+                handler(batch)
+                drained += len(batch)
+
+            os.remove(os.path.join(self.directory, name))
+            self._closed.remove(name)
+            self._write_checkpoint('', 0)
+            _fsync_directory(self.directory)
+
+        return drained
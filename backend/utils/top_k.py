@@ -0,0 +1,83 @@
+"""
+Bounded-memory heavy-hitter counting (Space-Saving algorithm)
+"""
+from typing import Any, Dict, Hashable, List, Tuple
+import heapq
+import itertools
+
+
+class SpaceSavingCounter:
+    """
+    Approximate top-K counter that keeps at most `capacity` keys
+
+    When a new key arrives while the counter is full, the key with the
+    smallest count is replaced and the newcomer inherits that count (recorded
+    as its error). Counts are therefore overestimates by at most `error`, and
+    any key whose true count exceeds total / capacity is guaranteed to be kept.
+    """
+
+    def __init__(self, capacity: int):
+        if capacity < 1:
+            raise ValueError('capacity must be at least 1')
+        self.capacity = capacity
+        self.total = 0
+        self.evictions = 0
+        # key -> [count, error]
+        self._counts: Dict[Hashable, List[int]] = {}
+        # Min-heap of (count, tie-breaker, key); stale entries are skipped lazily
+        self._heap: List[Tuple[int, int, Hashable]] = []
+        self._sequence = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+    def add(self, key: Hashable, count: int = 1) -> None:
+        """Count occurrences of a key"""
+        self.total += count
+        entry = self._counts.get(key)
+        if entry is not None:
+            entry[0] += count
+        elif len(self._counts) < self.capacity:
+            entry = self._counts[key] = [count, 0]
+        else:
+            minimum, evicted = self._pop_min()
+            del self._counts[evicted]
+            self.evictions += 1
+            entry = self._counts[key] = [minimum + count, minimum]
+
+        heapq.heappush(self._heap, (entry[0], next(self._sequence), key))
+        if len(self._heap) > 4 * self.capacity:
+            self._compact()
+
+    def _pop_min(self) -> Tuple[int, Hashable]:
+        """Remove and return the (count, key) with the smallest current count"""
+        while True:
+            count, _, key = heapq.heappop(self._heap)
+            entry = self._counts.get(key)
+            if entry is not None and entry[0] == count:
+                return count, key
+
+    def _compact(self) -> None:
+        """Rebuild the heap from live counts, dropping stale entries"""
+        self._heap = [(entry[0], next(self._sequence), key) for key, entry in self._counts.items()]
+        heapq.heapify(self._heap)
+
+    @property
+    def is_exact(self) -> bool:
+        """Whether no key was ever evicted, so all counts are exact"""
+        return self.evictions == 0
+
+    def top(self, n: int) -> List[Tuple[Any, int, int]]:
+        """
+        Get the n keys with the highest counts
+
+        Args:
+            n: Number of keys to return
+
+        Returns:
+            List of (key, count, error) tuples, highest count first
+        """
+        return [
+            (key, entry[0], entry[1])
+            for key, entry in heapq.nlargest(n, self._counts.items(), key=lambda item: item[1][0])
+        ]
@@ -142,3 +142,34 @@ def paginate_results(results: List[Any], page: int, per_page: int) -> Dict[str,
         'total': total,
         'has_next': has_next
     }
+
+
+def parse_fields_param(raw: Optional[str], allowed: List[str]) -> Union[Optional[List[str]], tuple]:
+    """
+    Parse a sparse fieldset parameter such as ?fields=id,page_url,timestamp
+    
+    Args:
+        raw: Comma-separated field names from the query string, or None
+        allowed: Field names the endpoint can return
+        
+    Returns:
+        List of requested fields (None if the parameter is absent) or error response tuple
+    """
+    if raw is None:
+        return None
+    
+    fields = []
+    for field in raw.split(','):
+        field = field.strip()
+        if field and field not in fields:
+            fields.append(field)
+    
+    unknown = [field for field in fields if field not in allowed]
+    if unknown or not fields:
+        return jsonify({
+            'error': 'Invalid fields parameter',
+            'details': [f"Unknown field: {field}" for field in unknown] or ['No fields requested'],
+            'allowed_fields': list(allowed)
+        }), 400
+    
+    return fields
@@ -25,6 +25,26 @@ export const getRealtimeStats = async (): Promise<RealtimeStats> => {
   }
 };
 
+export interface RealtimeUpdate {
+  active_sessions: number;
+  page_views_last_hour: number;
+  top_pages_today: RealtimeStats['top_pages_today'];
+  sequence: number;
+  new_events: any[];
+}
+
+// Subscribe to pushed real-time statistics instead of polling; returns an unsubscribe function
+export const subscribeRealtimeStats = (
+  onSnapshot: (stats: RealtimeStats) => void,
+  onUpdate: (update: RealtimeUpdate) => void
+): (() => void) => {
+  const source = new EventSource(`${API_URL}/api/tracking/realtime/stream`);
+  source.addEventListener('snapshot', (event) => onSnapshot(JSON.parse((event as MessageEvent).data)));
+  source.addEventListener('update', (event) => onUpdate(JSON.parse((event as MessageEvent).data)));
+  source.onerror = (error) => console.error('Real-time stream error:', error);
+  return () => source.close();
+};
+
 export const getTrackingEvents = async (page = 1, perPage = 50, type = 'all'): Promise<TrackingEvents> => {
   try {
     const response = await axios.get<TrackingEvents>(`${API_URL}/api/tracking/events`, {
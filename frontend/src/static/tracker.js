@@ -22,8 +22,8 @@
   }
   
   // Utility functions
-  function generateSessionId() {
-    // Generate a random session ID
+  function generateId() {
+    // Generate a random UUID-like ID
     return 'xxxxxxxx-xxxx-4xxx-yxxx-xxxxxxxxxxxx'.replace(/[xy]/g, function(c) {
       const r = Math.random() * 16 | 0;
       return (c === 'x' ? r : (r & 0x3 | 0x8)).toString(16);
@@ -34,7 +34,7 @@
     // Get or create a session ID
     let sessionId = sessionStorage.getItem(SESSION_STORAGE_KEY);
     if (!sessionId) {
-      sessionId = generateSessionId();
+      sessionId = generateId();
       sessionStorage.setItem(SESSION_STORAGE_KEY, sessionId);
     }
     return sessionId;
@@ -116,6 +116,7 @@
         os: os,
         device: device,
         session_id: sessionId,
+        client_event_id: generateId(),
         is_entry_page: isEntryPage,
         is_exit_page: false
       };
@@ -144,6 +145,10 @@
       console.error('Error in tracking visit:', error);
     }
   }
+  // The unload, pagehide and visibilitychange handlers all report the exit of
+  // this page view; they share one event ID so the server stores it once
+  const exitEventId = generateId();
+
     // Track exit page
   function trackExitPage() {
     // Check if tracking is allowed
@@ -159,6 +164,7 @@
         const visitData = {
           page_url: window.location.href,
           session_id: sessionId,
+          client_event_id: exitEventId,
           is_entry_page: false,
           is_exit_page: true
         };
@@ -207,6 +213,7 @@
       const visitData = {
         page_url: window.location.href,
         session_id: getSessionId(),
+        client_event_id: exitEventId,
         is_entry_page: false,
         is_exit_page: true
       };
@@ -232,6 +239,7 @@
         const visitData = {
           page_url: window.location.href,
           session_id: sessionId,
+          client_event_id: generateId(),
           is_entry_page: false,
           is_exit_page: false,
           event_name: eventName,